@@ -0,0 +1,222 @@
+import time
+import tracemalloc
+
+import numpy as np
+
+from screen_space import PixelDataGrid, flow_field_streamlines, poisson_disk_stipples
+from screen_space.point_registry import FlatPointRegistry, PointRegistry
+
+
+def synthetic_pixel_grid(width: int, height: int) -> PixelDataGrid:
+    """Fully covered grid with a horizontal luminance ramp from 0 to 1 and a smoothly rotating direction field."""
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    coverage = np.ones_like(x)
+    luminance = x / float(width - 1)
+    depth = 5.0 + 0.001 * y
+    orientation = 0.25 * np.pi + 0.5 * np.sin(x / 97.0) * np.cos(y / 131.0)
+    pixels = np.stack((coverage, luminance, depth, np.cos(orientation), np.sin(orientation)), axis=-1)
+    return PixelDataGrid(pixels)
+
+
+def benchmark_point_registries(
+    width: int = 2000,
+    height: int = 1500,
+    cell_size: float = 10.0,
+    point_counts: tuple[int, ...] = (200_000, 1_000_000),
+    query_distances: tuple[float, ...] = (10.0, 3.0),
+    query_count: int = 20_000,
+    points_per_entity: int = 50
+):
+    rng = np.random.default_rng(42)
+    queries = [tuple(q) for q in rng.uniform((0.0, 0.0), (width, height), (query_count, 2)).tolist()]
+
+    for point_count in point_counts:
+        points = rng.uniform((0.0, 0.0), (width, height), (point_count, 2))
+        entities = [
+            [tuple(p) for p in points[i:i + points_per_entity].tolist()]
+            for i in range(0, point_count, points_per_entity)
+        ]
+        for registry_class in (PointRegistry, FlatPointRegistry):
+            tracemalloc.start()
+            start_time = time.perf_counter()
+            registry = registry_class(width, height, cell_size)
+            for entity in entities:
+                registry.add_points(entity)
+            insert_time = time.perf_counter() - start_time
+            memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.stop()
+
+            for d_sep in query_distances:
+                start_time = time.perf_counter()
+                allowed_count = sum(registry.is_point_allowed(q, d_sep, 0.5 * d_sep, 7) for q in queries)
+                query_time = time.perf_counter() - start_time
+                print(
+                    f"{registry_class.__name__:>18}: {point_count:>8} points, d_sep {d_sep:5.1f} px | "
+                    f"insert {insert_time:6.2f} s | {memory / point_count:6.1f} B/point | "
+                    f"query {1.0e6 * query_time / query_count:6.1f} us | allowed {allowed_count}"
+                )
+
+
+def benchmark_registry_levels(
+    width: int = 1000,
+    height: int = 750,
+    d_sep_max: float = 12.0,
+    shadow_factors: tuple[float, ...] = (1.0, 0.5, 0.25, 0.1),
+    registry_types: tuple[str, ...] = ("GRID", "MULTILEVEL")
+):
+    grid = synthetic_pixel_grid(width, height)
+
+    for shadow_factor in shadow_factors:
+        for registry_type in registry_types:
+            start_time = time.perf_counter()
+            streamlines = flow_field_streamlines(
+                grid,
+                rng_seed=42,
+                seed_box_size=2.0 * d_sep_max,
+                d_sep_max=d_sep_max,
+                d_sep_shadow_factor=shadow_factor,
+                gamma_luminance=1.0,
+                d_test_factor=0.75,
+                d_step=1.0,
+                max_depth_step=0.05,
+                max_accum_angle=5.0,
+                max_hatched_luminance=10.0,
+                max_steps=100,
+                min_steps=10,
+                registry_type=registry_type
+            )
+            elapsed = time.perf_counter() - start_time
+            point_count = streamlines.point_count
+            print(
+                f"Hatching, shadow factor {shadow_factor:4.2f}, {registry_type:>10}: "
+                f"{elapsed:6.2f} s for {len(streamlines)} lines with {point_count} points"
+            )
+
+    for shadow_factor in shadow_factors:
+        for registry_type in registry_types:
+            start_time = time.perf_counter()
+            stipples = poisson_disk_stipples(
+                grid,
+                rng_seed=42,
+                seed_box_size=2.0 * d_sep_max,
+                r_max=d_sep_max,
+                r_min=shadow_factor * d_sep_max,
+                gamma=1.0,
+                child_count=30,
+                registry_type=registry_type
+            )
+            elapsed = time.perf_counter() - start_time
+            print(
+                f"Stippling, r_min / r_max {shadow_factor:4.2f}, {registry_type:>10}: "
+                f"{elapsed:6.2f} s for {len(stipples)} stipples"
+            )
+
+
+def benchmark_stipple_batches(
+    width: int = 4000,
+    height: int = 2250,
+    r_max: float = 12.0,
+    r_min: float = 3.0,
+    child_count: int = 100,
+    registry_types: tuple[str, ...] = ("GRID", "RASTER")
+):
+    grid = synthetic_pixel_grid(width, height)
+
+    for registry_type in registry_types:
+        for batch_candidates in (False, True):
+            start_time = time.perf_counter()
+            stipples = poisson_disk_stipples(
+                grid,
+                rng_seed=42,
+                seed_box_size=2.0 * r_max,
+                r_max=r_max,
+                r_min=r_min,
+                gamma=1.0,
+                child_count=child_count,
+                registry_type=registry_type,
+                batch_candidates=batch_candidates
+            )
+            elapsed = time.perf_counter() - start_time
+            print(
+                f"Stippling, {registry_type:>10}, batch candidates {batch_candidates!s:>5}: "
+                f"{elapsed:6.2f} s, {len(stipples) / elapsed:8.0f} stipples/s"
+            )
+
+
+def streamline_alignment_error(grid: PixelDataGrid, streamlines) -> float:
+    """Mean angle in radians between the line segments and the direction field at their midpoints."""
+    errors = []
+    for line in streamlines:
+        segments = np.diff(line, axis=0)
+        midpoints = line[:-1] + 0.5 * segments
+        gvs = grid.grid_values(midpoints[:, 0], midpoints[:, 1])
+        lengths = np.hypot(segments[:, 0], segments[:, 1])
+        cosines = np.abs(segments[:, 0] * gvs.direction_cos + segments[:, 1] * gvs.direction_sin) / lengths
+        errors.append(np.arccos(np.clip(cosines, 0.0, 1.0)))
+    return float(np.concatenate(errors).mean()) if errors else 0.0
+
+
+def benchmark_integrators(
+    width: int = 1000,
+    height: int = 750,
+    d_sep_max: float = 12.0,
+    configurations: tuple[tuple[str, float, float], ...] = (
+        ("EULER", 1.0, 0.0),
+        ("EULER", 0.5, 0.0),
+        ("RK2", 1.0, 0.05),
+        ("RK4", 1.0, 0.05),
+        ("RK4", 1.0, 0.01)
+    ),
+    min_length_ratio: float = 0.95
+):
+    """
+    The first configuration is the reference: every other one has to cover at least min_length_ratio
+    of its total line length, whatever its point count, and follow the direction field as closely.
+    """
+    grid = synthetic_pixel_grid(width, height)
+    reference = None
+
+    for integrator, d_step, max_step_error in configurations:
+        start_time = time.perf_counter()
+        streamlines = flow_field_streamlines(
+            grid,
+            rng_seed=42,
+            seed_box_size=2.0 * d_sep_max,
+            d_sep_max=d_sep_max,
+            d_sep_shadow_factor=0.5,
+            gamma_luminance=1.0,
+            d_test_factor=0.75,
+            d_step=d_step,
+            max_depth_step=0.05,
+            max_accum_angle=5.0,
+            max_hatched_luminance=10.0,
+            # Same maximum line length for every step size
+            max_steps=int(100 / d_step),
+            min_steps=int(10 / d_step),
+            integrator=integrator,
+            max_step_error=max_step_error
+        )
+        elapsed = time.perf_counter() - start_time
+        length = sum(float(np.hypot(*np.diff(line, axis=0).T).sum()) for line in streamlines)
+        alignment_error = streamline_alignment_error(grid, streamlines)
+        print(
+            f"Hatching, {integrator:>5}, step {d_step:4.2f} px, error {max_step_error:4.2f} px: "
+            f"{elapsed:6.2f} s for {len(streamlines)} lines with {streamlines.point_count} points, "
+            f"{length:8.0f} px length, alignment error {alignment_error:.5f} rad"
+        )
+        if reference is None:
+            reference = (length, alignment_error)
+            continue
+        assert length >= min_length_ratio * reference[0], f"{integrator} covers {length:.0f} px of {reference[0]:.0f} px"
+        assert alignment_error <= reference[1], f"{integrator} alignment error {alignment_error:.5f} rad exceeds {reference[1]:.5f} rad"
+
+
+def main():
+    benchmark_point_registries()
+    benchmark_registry_levels()
+    benchmark_stipple_batches()
+    benchmark_integrators()
+
+
+if __name__ == "__main__":
+    main()
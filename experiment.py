@@ -1,7 +1,7 @@
 import bpy
 from mathutils import Vector
 
-from screen_space import BlenderRenderEngine, BlenderScene, GreasePencilDrawing, PixelDataGrid, ShaderRenderEngine, catmull_rom_interpolate, poisson_disk_stipples, scribbles_from_stipples, streamlines_to_stroke_positions, visvalingam_whyatt
+from screen_space import BlenderRenderEngine, BlenderScene, GreasePencilDrawing, PixelDataGrid, Polylines, ShaderRenderEngine, catmull_rom_interpolate_polylines, poisson_disk_stipples, scribbles_from_stipples, simplify_polylines, spawn_seeds, streamlines_to_stroke_positions
 
 
 render_resolution = 1000
@@ -112,12 +112,12 @@ print(f"Generated {len(stipples)} stipples")
 # )
 
 scribbles = []
-for _ in range(2):
-    scribbles.append(scribbles_from_stipples(stipples, initial_sampling_rate=65, min_remaining_point_fraction=0.025, depth_factor=10000.0))
-scribbles = [catmull_rom_interpolate(sl, points_per_segment=10) for sl in scribbles]
-print("Number of points in the scribble lines:", sum(len(sl) for sl in scribbles))
-scribbles = [visvalingam_whyatt(sl, max_area=0.05) for sl in scribbles]
-print("Number of points after simplification:", sum(len(sl) for sl in scribbles))
+for scribble_seed in spawn_seeds(42, 2):
+    scribbles.append(scribbles_from_stipples(stipples, initial_sampling_rate=65, min_remaining_point_fraction=0.025, depth_factor=10000.0, rng_seed=scribble_seed))
+scribbles = catmull_rom_interpolate_polylines(Polylines.from_lines(scribbles), points_per_segment=10)
+print("Number of points in the scribble lines:", scribbles.point_count)
+scribbles = simplify_polylines(scribbles, max_area=0.05)
+print("Number of points after simplification:", scribbles.point_count)
 
 stroke_positions = streamlines_to_stroke_positions(
     width,
@@ -127,7 +127,7 @@ stroke_positions = streamlines_to_stroke_positions(
     frame_y_axis.to_tuple(),
     scribbles
 )
-stroke_lengths = [len(sl) for sl in scribbles]
+stroke_lengths = scribbles.lengths.tolist()
 print("Number of points in the strokes:", stroke_positions.shape[0])
 
 gp_drawing = GreasePencilDrawing(bpy.context.scene.objects["HatchLines"], "Layer")
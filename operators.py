@@ -1,7 +1,8 @@
 import bpy
 from mathutils import Vector
 
-from .screen_space import BlenderRenderEngine, BlenderScene, ShaderRenderEngine, PixelDataGrid, GreasePencilDrawing, catmull_rom_interpolate, flow_field_streamlines, poisson_disk_stipples, scribbles_from_stipples, stipples_to_stroke_positions, streamlines_to_stroke_positions, visvalingam_whyatt
+from .screen_space import BlenderRenderEngine, BlenderScene, Budget, GeneratorStatistics, InstancedMesh, ShaderRenderEngine, PixelDataGrid, GreasePencilDrawing, Polylines, catmull_rom_interpolate_polylines, cull_instanced_meshes, flow_field_streamlines, poisson_disk_stipples, scribbles_from_stipples, simplify_polylines, spawn_seeds, stipples_to_stroke_positions, streamlines_to_stroke_positions, Tracer
+from .screen_space.geometry_cache import geometry_cache, register_handlers, unregister_handlers
 
 
 class HATCH_OT_generate(bpy.types.Operator):
@@ -19,6 +20,7 @@ class HATCH_OT_generate(bpy.types.Operator):
         hatch_props = context.scene.hatch_line_props
 
         print("Generating screen-space shading effect...")
+        tracer = Tracer()
         scene = BlenderScene(hatch_props.input_light)
 
         blender_width, blender_height = scene.render_resolution()
@@ -68,42 +70,88 @@ class HATCH_OT_generate(bpy.types.Operator):
         print("Frame Y axis:", frame_y_axis)
         print("Frame origin:", frame_origin)
 
+        geometry_cache.max_bytes = hatch_props.geometry_cache_size * 1024 * 1024
+        geometry_cache.trim()
+        instanced_meshes = None
+
+        def scene_triangles() -> list[InstancedMesh]:
+            # Extracted once per run and shared by all hatching passes
+            nonlocal instanced_meshes
+            if instanced_meshes is None:
+                with tracer.span("scene extraction") as span:
+                    hits, misses = geometry_cache.hits, geometry_cache.misses
+                    instanced_meshes = scene.instanced_triangle_data(geometry_cache if geometry_cache.max_bytes > 0 else None)
+                    span.sizes["meshes"] = len(instanced_meshes)
+                    span.sizes["instances"] = sum(len(m.matrices) for m in instanced_meshes)
+                    span.sizes["triangles"] = sum(m.triangles.triangle_count * len(m.matrices) for m in instanced_meshes)
+                    span.sizes["vertices"] = sum(len(m.triangles.vertices) for m in instanced_meshes)
+                    span.sizes["cache_hits"] = geometry_cache.hits - hits
+                    span.sizes["cache_misses"] = geometry_cache.misses - misses
+                print("Unique mesh count:", span.sizes["meshes"], "instance count:", span.sizes["instances"])
+                print("Vertex count:", span.sizes["vertices"])
+                print(f"Geometry cache: {span.sizes['cache_hits']} hits, {span.sizes['cache_misses']} misses, {geometry_cache.nbytes / 2**20:.1f} MB")
+                if hatch_props.frustum_culling or hatch_props.back_face_culling:
+                    with tracer.span("culling", triangles=span.sizes["triangles"]) as span:
+                        instanced_meshes, culled_count = cull_instanced_meshes(
+                            instanced_meshes,
+                            view_projection_matrix,
+                            frustum=hatch_props.frustum_culling,
+                            back_faces=hatch_props.back_face_culling
+                        )
+                        span.sizes["culled_triangles"] = culled_count
+                    print(f"Culled {culled_count} of {span.sizes['triangles']} triangles before upload")
+            return instanced_meshes
+
         def render_pixel_grid(orientation_offset) -> PixelDataGrid:
-            if hatch_props.render_engine == "SHADER":
-                renderer = ShaderRenderEngine()
-                triangle_data = scene.world_triangle_data()
-                print("Vertex count:", len(triangle_data.vertices))
-                print("Normal count:", len(triangle_data.normals))
-                pixels = renderer.render_coverage_luminance_depth_direction(
-                    triangle_data,
-                    view_projection_matrix,
-                    camera_clip_range,
-                    light_direction if hatch_props.is_directional_light else light_position,
-                    hatch_props.is_directional_light,
-                    orientation_offset,
-                    width,
-                    height
-                )
-            else:
-                scene.set_render_resolution(width, height)
-                renderer = BlenderRenderEngine(hatch_props.target_gp)
-                renderer.initialize_compositor()
-                pixels = renderer.render_coverage_luminance_depth_direction(
-                    view_projection_matrix,
-                    light_direction if hatch_props.is_directional_light else light_position,
-                    hatch_props.is_directional_light,
-                    clip_luminance = hatch_props.clip_luminance,
-                    normalize_luminance = hatch_props.normalize_luminance,
-                    orientation_offset = orientation_offset,
-                    camera_far_clip = camera_clip_range[1]
-                )
-                scene.set_render_resolution(blender_width, blender_height)
+            with tracer.span("rendering", pixels=width * height):
+                if hatch_props.render_engine == "SHADER":
+                    renderer = ShaderRenderEngine()
+                    pixels = renderer.render_coverage_luminance_depth_direction(
+                        scene_triangles(),
+                        view_projection_matrix,
+                        camera_clip_range,
+                        light_direction if hatch_props.is_directional_light else light_position,
+                        hatch_props.is_directional_light,
+                        orientation_offset,
+                        width,
+                        height
+                    )
+                else:
+                    scene.set_render_resolution(width, height)
+                    renderer = BlenderRenderEngine(hatch_props.target_gp, tracer=tracer)
+                    renderer.initialize_compositor()
+                    pixels = renderer.render_coverage_luminance_depth_direction(
+                        view_projection_matrix,
+                        light_direction if hatch_props.is_directional_light else light_position,
+                        hatch_props.is_directional_light,
+                        clip_luminance = hatch_props.clip_luminance,
+                        normalize_luminance = hatch_props.normalize_luminance,
+                        orientation_offset = orientation_offset,
+                        camera_far_clip = camera_clip_range[1]
+                    )
+                    scene.set_render_resolution(blender_width, blender_height)
 
             print("Luminance range:", pixels[:, :, 1].min(), pixels[:, :, 1].max())
             print("Z range:", pixels[:, :, 2].min(), pixels[:, :, 2].max())
 
-            return PixelDataGrid(pixels)
+            with tracer.span("grid construction", pixels=width * height):
+                return PixelDataGrid(pixels)
+
+
+        budgets: list[Budget] = []
+
+        def generation_budget() -> Budget | None:
+            # Created right before each generator call, so that rendering and earlier passes
+            # do not use up the time and points of a pass
+            if hatch_props.time_budget <= 0.0 and hatch_props.point_budget <= 0:
+                return None
+            budgets.append(Budget(
+                max_seconds=hatch_props.time_budget if hatch_props.time_budget > 0.0 else None,
+                max_points=hatch_props.point_budget if hatch_props.point_budget > 0 else None
+            ))
+            return budgets[-1]
 
+        statistics = GeneratorStatistics() if hatch_props.collect_statistics else None
 
         if hatch_props.technique == "HATCHING":
             print("Using hatch lines...")
@@ -114,14 +162,14 @@ class HATCH_OT_generate(bpy.types.Operator):
                     hatch_props.max_crosshatched_luminance
                 ))
 
-            streamlines = []
+            hatching_passes = []
 
             for orientation_offset, max_hatched_luminance in hatching_settings:
                 print(f"Hatching pass for orientation offset: {orientation_offset:.5f} rad")
                 grid = render_pixel_grid(orientation_offset)
 
-                streamlines.extend(
-                        flow_field_streamlines(
+                with tracer.span("generation") as span:
+                    hatching_passes.append(flow_field_streamlines(
                         grid,
                         rng_seed=hatch_props.rng_seed,
                         seed_box_size=hatch_props.seed_box_size_factor * hatch_props.d_sep,
@@ -134,82 +182,138 @@ class HATCH_OT_generate(bpy.types.Operator):
                         max_accum_angle=hatch_props.max_accum_angle,
                         max_hatched_luminance=max_hatched_luminance,
                         max_steps=hatch_props.max_steps,
-                        min_steps=hatch_props.min_steps
-                    )
-                )
+                        min_steps=hatch_props.min_steps,
+                        use_precomputed_planes=hatch_props.precomputed_planes,
+                        registry_type=hatch_props.point_registry,
+                        wavefront=hatch_props.wavefront_integration and hatch_props.integrator == "EULER",
+                        workers=hatch_props.worker_count,
+                        tile_size=hatch_props.tile_size,
+                        integrator=hatch_props.integrator,
+                        max_step_error=hatch_props.max_step_error,
+                        budget=generation_budget(),
+                        statistics=statistics
+                    ))
+                    span.sizes["lines"] = len(hatching_passes[-1])
+                    span.sizes["points"] = hatching_passes[-1].point_count
 
+            streamlines = Polylines.concatenate(hatching_passes)
             print("Number of streamlines generated:", len(streamlines))
-            print("Number of points in the streamlines:", sum(len(sl) for sl in streamlines))
-            streamlines = [visvalingam_whyatt(sl, max_area=hatch_props.line_simplification_error_hatching) for sl in streamlines]
-            stroke_lengths = [len(sl) for sl in streamlines]
-            print("Number of points in the streamlines after simplification:", sum(stroke_lengths))
-            stroke_positions = streamlines_to_stroke_positions(
-                width,
-                height,
-                frame_origin.to_tuple(),
-                frame_x_axis.to_tuple(),
-                frame_y_axis.to_tuple(),
-                streamlines
-            )
+            print("Number of points in the streamlines:", streamlines.point_count)
+            with tracer.span("simplification", input_points=streamlines.point_count) as span:
+                streamlines = simplify_polylines(
+                    streamlines, max_area=hatch_props.line_simplification_error_hatching, workers=hatch_props.worker_count
+                )
+                span.sizes["points"] = streamlines.point_count
+            stroke_lengths = streamlines.lengths.tolist()
+            print("Number of points in the streamlines after simplification:", streamlines.point_count)
+            with tracer.span("projection", points=streamlines.point_count):
+                stroke_positions = streamlines_to_stroke_positions(
+                    width,
+                    height,
+                    frame_origin.to_tuple(),
+                    frame_x_axis.to_tuple(),
+                    frame_y_axis.to_tuple(),
+                    streamlines
+                )
         elif hatch_props.technique == "STIPPLING":
             print("Using stippling and scribbling...")
             grid = render_pixel_grid(hatch_props.orientation_offset)
 
-            stipples = poisson_disk_stipples(
-                grid,
-                rng_seed=hatch_props.rng_seed,
-                seed_box_size=hatch_props.seed_box_size_factor * hatch_props.max_radius,
-                r_max=hatch_props.max_radius,
-                r_min=hatch_props.min_radius,
-                gamma=hatch_props.gamma_stippling,
-                max_stippled_luminance=hatch_props.max_stippled_luminance,
-                child_count=hatch_props.child_count
-            )
+            with tracer.span("generation") as span:
+                stipples = poisson_disk_stipples(
+                    grid,
+                    rng_seed=hatch_props.rng_seed,
+                    seed_box_size=hatch_props.seed_box_size_factor * hatch_props.max_radius,
+                    r_max=hatch_props.max_radius,
+                    r_min=hatch_props.min_radius,
+                    gamma=hatch_props.gamma_stippling,
+                    max_stippled_luminance=hatch_props.max_stippled_luminance,
+                    child_count=hatch_props.child_count,
+                    use_precomputed_planes=hatch_props.precomputed_planes,
+                    registry_type=hatch_props.point_registry,
+                    batch_candidates=hatch_props.batch_stipple_candidates,
+                    workers=hatch_props.worker_count,
+                    tile_size=hatch_props.tile_size,
+                    budget=generation_budget(),
+                    statistics=statistics
+                )
+                span.sizes["stipples"] = len(stipples)
             print(f"Generated {len(stipples)} stipples")
 
             if not hatch_props.scribbling_enabled:
                 stroke_lengths = [2 if hatch_props.stroke_length > 0.0 else 1] * len(stipples)
-                stroke_positions = stipples_to_stroke_positions(
-                    width,
-                    height,
-                    frame_origin.to_tuple(),
-                    frame_x_axis.to_tuple(),
-                    frame_y_axis.to_tuple(),
-                    stipples,
-                    hatch_props.stroke_length
-                )
+                with tracer.span("projection", points=sum(stroke_lengths)):
+                    stroke_positions = stipples_to_stroke_positions(
+                        width,
+                        height,
+                        frame_origin.to_tuple(),
+                        frame_x_axis.to_tuple(),
+                        frame_y_axis.to_tuple(),
+                        stipples,
+                        hatch_props.stroke_length
+                    )
             else:
                 scribbles = []
-                for _ in range(hatch_props.scribbling_iterations):
-                    scribbles.append(scribbles_from_stipples(
-                            stipples,
-                            initial_sampling_rate=hatch_props.initial_sub_sampling_rate,
-                            min_remaining_point_fraction=hatch_props.min_remaining_point_share,
-                            depth_factor=hatch_props.depth_factor,
-                            stipple_stroke_length=hatch_props.stroke_length
-                        ))
-                scribbles = [catmull_rom_interpolate(sl, points_per_segment=hatch_props.bezier_points_per_segment) for sl in scribbles if len(sl) >= 4]
-                print("Number of points in the scribble lines:", sum(len(sl) for sl in scribbles))
-                scribbles = [visvalingam_whyatt(sl, max_area=hatch_props.line_simplification_error_scribbling) for sl in scribbles]
-                print("Number of points after simplification:", sum(len(sl) for sl in scribbles))
-
-                stroke_lengths = [len(sl) for sl in scribbles]
-                stroke_positions = streamlines_to_stroke_positions(
-                    width,
-                    height,
-                    frame_origin.to_tuple(),
-                    frame_x_axis.to_tuple(),
-                    frame_y_axis.to_tuple(),
-                    scribbles
-                )
+                # One independent random stream per iteration, derived from the RNG seed
+                for scribble_seed in spawn_seeds(hatch_props.rng_seed, hatch_props.scribbling_iterations):
+                    with tracer.span("scribbling", stipples=len(stipples)) as span:
+                        scribbles.append(scribbles_from_stipples(
+                                stipples,
+                                initial_sampling_rate=hatch_props.initial_sub_sampling_rate,
+                                min_remaining_point_fraction=hatch_props.min_remaining_point_share,
+                                depth_factor=hatch_props.depth_factor,
+                                stipple_stroke_length=hatch_props.stroke_length,
+                                search=hatch_props.scribbling_search,
+                                jitter=hatch_props.scribbling_jitter,
+                                rng_seed=scribble_seed,
+                                statistics=statistics
+                            ))
+                        span.sizes["points"] = len(scribbles[-1])
+                scribbles = Polylines.from_lines(scribbles)
+                with tracer.span("spline interpolation", input_points=scribbles.point_count) as span:
+                    scribbles = catmull_rom_interpolate_polylines(
+                        scribbles,
+                        points_per_segment=hatch_props.bezier_points_per_segment,
+                        include_endpoints=hatch_props.spline_endpoints
+                    )
+                    span.sizes["points"] = scribbles.point_count
+                print("Number of points in the scribble lines:", scribbles.point_count)
+                with tracer.span("simplification", input_points=scribbles.point_count) as span:
+                    scribbles = simplify_polylines(
+                        scribbles, max_area=hatch_props.line_simplification_error_scribbling, workers=hatch_props.worker_count
+                    )
+                    span.sizes["points"] = scribbles.point_count
+                print("Number of points after simplification:", scribbles.point_count)
+
+                stroke_lengths = scribbles.lengths.tolist()
+                with tracer.span("projection", points=scribbles.point_count):
+                    stroke_positions = streamlines_to_stroke_positions(
+                        width,
+                        height,
+                        frame_origin.to_tuple(),
+                        frame_x_axis.to_tuple(),
+                        frame_y_axis.to_tuple(),
+                        scribbles
+                    )
 
         print("Number of points in the strokes:", stroke_positions.shape[0])
-        gp_drawing = GreasePencilDrawing(hatch_props.target_gp, hatch_props.target_gp_layer)
-        if hatch_props.clear_layer:
-            gp_drawing.clear()
-        gp_drawing.add_strokes(stroke_lengths, stroke_positions, hatch_props.gp_stroke_radius)
+        if statistics is not None:
+            print(statistics.summary())
+        with tracer.span("grease pencil writing", strokes=len(stroke_lengths), points=stroke_positions.shape[0]):
+            gp_drawing = GreasePencilDrawing(hatch_props.target_gp, hatch_props.target_gp_layer)
+            if hatch_props.clear_layer:
+                gp_drawing.clear()
+            gp_drawing.add_strokes(stroke_lengths, stroke_positions, hatch_props.gp_stroke_radius)
 
-        self.report({"INFO"}, "Screen-space effect generated successfully")
+        print(tracer.summary())
+        if hatch_props.trace_file:
+            tracer.write_chrome_trace(bpy.path.abspath(hatch_props.trace_file))
+
+        if any(budget.truncated for budget in budgets):
+            point_count = sum(budget.points for budget in budgets)
+            self.report({"WARNING"}, f"Budget exhausted, screen-space effect is partial ({point_count} points)")
+        else:
+            self.report({"INFO"}, "Screen-space effect generated successfully")
         return {"FINISHED"}
 
 
@@ -220,7 +324,9 @@ classes = (
 def register():
     for cls in classes:
         bpy.utils.register_class(cls)
+    register_handlers()
 
 def unregister():
+    unregister_handlers()
     for cls in reversed(classes):
         bpy.utils.unregister_class(cls)
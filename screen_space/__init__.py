@@ -1,10 +1,15 @@
 from .blender_render_engine import BlenderRenderEngine
+from .budget import Budget
+from .culling import cull_instanced_meshes
 from .grease_pencil import GreasePencilDrawing
 from .grid import PixelDataGrid
-from .polylines import visvalingam_whyatt
-from .scene import MeshTriangles, BlenderScene
+from .polylines import Polylines, simplify_polylines, visvalingam_whyatt
+from .random_streams import spawn_seeds
+from .scene import InstancedMesh, MeshTriangles, BlenderScene
 from .scribbling import scribbles_from_stipples
 from .shader_render_engine import ShaderRenderEngine
-from .splines import catmull_rom_interpolate
-from .stippling import poisson_disk_stipples, stipples_to_stroke_positions
+from .splines import catmull_rom_basis, catmull_rom_interpolate, catmull_rom_interpolate_polylines
+from .statistics import GeneratorStatistics
+from .stippling import STIPPLE_DTYPE, poisson_disk_stipples, stipples_to_stroke_positions
 from .streamlines import flow_field_streamlines, streamlines_to_stroke_positions
+from .tracing import Tracer
@@ -5,10 +5,19 @@ import bpy
 from mathutils import Matrix, Vector
 import numpy as np
 
+from .tracing import Tracer, traced
+
 
 class BlenderRenderEngine:
-    def __init__(self, target_gp_obj: bpy.types.Object, far_clip_tolerance: float = 0.001, finite_difference_offset: float = 0.001):
+    def __init__(
+            self,
+            target_gp_obj: bpy.types.Object,
+            far_clip_tolerance: float = 0.001,
+            finite_difference_offset: float = 0.001,
+            tracer: Tracer | None = None
+    ):
         self.target_gp_obj = target_gp_obj
+        self.tracer = tracer
         self.far_clip_tolerance = far_clip_tolerance
         self.finite_difference_offset = finite_difference_offset
 
@@ -112,22 +121,23 @@ class BlenderRenderEngine:
         if self.render_layers is None or self.viewer_node is None or self.composite_node is None:
             raise ValueError("Compositor nodes not initialized. Call initialize_compositor() first.")
 
-        start_time = time.time()
-        self.compositor_links.clear()
-        BlenderRenderEngine._set_render_passes_from_render_layer(render_layer)
-        self.compositor_links.new(self.render_layers.outputs["Image"], self.composite_node.inputs[0])
+        with traced(self.tracer, f"render pass {render_layer}"):
+            start_time = time.time()
+            self.compositor_links.clear()
+            BlenderRenderEngine._set_render_passes_from_render_layer(render_layer)
+            self.compositor_links.new(self.render_layers.outputs["Image"], self.composite_node.inputs[0])
 
-        render_layer_output = self.render_layers.outputs.get(render_layer)
-        if render_layer_output is None:
-            raise ValueError(f"Render layer output '{render_layer}' not found.")
+            render_layer_output = self.render_layers.outputs.get(render_layer)
+            if render_layer_output is None:
+                raise ValueError(f"Render layer output '{render_layer}' not found.")
 
-        self.compositor_links.new(render_layer_output, self.viewer_node.inputs[0])
+            self.compositor_links.new(render_layer_output, self.viewer_node.inputs[0])
 
-        bpy.ops.render.render(write_still=False)
-        elapsed = time.time() - start_time
-        print(f"Render pass '{render_layer}' took {elapsed:.3f} seconds.")
+            bpy.ops.render.render(write_still=False)
+            elapsed = time.time() - start_time
+            print(f"Render pass '{render_layer}' took {elapsed:.3f} seconds.")
 
-        return BlenderRenderEngine._viewer_rgb_pixels()
+            return BlenderRenderEngine._viewer_rgb_pixels()
 
     def render_coverage_luminance_depth_direction(
             self,
@@ -0,0 +1,50 @@
+from dataclasses import dataclass, field
+import math
+import time
+
+
+@dataclass
+class Budget:
+    """
+    Wall-clock and point limits for an anytime run, shared by all calls it is passed to.
+
+    The clock starts when the budget is created. Generators stop cleanly once either limit is
+    reached, return what they have and leave truncated set. None means unlimited. The deadline
+    is absolute wall-clock time, so that worker processes can test it as well.
+    """
+    max_seconds: float | None = None
+    max_points: int | None = None
+    points: int = 0
+    truncated: bool = False
+    deadline: float | None = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if self.deadline is None and self.max_seconds is not None:
+            self.deadline = time.time() + self.max_seconds
+
+    def add_points(self, count: int):
+        self.points += count
+
+    def remaining_seconds(self) -> float | None:
+        return None if self.deadline is None else max(self.deadline - time.time(), 0.0)
+
+    def remaining_points(self) -> int | None:
+        return None if self.max_points is None else max(self.max_points - self.points, 0)
+
+    def is_exhausted(self) -> bool:
+        """Whether a limit is reached, which sets truncated, as the caller is expected to stop."""
+        exhausted = (
+            (self.max_points is not None and self.points >= self.max_points) or
+            (self.deadline is not None and time.time() >= self.deadline)
+        )
+        self.truncated |= exhausted
+        return exhausted
+
+    def share(self, seconds_fraction: float, points_fraction: float) -> "Budget":
+        """New budget with the given fractions of the remaining time and points, e.g. for one tile."""
+        remaining_seconds = self.remaining_seconds()
+        remaining_points = self.remaining_points()
+        return Budget(
+            None if remaining_seconds is None else seconds_fraction * remaining_seconds,
+            None if remaining_points is None else math.ceil(points_fraction * remaining_points)
+        )
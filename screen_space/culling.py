@@ -0,0 +1,86 @@
+import numpy as np
+
+from .scene import InstancedMesh, MeshTriangles
+
+
+def _instances_outside_frustum(triangles: MeshTriangles, model_view_projections: np.ndarray) -> np.ndarray:
+    """Mask of the instances whose bounding box lies entirely beyond one of the six clip planes."""
+    lo = triangles.vertices.min(axis=0).astype(np.float64)
+    hi = triangles.vertices.max(axis=0).astype(np.float64)
+    corners = np.array([
+        (x, y, z, 1.0) for x in (lo[0], hi[0]) for y in (lo[1], hi[1]) for z in (lo[2], hi[2])
+    ])
+    clip = corners @ model_view_projections.transpose(0, 2, 1) # (K, 8, 4)
+    x, y, z, w = clip[..., 0], clip[..., 1], clip[..., 2], clip[..., 3]
+    return (
+        (x < -w).all(axis=1) | (x > w).all(axis=1) |
+        (y < -w).all(axis=1) | (y > w).all(axis=1) |
+        (z < -w).all(axis=1) | (z > w).all(axis=1)
+    )
+
+def _cull_back_faces(triangles: MeshTriangles, model_view_projection: np.ndarray, is_mirrored: bool) -> tuple[MeshTriangles, int]:
+    """
+    Triangles that face the camera under the model-view-projection matrix, with the vertices they
+    use, and the number of triangles removed. Front faces wind counter-clockwise in normalized device
+    coordinates, clockwise for mirrored instances, as in the GPU state of ShaderRenderEngine.
+    Triangles reaching behind the camera are kept.
+    """
+    indices = triangles.indices
+    if indices is None:
+        indices = np.arange(len(triangles.vertices), dtype=np.int32).reshape(-1, 3)
+    clip = triangles.vertices.astype(np.float64) @ model_view_projection[:, :3].T + model_view_projection[:, 3]
+    corners = clip[indices] # (T, 3, 4)
+    w = corners[..., 3]
+    is_behind = (w <= 0.0).any(axis=1)
+    ndc = corners[..., :2] / np.where(w > 0.0, w, 1.0)[..., np.newaxis]
+    edge1 = ndc[:, 1] - ndc[:, 0]
+    edge2 = ndc[:, 2] - ndc[:, 0]
+    signed_area = edge1[:, 0] * edge2[:, 1] - edge1[:, 1] * edge2[:, 0]
+    keep = is_behind | (signed_area < 0.0 if is_mirrored else signed_area > 0.0)
+    culled_count = int(keep.shape[0] - np.count_nonzero(keep))
+    if culled_count == 0:
+        return triangles, 0
+
+    # Compact the vertices so that culled geometry is not uploaded either
+    used, new_indices = np.unique(indices[keep], return_inverse=True)
+    return MeshTriangles(
+        triangles.vertices[used], triangles.normals[used], new_indices.astype(np.int32).reshape(-1, 3)
+    ), culled_count
+
+def cull_instanced_meshes(
+    meshes: list[InstancedMesh],
+    view_projection_matrix: np.ndarray,
+    frustum: bool = True,
+    back_faces: bool = False
+) -> tuple[list[InstancedMesh], int]:
+    """
+    With frustum, drop the instances whose bounding box lies outside the view frustum, and with
+    back_faces the back-facing triangles of meshes with a single remaining instance, before any GPU
+    buffer is built. Meshes drawn several times share one index buffer and are left to the GPU's face
+    culling. The given meshes are not modified, so cached ones stay intact.
+
+    Returns the remaining meshes and the number of culled triangles.
+    """
+    view_projection = np.asarray(view_projection_matrix, dtype=np.float64)
+    remaining = []
+    culled_count = 0
+    for instanced_mesh in meshes:
+        triangles = instanced_mesh.triangles
+        model_view_projections = view_projection @ instanced_mesh.matrices
+        if frustum:
+            is_outside = _instances_outside_frustum(triangles, model_view_projections)
+        else:
+            is_outside = np.zeros(model_view_projections.shape[0], dtype=bool)
+        culled_count += triangles.triangle_count * int(np.count_nonzero(is_outside))
+        if is_outside.all():
+            continue
+        matrices = instanced_mesh.matrices[~is_outside]
+
+        if back_faces and matrices.shape[0] == 1:
+            is_mirrored = bool(np.linalg.det(matrices[0, :3, :3]) < 0.0)
+            triangles, back_face_count = _cull_back_faces(triangles, model_view_projections[~is_outside][0], is_mirrored)
+            culled_count += back_face_count
+            if triangles.triangle_count == 0:
+                continue
+        remaining.append(InstancedMesh(triangles, matrices))
+    return remaining, culled_count
@@ -0,0 +1,147 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import bpy
+from bpy.app.handlers import persistent
+
+from .scene import MeshTriangles
+
+
+@dataclass
+class _CacheEntry:
+    stamp: tuple[int, int]
+    counts: tuple[int, int, int] # vertices, loops and polygons, to catch distinct meshes under one name
+    triangles: MeshTriangles
+
+    @property
+    def nbytes(self) -> int:
+        return self.triangles.vertices.nbytes + self.triangles.normals.nbytes + self.triangles.indices.nbytes
+
+class GeometryCache:
+    """
+    Local-space triangle buffers of evaluated meshes that persist across runs, so that only the
+    geometry that changed since the last run is extracted again.
+
+    Entries are keyed by the original object and mesh names and are valid as long as neither has
+    reported a geometry update to the depsgraph handler; transform, light, camera and parameter
+    changes keep them. The least recently used entries are evicted beyond max_bytes.
+
+    Only plain meshes are cached: the evaluated mesh of an object with modifiers, shape keys or
+    animation may change with the frame without a geometry update, and Geometry Nodes may generate
+    distinct meshes from one original, which the names cannot tell apart.
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries: OrderedDict[tuple[str, str], _CacheEntry] = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._object_stamps: dict[str, int] = {}
+        self._mesh_stamps: dict[str, int] = {}
+
+    @staticmethod
+    def _key(obj: bpy.types.Object, mesh: bpy.types.Mesh) -> tuple[str, str]:
+        mesh_original = mesh.original if mesh.original is not None else mesh
+        return (obj.original.name_full, mesh_original.name_full)
+
+    @staticmethod
+    def is_cacheable(obj: bpy.types.Object, mesh: bpy.types.Mesh) -> bool:
+        """Whether the evaluated mesh is the object's own mesh data, unchanged by time or modifiers."""
+        obj_original = obj.original
+        mesh_original = mesh.original if mesh.original is not None else mesh
+        if obj_original is None or obj_original.data is None or obj_original.data.name_full != mesh_original.name_full:
+            return False
+        return (
+            len(obj_original.modifiers) == 0 and
+            obj_original.animation_data is None and
+            mesh_original.animation_data is None and
+            mesh_original.shape_keys is None
+        )
+
+    def _stamp(self, key: tuple[str, str]) -> tuple[int, int]:
+        return (self._object_stamps.get(key[0], 0), self._mesh_stamps.get(key[1], 0))
+
+    def get(self, obj: bpy.types.Object, mesh: bpy.types.Mesh) -> MeshTriangles | None:
+        """Cached triangles of the evaluated object's mesh, or None if missing, out of date or not cacheable."""
+        if not __class__.is_cacheable(obj, mesh):
+            self.misses += 1
+            return None
+        key = __class__._key(obj, mesh)
+        entry = self.entries.get(key)
+        counts = (len(mesh.vertices), len(mesh.loops), len(mesh.polygons))
+        if entry is None or entry.stamp != self._stamp(key) or entry.counts != counts:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry.triangles
+
+    def put(self, obj: bpy.types.Object, mesh: bpy.types.Mesh, triangles: MeshTriangles):
+        if not __class__.is_cacheable(obj, mesh):
+            return
+        key = __class__._key(obj, mesh)
+        self._remove(key)
+        entry = _CacheEntry(self._stamp(key), (len(mesh.vertices), len(mesh.loops), len(mesh.polygons)), triangles)
+        if entry.nbytes > self.max_bytes:
+            return
+        self.entries[key] = entry
+        self.nbytes += entry.nbytes
+        self.trim()
+
+    def trim(self):
+        """Evict least recently used entries until the cache fits into max_bytes."""
+        while self.entries and self.nbytes > self.max_bytes:
+            _, entry = self.entries.popitem(last=False)
+            self.nbytes -= entry.nbytes
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+
+    def _remove(self, key: tuple[str, str]):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.nbytes -= entry.nbytes
+
+    def invalidate(self, depsgraph: bpy.types.Depsgraph):
+        """Advance the change stamps of all objects and meshes whose geometry the depsgraph updated."""
+        for update in depsgraph.updates:
+            if not update.is_updated_geometry:
+                continue
+            data = update.id.original if update.id.original is not None else update.id
+            if isinstance(data, bpy.types.Object):
+                self._object_stamps[data.name_full] = self._object_stamps.get(data.name_full, 0) + 1
+            elif isinstance(data, bpy.types.Mesh):
+                self._mesh_stamps[data.name_full] = self._mesh_stamps.get(data.name_full, 0) + 1
+
+
+geometry_cache = GeometryCache(512 * 1024 * 1024)
+
+@persistent
+def _on_depsgraph_update(_scene, depsgraph):
+    geometry_cache.invalidate(depsgraph)
+
+@persistent
+def _on_load(*_args):
+    # Names may now refer to different data, and undo restores data without geometry updates
+    geometry_cache.clear()
+
+def register_handlers():
+    bpy.app.handlers.depsgraph_update_post.append(_on_depsgraph_update)
+    # Frame changes re-evaluate without calling depsgraph_update_post
+    bpy.app.handlers.frame_change_post.append(_on_depsgraph_update)
+    bpy.app.handlers.load_post.append(_on_load)
+    bpy.app.handlers.undo_post.append(_on_load)
+    bpy.app.handlers.redo_post.append(_on_load)
+
+def unregister_handlers():
+    for handlers, handler in (
+        (bpy.app.handlers.depsgraph_update_post, _on_depsgraph_update),
+        (bpy.app.handlers.frame_change_post, _on_depsgraph_update),
+        (bpy.app.handlers.load_post, _on_load),
+        (bpy.app.handlers.undo_post, _on_load),
+        (bpy.app.handlers.redo_post, _on_load)
+    ):
+        if handler in handlers:
+            handlers.remove(handler)
+    geometry_cache.clear()
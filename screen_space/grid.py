@@ -13,12 +13,51 @@ class GridValue:
     def is_covered(self) -> bool:
         return self.coverage > 0.9
 
+@dataclass
+class GridValues:
+    coverage: np.ndarray # shape (n,), in [0, 1], where 1 means fully covered
+    luminance: np.ndarray
+    depth: np.ndarray
+    direction_cos: np.ndarray
+    direction_sin: np.ndarray
+    covered: np.ndarray # boolean mask, same semantics as GridValue.is_covered()
+
+    def __len__(self) -> int:
+        return self.coverage.shape[0]
+
+    def __getitem__(self, i: int) -> GridValue:
+        return GridValue(
+            float(self.coverage[i]),
+            float(self.luminance[i]),
+            float(self.depth[i]),
+            (float(self.direction_cos[i]), float(self.direction_sin[i]))
+        )
+
 class PixelDataGrid:
     def __init__(self, pixels: np.ndarray):
         assert pixels.ndim == 3 and pixels.shape[2] == 5, "pixels must have shape (height, width, 5) for coverage, luminance, depth, cos(orientation), sin(orientation)"
         self.width = pixels.shape[1]
         self.height = pixels.shape[0]
         self.pixels = pixels.reshape(-1, 5)
+        self.planes: dict[str, np.ndarray] = {} # Optional derived planes, each flattened to shape (height * width,)
+        self._plane_views: dict[str, memoryview] = {} # Scalar lookups through a memoryview yield plain Python floats
+
+    def add_plane(self, name: str, plane: np.ndarray):
+        assert plane.shape == (self.height, self.width), "plane must have shape (height, width)"
+        flat_plane = np.ascontiguousarray(plane, dtype=np.float32).reshape(-1)
+        self.planes[name] = flat_plane
+        self._plane_views[name] = memoryview(flat_plane)
+
+    def has_plane(self, name: str) -> bool:
+        return name in self.planes
+
+    def normalized_channel(self, channel: int) -> np.ndarray:
+        """Luminance (1) or depth (2) divided by coverage like grid_value(), as a (height, width) plane, 0 where uncovered."""
+        EPS = 1.0e-5
+        coverage = self.pixels[:, 0].reshape(self.height, self.width)
+        is_empty = coverage < EPS
+        values = self.pixels[:, channel].reshape(self.height, self.width) / np.where(is_empty, 1.0, coverage)
+        return np.where(is_empty, 0.0, values)
 
     def grid_value(self, x: int, y: int) -> GridValue:
         x = max(x, 0.0)
@@ -68,3 +107,105 @@ class PixelDataGrid:
             direction = (1.0, 0.0)
 
         return GridValue(coverage, luminance, depth, direction)
+
+    def grid_values(self, xs: np.ndarray, ys: np.ndarray) -> GridValues:
+        """
+        Sample the grid at many points at once.
+
+        Vectorized counterpart of grid_value() with identical clamping and normalization.
+        """
+        EPS = 1.0e-5
+        xs = np.clip(np.asarray(xs, dtype=np.float64), 0.0, float(self.width - 1) - EPS)
+        ys = np.clip(np.asarray(ys, dtype=np.float64), 0.0, float(self.height - 1) - EPS)
+
+        x_int = xs.astype(np.intp)
+        y_int = ys.astype(np.intp)
+        x_frac = xs - x_int
+        y_frac = ys - y_int
+
+        # Indices of the four corners
+        idx_00 = y_int * self.width + x_int
+        idx_01 = idx_00 + 1
+        idx_10 = idx_00 + self.width
+        idx_11 = idx_10 + 1
+
+        # Bilinear weights
+        w_00 = ((1.0 - y_frac) * (1.0 - x_frac)).astype(np.float32)[:, np.newaxis]
+        w_01 = ((1.0 - y_frac) * x_frac).astype(np.float32)[:, np.newaxis]
+        w_10 = (y_frac * (1.0 - x_frac)).astype(np.float32)[:, np.newaxis]
+        w_11 = (y_frac * x_frac).astype(np.float32)[:, np.newaxis]
+
+        result = (
+            self.pixels[idx_00] * w_00 +
+            self.pixels[idx_01] * w_01 +
+            self.pixels[idx_10] * w_10 +
+            self.pixels[idx_11] * w_11
+        )
+
+        coverage = result[:, 0]
+        is_empty = coverage < EPS
+        inverse_coverage = 1.0 / np.where(is_empty, 1.0, coverage)
+        luminance = np.where(is_empty, 0.0, result[:, 1] * inverse_coverage)
+        depth = np.where(is_empty, 0.0, result[:, 2] * inverse_coverage)
+
+        direction_cos, direction_sin = result[:, 3], result[:, 4]
+        direction_mag = np.sqrt(direction_cos*direction_cos + direction_sin*direction_sin)
+        has_direction = (direction_mag > EPS) & ~is_empty
+        inverse_direction_mag = 1.0 / np.where(has_direction, direction_mag, 1.0)
+        direction_cos = np.where(has_direction, direction_cos * inverse_direction_mag, 1.0)
+        direction_sin = np.where(has_direction, direction_sin * inverse_direction_mag, 0.0)
+
+        coverage = np.where(is_empty, 0.0, coverage)
+        return GridValues(coverage, luminance, depth, direction_cos, direction_sin, coverage > 0.9)
+
+    def plane_value(self, name: str, x: float, y: float) -> float:
+        """Bilinearly interpolate a derived plane, clamping like grid_value()."""
+        plane = self._plane_views[name]
+        EPS = 1.0e-5
+        x = min(max(x, 0.0), float(self.width - 1) - EPS)
+        y = min(max(y, 0.0), float(self.height - 1) - EPS)
+
+        x_int = int(x)
+        y_int = int(y)
+        x_frac = x - x_int
+        y_frac = y - y_int
+
+        idx_00 = y_int * self.width + x_int
+        idx_10 = idx_00 + self.width
+        return (
+            (1.0 - y_frac) * ((1.0 - x_frac) * plane[idx_00] + x_frac * plane[idx_00 + 1]) +
+            y_frac * ((1.0 - x_frac) * plane[idx_10] + x_frac * plane[idx_10 + 1])
+        )
+
+    def plane_values(self, name: str, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """Vectorized counterpart of plane_value()."""
+        plane = self.planes[name]
+        EPS = 1.0e-5
+        xs = np.clip(np.asarray(xs, dtype=np.float64), 0.0, float(self.width - 1) - EPS)
+        ys = np.clip(np.asarray(ys, dtype=np.float64), 0.0, float(self.height - 1) - EPS)
+
+        x_int = xs.astype(np.intp)
+        y_int = ys.astype(np.intp)
+        x_frac = xs - x_int
+        y_frac = ys - y_int
+
+        idx_00 = y_int * self.width + x_int
+        idx_10 = idx_00 + self.width
+        return (
+            (1.0 - y_frac) * ((1.0 - x_frac) * plane[idx_00] + x_frac * plane[idx_00 + 1]) +
+            y_frac * ((1.0 - x_frac) * plane[idx_10] + x_frac * plane[idx_10 + 1])
+        )
+
+    def normalized_plane_value(self, name: str, x: float, y: float, coverage: float) -> float:
+        """
+        Interpolate a plane premultiplied by coverage and divide by the interpolated coverage, which
+        weights the pixels like grid_value() does for luminance and depth.
+        """
+        EPS = 1.0e-5
+        return self.plane_value(name, x, y) / coverage if coverage >= EPS else 0.0
+
+    def normalized_plane_values(self, name: str, xs: np.ndarray, ys: np.ndarray, coverage: np.ndarray) -> np.ndarray:
+        """Vectorized counterpart of normalized_plane_value()."""
+        EPS = 1.0e-5
+        is_empty = coverage < EPS
+        return np.where(is_empty, 0.0, self.plane_values(name, xs, ys) / np.where(is_empty, 1.0, coverage))
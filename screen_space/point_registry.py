@@ -1,6 +1,14 @@
+from array import array
 from dataclasses import dataclass
 import math
 
+import numpy as np
+
+from .statistics import GeneratorStatistics
+
+
+# Largest extent in cells of the points of a batch that grid-based registries query at once
+_MAX_BATCH_SPREAD_CELLS = 4
 
 @dataclass
 class PointRegistryEntry:
@@ -45,6 +53,14 @@ class PointRegistry:
             self.cell_content[idx].append(PointRegistryEntry(p, sid))
         return sid
 
+    def add_separate_points(self, points: np.ndarray) -> int:
+        """Add each of the (n, 2) points as an entity of its own. Returns the first id, the others follow consecutively."""
+        first_id = self.next_entity_id
+        for sid, p in enumerate(map(tuple, points.tolist()), first_id):
+            self.cell_content[self._cell_index(p)].append(PointRegistryEntry(p, sid))
+        self.next_entity_id = first_id + points.shape[0]
+        return first_id
+
     def is_point_allowed(
         self,
         p: tuple[float, float],
@@ -76,3 +92,674 @@ class PointRegistry:
                     if dist_squared < min_dist_squared:
                         return False
         return True
+
+    def are_points_allowed(
+        self,
+        xs: np.ndarray,
+        ys: np.ndarray,
+        d_seps: np.ndarray,
+        d_sep_relaxed: float | np.ndarray,
+        relaxed_entity_id: int | np.ndarray
+    ) -> np.ndarray:
+        """
+        Vectorized counterpart of is_point_allowed() for many points with individual separation distances.
+        d_sep_relaxed and relaxed_entity_id are either shared by all points or given per point. Batches spread over more than
+        _MAX_BATCH_SPREAD_CELLS cells are split, so that each part only compares against the entries
+        around itself.
+        """
+        is_allowed = (xs >= 0.0) & (xs < self.width - 1.0) & (ys >= 0.0) & (ys < self.height - 1.0)
+        if not is_allowed.any():
+            return is_allowed
+
+        d_max = float(d_seps.max())
+        ix_min, iy_min = self._cell_coordinates((float(xs.min()) - d_max, float(ys.min()) - d_max))
+        ix_max, iy_max = self._cell_coordinates((float(xs.max()) + d_max, float(ys.max()) + d_max))
+        if max(ix_max - ix_min, iy_max - iy_min) > 2 * math.ceil(d_max / self.cell_size) + _MAX_BATCH_SPREAD_CELLS:
+            return _are_halves_allowed(self, xs, ys, d_seps, d_sep_relaxed, relaxed_entity_id)
+        entries = [
+            entry
+            for iy in range(iy_min, iy_max + 1)
+            for ix in range(ix_min, ix_max + 1)
+            for entry in self._cell(ix, iy)
+        ]
+        if not entries:
+            return is_allowed
+
+        points = np.array([entry.point for entry in entries], dtype=np.float64)
+        entity_ids = np.array([entry.entity_id for entry in entries], dtype=np.int64)
+        x_diff = points[:, 0] - xs[:, np.newaxis]
+        y_diff = points[:, 1] - ys[:, np.newaxis]
+        dist_squared = x_diff * x_diff + y_diff * y_diff
+        d_sep_relaxed_squared = np.square(np.asarray(d_sep_relaxed, dtype=np.float64)).reshape(-1, 1)
+        is_relaxed = entity_ids == np.asarray(relaxed_entity_id).reshape(-1, 1)
+        min_dist_squared = np.where(is_relaxed, d_sep_relaxed_squared, (d_seps * d_seps)[:, np.newaxis])
+        return is_allowed & ~np.any(dist_squared < min_dist_squared, axis=1)
+
+    def scanned_point_count(self, x_min: float, y_min: float, x_max: float, y_max: float, d_sep: float) -> int:
+        """Number of stored points that a query over the box with separation d_sep compares against."""
+        cell_radius = math.ceil(d_sep / self.cell_size)
+        ix_min, iy_min = self._cell_coordinates((x_min, y_min))
+        ix_max, iy_max = self._cell_coordinates((x_max, y_max))
+        return sum(
+            len(self._cell(ix, iy))
+            for iy in range(max(iy_min - cell_radius, 0), min(iy_max + cell_radius, self.cells_y - 1) + 1)
+            for ix in range(max(ix_min - cell_radius, 0), min(ix_max + cell_radius, self.cells_x - 1) + 1)
+        )
+
+def _are_halves_allowed(
+    registry: "PointRegistry | FlatPointRegistry",
+    xs: np.ndarray,
+    ys: np.ndarray,
+    d_seps: np.ndarray,
+    d_sep_relaxed: float | np.ndarray,
+    relaxed_entity_id: int | np.ndarray
+) -> np.ndarray:
+    """are_points_allowed() for the two halves of a batch, split at the median of its longer axis."""
+    order = np.argsort(xs if np.ptp(xs) >= np.ptp(ys) else ys, kind="stable")
+    d_sep_relaxed = np.broadcast_to(np.asarray(d_sep_relaxed, dtype=np.float64), xs.shape)
+    relaxed_entity_id = np.broadcast_to(np.asarray(relaxed_entity_id), xs.shape)
+    is_allowed = np.empty(xs.shape[0], dtype=bool)
+    for half in (order[:xs.shape[0] // 2], order[xs.shape[0] // 2:]):
+        is_allowed[half] = registry.are_points_allowed(
+            xs[half], ys[half], d_seps[half], d_sep_relaxed[half], relaxed_entity_id[half]
+        )
+    return is_allowed
+
+class FlatPointRegistry:
+    """
+    Drop-in replacement for PointRegistry that stores points in flat NumPy arrays.
+
+    Each cell owns a chain of fixed-size chunks in a shared pool of float32 coordinates and int32
+    entity ids, i.e., a point costs 12 bytes plus the unused tail of its cell's newest chunk.
+    Unused chunk slots hold infinite coordinates so that batched queries can test whole chunks
+    with vectorized distance checks without masking. Single queries scan the filled slots instead.
+    """
+    def __init__(self, width: int, height: int, cell_size: float, chunk_size: int = 8):
+        self.chunk_size = chunk_size
+        self.width = float(width)
+        self.height = float(height)
+        self.cell_size = cell_size
+        self.cells_x = math.ceil(self.width / cell_size)
+        self.cells_y = math.ceil(self.height / cell_size)
+        self.next_entity_id = 1
+
+        # Per-cell metadata: newest chunk of the cell (-1 if empty) and number of points in it
+        self.cell_head = array("i", [-1]) * (self.cells_x * self.cells_y)
+        self.cell_fill = bytearray(self.cells_x * self.cells_y)
+
+        # Chunk pool
+        self.chunk_count = 0
+        self.chunk_next = array("i")
+        self.chunk_points = np.full((64, self.chunk_size, 2), np.inf, dtype=np.float32)
+        self.chunk_entity_ids = np.zeros((64, self.chunk_size), dtype=np.int32)
+        self._update_views()
+
+    def _update_views(self):
+        # Scalar lookups through a memoryview yield plain Python floats and ints
+        points = self.chunk_points.reshape(-1, 2)
+        self._x_view = memoryview(points[:, 0])
+        self._y_view = memoryview(points[:, 1])
+        self._entity_id_view = memoryview(self.chunk_entity_ids.reshape(-1))
+
+    def _cell_coordinates(self, p: tuple[float, float]) -> tuple[int, int]:
+        cx = max(min(int(p[0] / self.cell_size), self.cells_x - 1), 0)
+        cy = max(min(int(p[1] / self.cell_size), self.cells_y - 1), 0)
+        return (cx, cy)
+
+    def _cell_index(self, p: tuple[float, float]) -> int:
+        ix, iy = self._cell_coordinates(p)
+        return iy * self.cells_x + ix
+
+    def _new_chunk(self, idx: int) -> int:
+        if self.chunk_count == self.chunk_points.shape[0]:
+            capacity = self.chunk_count + self.chunk_count // 2
+            chunk_points = np.full((capacity, self.chunk_size, 2), np.inf, dtype=np.float32)
+            chunk_points[:self.chunk_count] = self.chunk_points
+            chunk_entity_ids = np.zeros((capacity, self.chunk_size), dtype=np.int32)
+            chunk_entity_ids[:self.chunk_count] = self.chunk_entity_ids
+            self.chunk_points = chunk_points
+            self.chunk_entity_ids = chunk_entity_ids
+            self._update_views()
+
+        chunk = self.chunk_count
+        self.chunk_count += 1
+        self.chunk_next.append(self.cell_head[idx])
+        self.cell_head[idx] = chunk
+        self.cell_fill[idx] = 0
+        return chunk
+
+    def _insert(self, p: tuple[float, float], entity_id: int):
+        idx = self._cell_index(p)
+        chunk = self.cell_head[idx]
+        fill = self.cell_fill[idx]
+        if chunk < 0 or fill == self.chunk_size:
+            chunk = self._new_chunk(idx)
+            fill = 0
+        self.chunk_points[chunk, fill] = p
+        self.chunk_entity_ids[chunk, fill] = entity_id
+        self.cell_fill[idx] = fill + 1
+
+    def add_point(self, p: tuple[float, float]) -> int:
+        sid = self.next_entity_id
+        self.next_entity_id += 1
+        self._insert(p, sid)
+        return sid
+
+    def add_points(self, streamline: list[tuple[float, float]]) -> int:
+        sid = self.next_entity_id
+        self.next_entity_id += 1
+        for p in streamline:
+            self._insert(p, sid)
+        return sid
+
+    def add_separate_points(self, points: np.ndarray) -> int:
+        first_id = self.next_entity_id
+        for sid, p in enumerate(map(tuple, points.tolist()), first_id):
+            self._insert(p, sid)
+        self.next_entity_id = first_id + points.shape[0]
+        return first_id
+
+    def _chunks_in_cells(self, ix_min: int, iy_min: int, ix_max: int, iy_max: int) -> list[int]:
+        chunks = []
+        cell_head = self.cell_head
+        chunk_next = self.chunk_next
+        for iy in range(iy_min, iy_max + 1):
+            row = iy * self.cells_x
+            for idx in range(row + ix_min, row + ix_max + 1):
+                chunk = cell_head[idx]
+                while chunk >= 0:
+                    chunks.append(chunk)
+                    chunk = chunk_next[chunk]
+        return chunks
+
+    def is_point_allowed(
+        self,
+        p: tuple[float, float],
+        d_sep: float,
+        d_sep_relaxed: float,
+        relaxed_entity_id: int
+    ) -> bool:
+        if not (0.0 <= p[0] < self.width - 1.0 and 0.0 <= p[1] < self.height - 1.0):
+            return False
+
+        # A single query touches a few sparsely filled chunks only, where gathering them into a NumPy
+        # array costs more than scanning the filled slots through the memoryviews
+        x, y = p
+        d_sep_squared = d_sep * d_sep
+        d_sep_relaxed_squared = d_sep_relaxed * d_sep_relaxed
+        x_view = self._x_view
+        y_view = self._y_view
+        entity_id_view = self._entity_id_view
+        cell_head = self.cell_head
+        cell_fill = self.cell_fill
+        chunk_next = self.chunk_next
+        chunk_size = self.chunk_size
+        cell_radius = math.ceil(d_sep / self.cell_size)
+        ix_cell, iy_cell = self._cell_coordinates(p)
+        ix_min = max(ix_cell - cell_radius, 0)
+        ix_max = min(ix_cell + cell_radius, self.cells_x - 1)
+        for iy in range(max(iy_cell - cell_radius, 0), min(iy_cell + cell_radius, self.cells_y - 1) + 1):
+            row = iy * self.cells_x
+            for idx in range(row + ix_min, row + ix_max + 1):
+                chunk = cell_head[idx]
+                if chunk < 0:
+                    continue
+                end = chunk * chunk_size + cell_fill[idx] # Only the newest chunk of a cell is partially filled
+                while True:
+                    for i in range(chunk * chunk_size, end):
+                        x_diff = x_view[i] - x
+                        y_diff = y_view[i] - y
+                        dist_squared = x_diff * x_diff + y_diff * y_diff
+                        if dist_squared < d_sep_squared and (
+                            entity_id_view[i] != relaxed_entity_id or dist_squared < d_sep_relaxed_squared
+                        ):
+                            return False
+                    chunk = chunk_next[chunk]
+                    if chunk < 0:
+                        break
+                    end = chunk * chunk_size + chunk_size
+        return True
+
+    def are_points_allowed(
+        self,
+        xs: np.ndarray,
+        ys: np.ndarray,
+        d_seps: np.ndarray,
+        d_sep_relaxed: float | np.ndarray,
+        relaxed_entity_id: int | np.ndarray
+    ) -> np.ndarray:
+        is_allowed = (xs >= 0.0) & (xs < self.width - 1.0) & (ys >= 0.0) & (ys < self.height - 1.0)
+        if not is_allowed.any():
+            return is_allowed
+
+        d_max = float(d_seps.max())
+        ix_min, iy_min = self._cell_coordinates((float(xs.min()) - d_max, float(ys.min()) - d_max))
+        ix_max, iy_max = self._cell_coordinates((float(xs.max()) + d_max, float(ys.max()) + d_max))
+        if max(ix_max - ix_min, iy_max - iy_min) > 2 * math.ceil(d_max / self.cell_size) + _MAX_BATCH_SPREAD_CELLS:
+            return _are_halves_allowed(self, xs, ys, d_seps, d_sep_relaxed, relaxed_entity_id)
+        chunks = self._chunks_in_cells(ix_min, iy_min, ix_max, iy_max)
+        if not chunks:
+            return is_allowed
+
+        points = self.chunk_points[chunks].reshape(-1, 2)
+        entity_ids = self.chunk_entity_ids[chunks].reshape(-1)
+        x_diff = points[:, 0] - xs[:, np.newaxis]
+        y_diff = points[:, 1] - ys[:, np.newaxis]
+        dist_squared = x_diff * x_diff + y_diff * y_diff
+        d_sep_relaxed_squared = np.square(np.asarray(d_sep_relaxed, dtype=np.float64)).reshape(-1, 1)
+        is_relaxed = entity_ids == np.asarray(relaxed_entity_id).reshape(-1, 1)
+        min_dist_squared = np.where(is_relaxed, d_sep_relaxed_squared, (d_seps * d_seps)[:, np.newaxis])
+        return is_allowed & ~np.any(dist_squared < min_dist_squared, axis=1)
+
+    def scanned_point_count(self, x_min: float, y_min: float, x_max: float, y_max: float, d_sep: float) -> int:
+        """Number of chunk slots that a query over the box with separation d_sep compares against."""
+        cell_radius = math.ceil(d_sep / self.cell_size)
+        ix_min, iy_min = self._cell_coordinates((x_min, y_min))
+        ix_max, iy_max = self._cell_coordinates((x_max, y_max))
+        return self.chunk_size * len(self._chunks_in_cells(
+            max(ix_min - cell_radius, 0),
+            max(iy_min - cell_radius, 0),
+            min(ix_max + cell_radius, self.cells_x - 1),
+            min(iy_max + cell_radius, self.cells_y - 1)
+        ))
+
+_HALF_PIXEL_DIAGONAL = 0.5 * math.sqrt(2.0)
+
+# Slack of the raster decisions for the float32 rounding of the stored offsets; closer cases go to the exact registry
+_RASTER_TOLERANCE = 1.0e-4
+
+def _box_nearest(box_idx: np.ndarray, dist_squared: np.ndarray, box_size: int) -> tuple[np.ndarray, np.ndarray]:
+    """Smallest squared distance per cell of a scratch raster, infinite where empty, and the entry that has it."""
+    box_dist_squared = np.full(box_size, np.inf)
+    np.minimum.at(box_dist_squared, box_idx, dist_squared)
+    is_nearest = np.flatnonzero(dist_squared == box_dist_squared[box_idx])
+    box_nearest = np.empty(box_size, dtype=np.intp)
+    box_nearest[box_idx[is_nearest]] = is_nearest # One of them on ties
+    return box_dist_squared, box_nearest
+
+class RasterPointRegistry:
+    """
+    Point registry that answers most separation tests with a constant-time raster lookup.
+
+    Every accepted point is stamped into screen-resolution rasters that hold, per pixel, the offset
+    from the pixel center to the nearest point, the entity owning that point, and the offset to the
+    nearest point of any other entity. A query reads the pixel nearest to it: a stored point closer
+    than the separation rejects it, and the distance from the pixel center to the stored point, less
+    the distance from the query to the pixel center, bounds the distance to all other points from
+    below and accepts it. The few queries in between, and those with separations beyond max_distance,
+    are answered by an exact PointRegistry that holds the points as well, so the answers are those of
+    PointRegistry. The rasters take 20 bytes per pixel.
+    """
+    def __init__(self, width: int, height: int, max_distance: float):
+        self.width = float(width)
+        self.height = float(height)
+        self.pixels_x = int(width)
+        self.pixels_y = int(height)
+        self.max_distance = max_distance
+        self.exact = PointRegistry(width, height, max_distance)
+
+        pixel_count = self.pixels_x * self.pixels_y
+        self.nearest_offsets = np.full((pixel_count, 2), np.inf, dtype=np.float32)
+        self.nearest_entity_id = np.zeros(pixel_count, dtype=np.int32)
+        self.other_offsets = np.full((pixel_count, 2), np.inf, dtype=np.float32)
+        self._nearest_x_view = memoryview(self.nearest_offsets[:, 0])
+        self._nearest_y_view = memoryview(self.nearest_offsets[:, 1])
+        self._nearest_entity_id_view = memoryview(self.nearest_entity_id)
+        self._other_x_view = memoryview(self.other_offsets[:, 0])
+        self._other_y_view = memoryview(self.other_offsets[:, 1])
+
+        # Pixel offsets of the stamp around the pixel nearest to a point, which covers all pixel
+        # centers within stamp_distance of the point. An unstamped pixel center is thus at least
+        # stamp_distance away from every point, and a query within half a pixel diagonal of it at
+        # least max_distance
+        self.stamp_distance = max_distance + _HALF_PIXEL_DIAGONAL
+        r = math.ceil(self.stamp_distance) + 1
+        offsets_y, offsets_x = np.mgrid[-r:r + 1, -r:r + 1]
+        inside = offsets_x * offsets_x + offsets_y * offsets_y <= (self.stamp_distance + _HALF_PIXEL_DIAGONAL) ** 2
+        self.stamp_offsets_x = offsets_x[inside].astype(np.intp)
+        self.stamp_offsets_y = offsets_y[inside].astype(np.intp)
+
+    @property
+    def next_entity_id(self) -> int:
+        return self.exact.next_entity_id
+
+    def _stamp(self, points: np.ndarray, entity_id: int, separate: bool = False):
+        """
+        Stamp the (n, 2) points of entity entity_id, or with separate, point i as entity entity_id + i.
+        Stamped entities are new, so none of them is in the rasters yet.
+        """
+        px = np.rint(points[:, 0]).astype(np.intp)[:, np.newaxis] + self.stamp_offsets_x
+        py = np.rint(points[:, 1]).astype(np.intp)[:, np.newaxis] + self.stamp_offsets_y
+        x_offset = points[:, 0:1] - px
+        y_offset = points[:, 1:2] - py
+        dist_squared = x_offset * x_offset + y_offset * y_offset
+        valid = (
+            (px >= 0) & (px < self.pixels_x) & (py >= 0) & (py < self.pixels_y) &
+            (dist_squared <= self.stamp_distance * self.stamp_distance)
+        )
+        point_index = np.nonzero(valid)[0]
+        px = px[valid]
+        py = py[valid]
+        if px.size == 0:
+            return
+        offsets = np.stack((x_offset[valid], y_offset[valid]), axis=-1)
+        dist_squared = dist_squared[valid]
+        second_offsets = np.full((0, 2), np.inf)
+
+        if points.shape[0] == 1:
+            # The pixels of a single stamp are distinct
+            idx = py * self.pixels_x + px
+            nearest = slice(None)
+        else:
+            # Nearest point per pixel, found in a scratch raster over the bounding box
+            x_min = int(px.min())
+            y_min = int(py.min())
+            box_width = int(px.max()) - x_min + 1
+            box_size = (int(py.max()) - y_min + 1) * box_width
+            box_idx = (py - y_min) * box_width + (px - x_min)
+            box_dist_squared, box_nearest = _box_nearest(box_idx, dist_squared, box_size)
+            stamped = np.flatnonzero(box_dist_squared < np.inf)
+            nearest = box_nearest[stamped]
+            idx = (stamped // box_width + y_min) * self.pixels_x + stamped % box_width + x_min
+            if separate:
+                # The second nearest point per pixel is of another entity as well
+                rest = np.ones(dist_squared.size, dtype=bool)
+                rest[nearest] = False
+                rest = np.flatnonzero(rest)
+                box_dist_squared, box_nearest = _box_nearest(box_idx[rest], dist_squared[rest], box_size)
+                has_second = np.flatnonzero(box_dist_squared[stamped] < np.inf)
+                second_offsets = np.full((stamped.size, 2), np.inf)
+                second_offsets[has_second] = offsets[rest[box_nearest[stamped[has_second]]]]
+                entity_id = entity_id + point_index[nearest]
+        entity_offsets = offsets[nearest]
+        entity_dist_squared = dist_squared[nearest]
+
+        nearest_offsets = self.nearest_offsets[idx].astype(np.float64)
+        other_offsets = self.other_offsets[idx].astype(np.float64)
+        nearest_entity = self.nearest_entity_id[idx]
+        is_closer = entity_dist_squared < np.sum(np.square(nearest_offsets), axis=1)
+        # A new nearest entity demotes the previous nearest point to the nearest point of another entity,
+        # unless the second nearest new point is closer. Otherwise the new point may be the other one
+        if second_offsets.shape[0] > 0:
+            is_second_closer = np.sum(np.square(second_offsets), axis=1) < np.sum(np.square(nearest_offsets), axis=1)
+            demoted_offsets = np.where(is_second_closer[:, np.newaxis], second_offsets, nearest_offsets)
+        else:
+            demoted_offsets = nearest_offsets
+        is_other_closer = entity_dist_squared < np.sum(np.square(other_offsets), axis=1)
+        self.other_offsets[idx] = np.where(
+            is_closer[:, np.newaxis], demoted_offsets,
+            np.where(is_other_closer[:, np.newaxis], entity_offsets, other_offsets)
+        )
+        self.nearest_offsets[idx] = np.where(is_closer[:, np.newaxis], entity_offsets, nearest_offsets)
+        self.nearest_entity_id[idx] = np.where(is_closer, entity_id, nearest_entity)
+
+    def add_point(self, p: tuple[float, float]) -> int:
+        sid = self.exact.add_point(p)
+        self._stamp(np.array([p], dtype=np.float64), sid)
+        return sid
+
+    def add_points(self, streamline: list[tuple[float, float]]) -> int:
+        sid = self.exact.add_points(streamline)
+        if streamline:
+            self._stamp(np.array(streamline, dtype=np.float64), sid)
+        return sid
+
+    def add_separate_points(self, points: np.ndarray) -> int:
+        first_id = self.exact.add_separate_points(points)
+        if points.shape[0] > 0:
+            self._stamp(points, first_id, separate=True)
+        return first_id
+
+    def _decide(self, x_offset: float, y_offset: float, qx: float, qy: float, query_distance: float, d: float) -> bool | None:
+        """
+        Whether the points the stored offset stands for are at least d from the query, or None if the raster cannot
+        tell. (qx, qy) is the offset of the query from the pixel center, at distance query_distance.
+        """
+        if d <= 0.0:
+            return True
+        x_diff = x_offset - qx
+        y_diff = y_offset - qy
+        if d > _RASTER_TOLERANCE and x_diff * x_diff + y_diff * y_diff < (d - _RASTER_TOLERANCE) ** 2:
+            return False
+        pixel_distance = min(math.sqrt(x_offset * x_offset + y_offset * y_offset), self.stamp_distance)
+        if pixel_distance - query_distance >= d + _RASTER_TOLERANCE:
+            return True
+        return None
+
+    def is_point_allowed(
+        self,
+        p: tuple[float, float],
+        d_sep: float,
+        d_sep_relaxed: float,
+        relaxed_entity_id: int
+    ) -> bool:
+        if not (0.0 <= p[0] < self.width - 1.0 and 0.0 <= p[1] < self.height - 1.0):
+            return False
+
+        ix = int(p[0] + 0.5)
+        iy = int(p[1] + 0.5)
+        idx = iy * self.pixels_x + ix
+        qx = p[0] - ix
+        qy = p[1] - iy
+        query_distance = math.sqrt(qx * qx + qy * qy)
+        nearest_x = self._nearest_x_view[idx]
+        nearest_y = self._nearest_y_view[idx]
+        if self._nearest_entity_id_view[idx] == relaxed_entity_id:
+            is_relaxed_allowed = self._decide(nearest_x, nearest_y, qx, qy, query_distance, d_sep_relaxed)
+            if is_relaxed_allowed is False:
+                return False
+            is_allowed = self._decide(self._other_x_view[idx], self._other_y_view[idx], qx, qy, query_distance, d_sep)
+            if is_allowed is False:
+                return False
+            if is_relaxed_allowed and is_allowed:
+                return True
+        else:
+            is_allowed = self._decide(nearest_x, nearest_y, qx, qy, query_distance, d_sep)
+            if is_allowed is False:
+                return False
+            # Points of the relaxed entity are no closer than the nearest point
+            if is_allowed and (d_sep_relaxed <= d_sep or self._decide(
+                nearest_x, nearest_y, qx, qy, query_distance, d_sep_relaxed
+            )):
+                return True
+        return self.exact.is_point_allowed(p, d_sep, d_sep_relaxed, relaxed_entity_id)
+
+    def are_points_allowed(
+        self,
+        xs: np.ndarray,
+        ys: np.ndarray,
+        d_seps: np.ndarray,
+        d_sep_relaxed: float | np.ndarray,
+        relaxed_entity_id: int | np.ndarray
+    ) -> np.ndarray:
+        is_inside = (xs >= 0.0) & (xs < self.width - 1.0) & (ys >= 0.0) & (ys < self.height - 1.0)
+        ix = np.clip((xs + 0.5).astype(np.intp), 0, self.pixels_x - 1)
+        iy = np.clip((ys + 0.5).astype(np.intp), 0, self.pixels_y - 1)
+        idx = iy * self.pixels_x + ix
+        qx = xs - ix
+        qy = ys - iy
+        query_distance = np.sqrt(qx * qx + qy * qy)
+        d_sep_relaxed = np.broadcast_to(np.asarray(d_sep_relaxed, dtype=np.float64), xs.shape)
+        relaxed_entity_id = np.broadcast_to(np.asarray(relaxed_entity_id), xs.shape)
+
+        def decide(offsets: np.ndarray, d: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+            # Masks of the points that the offsets reject and accept, as in _decide()
+            x_diff = offsets[:, 0] - qx
+            y_diff = offsets[:, 1] - qy
+            is_rejected = (d > _RASTER_TOLERANCE) & (x_diff * x_diff + y_diff * y_diff < np.square(d - _RASTER_TOLERANCE))
+            pixel_distance = np.minimum(np.sqrt(np.sum(np.square(offsets.astype(np.float64)), axis=1)), self.stamp_distance)
+            is_accepted = (d <= 0.0) | (pixel_distance - query_distance >= d + _RASTER_TOLERANCE)
+            return is_rejected, is_accepted & ~is_rejected
+
+        nearest_offsets = self.nearest_offsets[idx]
+        is_relaxed = self.nearest_entity_id[idx] == relaxed_entity_id
+        nearest_rejected, nearest_accepted = decide(nearest_offsets, np.where(is_relaxed, d_sep_relaxed, d_seps))
+        # Points of the relaxed entity are no closer than the nearest point
+        _, relaxed_accepted = decide(nearest_offsets, d_sep_relaxed)
+        other_rejected, other_accepted = decide(self.other_offsets[idx], d_seps)
+        is_rejected = nearest_rejected | (is_relaxed & other_rejected)
+        is_accepted = np.where(
+            is_relaxed, nearest_accepted & other_accepted, nearest_accepted & ((d_sep_relaxed <= d_seps) | relaxed_accepted)
+        )
+
+        is_allowed = is_inside & ~is_rejected
+        is_undecided = np.flatnonzero(is_allowed & ~is_accepted)
+        if is_undecided.size > 0:
+            is_allowed[is_undecided] = self.exact.are_points_allowed(
+                xs[is_undecided], ys[is_undecided], d_seps[is_undecided], d_sep_relaxed[is_undecided],
+                relaxed_entity_id[is_undecided]
+            )
+        return is_allowed
+
+    def scanned_point_count(self, x_min: float, y_min: float, x_max: float, y_max: float, d_sep: float) -> int:
+        """A query reads one raster pixel; the cells that the exact registry scans for undecided queries are not counted."""
+        return 1
+
+class MultiLevelPointRegistry:
+    """
+    Point registry with a hierarchy of grids whose cell sizes halve from max_distance down to min_distance.
+
+    Every point is referenced from each level. A query with separation d_sep scans the 3x3 cells of the
+    finest level whose cells are at least d_sep wide, so its cost depends on the queried radius rather
+    than on max_distance.
+    """
+    def __init__(self, width: int, height: int, max_distance: float, min_distance: float):
+        self.width = float(width)
+        self.height = float(height)
+        self.max_distance = max_distance
+        self.next_entity_id = 1
+
+        self.levels: list[PointRegistry] = [PointRegistry(width, height, max_distance)]
+        while self.levels[-1].cell_size * 0.5 >= min_distance:
+            self.levels.append(PointRegistry(width, height, self.levels[-1].cell_size * 0.5))
+
+    def _level(self, d: float) -> PointRegistry:
+        if d <= 0.0:
+            return self.levels[-1]
+        level = int(math.log2(self.max_distance / d)) if d < self.max_distance else 0
+        return self.levels[min(level, len(self.levels) - 1)]
+
+    def _insert(self, entry: PointRegistryEntry):
+        for level in self.levels:
+            level.cell_content[level._cell_index(entry.point)].append(entry)
+
+    def add_point(self, p: tuple[float, float]) -> int:
+        sid = self.next_entity_id
+        self.next_entity_id += 1
+        self._insert(PointRegistryEntry(p, sid))
+        return sid
+
+    def add_points(self, streamline: list[tuple[float, float]]) -> int:
+        sid = self.next_entity_id
+        self.next_entity_id += 1
+        for p in streamline:
+            self._insert(PointRegistryEntry(p, sid))
+        return sid
+
+    def add_separate_points(self, points: np.ndarray) -> int:
+        first_id = self.next_entity_id
+        for sid, p in enumerate(map(tuple, points.tolist()), first_id):
+            self._insert(PointRegistryEntry(p, sid))
+        self.next_entity_id = first_id + points.shape[0]
+        return first_id
+
+    def is_point_allowed(
+        self,
+        p: tuple[float, float],
+        d_sep: float,
+        d_sep_relaxed: float,
+        relaxed_entity_id: int
+    ) -> bool:
+        return self._level(d_sep).is_point_allowed(p, d_sep, d_sep_relaxed, relaxed_entity_id)
+
+    def are_points_allowed(
+        self,
+        xs: np.ndarray,
+        ys: np.ndarray,
+        d_seps: np.ndarray,
+        d_sep_relaxed: float | np.ndarray,
+        relaxed_entity_id: int | np.ndarray
+    ) -> np.ndarray:
+        return self._level(float(d_seps.max())).are_points_allowed(xs, ys, d_seps, d_sep_relaxed, relaxed_entity_id)
+
+    def scanned_point_count(self, x_min: float, y_min: float, x_max: float, y_max: float, d_sep: float) -> int:
+        return self._level(d_sep).scanned_point_count(x_min, y_min, x_max, y_max, d_sep)
+
+class CountingPointRegistry:
+    """
+    Wrapper around a point registry that counts queries and scanned points into generator statistics.
+
+    Generators only wrap their registry when statistics are requested, so the counting, which
+    repeats the cell traversal of each query, costs nothing otherwise.
+    """
+    def __init__(
+        self,
+        registry: PointRegistry | FlatPointRegistry | RasterPointRegistry | MultiLevelPointRegistry,
+        statistics: GeneratorStatistics
+    ):
+        self.registry = registry
+        self.statistics = statistics
+
+    def add_point(self, p: tuple[float, float]) -> int:
+        return self.registry.add_point(p)
+
+    def add_points(self, streamline: list[tuple[float, float]]) -> int:
+        return self.registry.add_points(streamline)
+
+    def add_separate_points(self, points: np.ndarray) -> int:
+        return self.registry.add_separate_points(points)
+
+    def is_point_allowed(
+        self,
+        p: tuple[float, float],
+        d_sep: float,
+        d_sep_relaxed: float,
+        relaxed_entity_id: int
+    ) -> bool:
+        self.statistics.registry_queries += 1
+        self.statistics.candidates_scanned += self.registry.scanned_point_count(p[0], p[1], p[0], p[1], d_sep)
+        return self.registry.is_point_allowed(p, d_sep, d_sep_relaxed, relaxed_entity_id)
+
+    def are_points_allowed(
+        self,
+        xs: np.ndarray,
+        ys: np.ndarray,
+        d_seps: np.ndarray,
+        d_sep_relaxed: float | np.ndarray,
+        relaxed_entity_id: int | np.ndarray
+    ) -> np.ndarray:
+        count = xs.shape[0]
+        if count > 0:
+            # Every point of a batch is compared against at most the entries around the whole batch
+            self.statistics.registry_queries += count
+            self.statistics.candidates_scanned += count * self.registry.scanned_point_count(
+                float(xs.min()), float(ys.min()), float(xs.max()), float(ys.max()), float(d_seps.max())
+            )
+        return self.registry.are_points_allowed(xs, ys, d_seps, d_sep_relaxed, relaxed_entity_id)
+
+def create_point_registry(
+    registry_type: str,
+    width: int,
+    height: int,
+    max_distance: float,
+    min_distance: float | None = None,
+    statistics: GeneratorStatistics | None = None
+) -> PointRegistry | FlatPointRegistry | RasterPointRegistry | MultiLevelPointRegistry | CountingPointRegistry:
+    """
+    Create a point registry for separation tests up to max_distance (the cell size of the grid-based registries).
+
+    min_distance is the smallest separation that will be queried; it bounds the finest level of the
+    multi-level registry and defaults to max_distance. With statistics, the registry is wrapped in a
+    CountingPointRegistry.
+    """
+    if registry_type == "GRID":
+        registry = PointRegistry(width, height, max_distance)
+    elif registry_type == "FLAT":
+        registry = FlatPointRegistry(width, height, max_distance)
+    elif registry_type == "RASTER":
+        registry = RasterPointRegistry(width, height, max_distance)
+    elif registry_type == "MULTILEVEL":
+        registry = MultiLevelPointRegistry(width, height, max_distance, max_distance if min_distance is None else min_distance)
+    else:
+        raise ValueError(f"Unknown point registry type '{registry_type}'")
+    return registry if statistics is None else CountingPointRegistry(registry, statistics)
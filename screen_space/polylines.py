@@ -1,4 +1,80 @@
+from concurrent.futures import ProcessPoolExecutor
 import heapq
+from typing import Iterator
+
+import numpy as np
+
+
+class Polylines:
+    """
+    Ragged array of 2D polylines: one contiguous (N, 2) float32 point buffer and M + 1 offsets,
+    so that polyline i consists of points[offsets[i]:offsets[i + 1]].
+    """
+    def __init__(self, points: np.ndarray | None = None, offsets: np.ndarray | None = None):
+        self.points = np.zeros((0, 2), dtype=np.float32) if points is None else np.asarray(points, dtype=np.float32).reshape(-1, 2)
+        self.offsets = np.zeros(1, dtype=np.int64) if offsets is None else np.asarray(offsets, dtype=np.int64)
+        assert self.offsets[0] == 0 and self.offsets[-1] == self.points.shape[0], "Offsets do not cover the point buffer"
+
+    @classmethod
+    def from_lines(cls, lines: list) -> "Polylines":
+        """Pack polylines given as sequences of (x, y) points."""
+        arrays = [np.asarray(line, dtype=np.float32).reshape(-1, 2) for line in lines]
+        offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+        np.cumsum([a.shape[0] for a in arrays], out=offsets[1:])
+        points = np.concatenate(arrays) if arrays else None
+        return cls(points, offsets)
+
+    @classmethod
+    def concatenate(cls, parts: list["Polylines"]) -> "Polylines":
+        """Join several collections into one, keeping their order."""
+        if not parts:
+            return cls()
+        point_offsets = np.cumsum([0] + [p.point_count for p in parts[:-1]])
+        offsets = np.concatenate([np.zeros(1, dtype=np.int64)] + [p.offsets[1:] + o for p, o in zip(parts, point_offsets.tolist())])
+        return cls(np.concatenate([p.points for p in parts]), offsets)
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Number of points per polyline."""
+        return np.diff(self.offsets)
+
+    @property
+    def point_count(self) -> int:
+        return self.points.shape[0]
+
+    def __len__(self) -> int:
+        return self.offsets.shape[0] - 1
+
+    def __getitem__(self, i: int) -> np.ndarray:
+        return self.points[self.offsets[i]:self.offsets[i + 1]]
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        for start, end in zip(self.offsets[:-1].tolist(), self.offsets[1:].tolist()):
+            yield self.points[start:end]
+
+    def filter(self, min_length: int) -> "Polylines":
+        """Polylines with at least min_length points."""
+        lengths = self.lengths
+        keep = lengths >= min_length
+        if keep.all():
+            return self
+        point_mask = np.repeat(keep, lengths)
+        offsets = np.zeros(int(keep.sum()) + 1, dtype=np.int64)
+        np.cumsum(lengths[keep], out=offsets[1:])
+        return Polylines(self.points[point_mask], offsets)
+
+def pixels_to_drawing_positions(
+    points: np.ndarray,
+    width: int,
+    height: int,
+    drawing_origin: tuple[float, float, float],
+    drawing_x_axis: tuple[float, float, float],
+    drawing_y_axis: tuple[float, float, float]
+) -> np.ndarray:
+    """Map (N, 2) pixel coordinates onto the drawing plane as (N, 3) float32 positions."""
+    axes = np.array((drawing_x_axis, drawing_y_axis), dtype=np.float64) / np.array(((width,), (height,)), dtype=np.float64)
+    positions = np.asarray(points, dtype=np.float64) @ axes + np.array(drawing_origin, dtype=np.float64)
+    return positions.astype(np.float32)
 
 
 def triangle_area(p1: tuple[float, float], p2: tuple[float, float], p3: tuple[float, float]) -> float:
@@ -76,3 +152,109 @@ def visvalingam_whyatt(points: list[tuple[float, float]], max_area: float) -> li
             point_metadata[next_idx] = (new_area, new_version, prev_idx, next_next_idx)
 
     return [p for i, p in enumerate(points) if not is_deleted[i]]
+
+def _visvalingam_whyatt_mask(points: np.ndarray, offsets: np.ndarray, max_area: float) -> np.ndarray:
+    """
+    Mask of the points that visvalingam_whyatt keeps, for all polylines at once.
+
+    The polylines are linked lists in shared prev/next index arrays that end at -1, and their initial
+    areas are computed in one vectorized pass. Each polyline is then simplified with its own heap,
+    which pops in the same (area, index, version) order as in visvalingam_whyatt. Entries of max_area
+    or more are never pushed, as visvalingam_whyatt stops as soon as it pops one.
+    """
+    n = points.shape[0]
+    lengths = np.diff(offsets)
+    is_first = np.zeros(n, dtype=bool)
+    is_last = np.zeros(n, dtype=bool)
+    is_first[offsets[:-1][lengths > 0]] = True
+    is_last[offsets[1:][lengths > 0] - 1] = True
+    prev_index = np.arange(-1, n - 1)
+    next_index = np.arange(1, n + 1)
+    prev_index[is_first] = -1
+    next_index[is_last] = -1
+
+    # Same operations in the same order as triangle_area, so the areas are bit for bit the same
+    xs = points[:, 0].astype(np.float64)
+    ys = points[:, 1].astype(np.float64)
+    interior = np.flatnonzero(~(is_first | is_last))
+    x1, y1 = xs[interior - 1], ys[interior - 1]
+    x2, y2 = xs[interior], ys[interior]
+    x3, y3 = xs[interior + 1], ys[interior + 1]
+    areas = 0.5 * np.abs((x2 - x1) * (y3 - y1) - (y2 - y1) * (x3 - x1))
+    is_candidate = areas < max_area
+    candidates = interior[is_candidate]
+    candidate_areas = areas[is_candidate].tolist()
+    line_ends = np.searchsorted(candidates, offsets[1:]).tolist()
+
+    xs = xs.tolist()
+    ys = ys.tolist()
+    prev_index = prev_index.tolist()
+    next_index = next_index.tolist()
+    candidates = candidates.tolist()
+    versions = [0] * n
+    is_deleted = [False] * n
+
+    line_start = 0
+    for line_end in line_ends:
+        areas_heap = list(zip(candidate_areas[line_start:line_end], candidates[line_start:line_end], [0] * (line_end - line_start)))
+        line_start = line_end
+        heapq.heapify(areas_heap)
+
+        while areas_heap:
+            _, i, version = heapq.heappop(areas_heap)
+            if is_deleted[i] or versions[i] != version:
+                continue
+            is_deleted[i] = True
+            # Interior points always have both neighbors
+            p = prev_index[i]
+            q = next_index[i]
+            next_index[p] = q
+            prev_index[q] = p
+
+            versions[p] += 1
+            pp = prev_index[p]
+            if pp >= 0:
+                new_area = 0.5 * abs((xs[p] - xs[pp]) * (ys[q] - ys[pp]) - (ys[p] - ys[pp]) * (xs[q] - xs[pp]))
+                if new_area < max_area:
+                    heapq.heappush(areas_heap, (new_area, p, versions[p]))
+            versions[q] += 1
+            qq = next_index[q]
+            if qq >= 0:
+                new_area = 0.5 * abs((xs[q] - xs[p]) * (ys[qq] - ys[p]) - (ys[q] - ys[p]) * (xs[qq] - xs[p]))
+                if new_area < max_area:
+                    heapq.heappush(areas_heap, (new_area, q, versions[q]))
+
+    return ~np.array(is_deleted, dtype=bool)
+
+def _simplification_chunk_mask(chunk: tuple[np.ndarray, np.ndarray, float]) -> np.ndarray:
+    return _visvalingam_whyatt_mask(*chunk)
+
+def simplify_polylines(polylines: Polylines, max_area: float, workers: int = 1) -> Polylines:
+    """
+    Simplify every polyline with the Visvalingam-Whyatt algorithm, with the same result as
+    visvalingam_whyatt but for all polylines in one pass over flat arrays.
+
+    With workers > 1, the polylines are split into runs of about equal point count that are
+    simplified in a process pool.
+    """
+    if max_area <= 0.0 or polylines.point_count == 0:
+        return polylines
+
+    if workers > 1 and len(polylines) > 1:
+        # A few chunks per worker even out polylines of very different lengths
+        chunk_count = min(4 * workers, len(polylines))
+        targets = np.arange(1, chunk_count) * (polylines.point_count / chunk_count)
+        bounds = np.unique(np.concatenate(([0], np.searchsorted(polylines.offsets, targets), [len(polylines)])))
+        chunks = []
+        for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+            offsets = polylines.offsets[start:end + 1]
+            chunks.append((polylines.points[offsets[0]:offsets[-1]], offsets - offsets[0], max_area))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            keep = np.concatenate(list(executor.map(_simplification_chunk_mask, chunks)))
+    else:
+        keep = _visvalingam_whyatt_mask(polylines.points, polylines.offsets, max_area)
+
+    line_indices = np.repeat(np.arange(len(polylines)), polylines.lengths)
+    offsets = np.zeros(len(polylines) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(line_indices[keep], minlength=len(polylines)), out=offsets[1:])
+    return Polylines(polylines.points[keep], offsets)
@@ -0,0 +1,46 @@
+import random
+
+import numpy as np
+
+
+# Seeds accepted by the generators: a plain integer, a seed sequence or a NumPy generator to draw from
+RandomSeed = int | np.random.SeedSequence | np.random.Generator
+
+# Spawn key appended to a seed sequence to derive the state of its Python random stream
+_PYTHON_RANDOM_KEY = 0x5eed
+
+def seed_sequence(seed: RandomSeed | None) -> np.random.SeedSequence:
+    """Seed sequence for the seed; a generator is advanced to draw fresh entropy, None uses OS entropy."""
+    if isinstance(seed, np.random.SeedSequence):
+        return seed
+    if isinstance(seed, np.random.Generator):
+        return np.random.SeedSequence(seed.integers(0, 1 << 63, size=4).tolist())
+    return np.random.SeedSequence(seed)
+
+def spawn_seeds(seed: RandomSeed | None, count: int) -> list[np.random.SeedSequence]:
+    """
+    Independent child seed sequences, e.g. for per-tile or per-iteration work. For a given integer
+    or seed sequence, child i is always the same, no matter how many children were spawned before.
+    """
+    parent = seed_sequence(seed)
+    return [
+        np.random.SeedSequence(parent.entropy, spawn_key=(*parent.spawn_key, i), pool_size=parent.pool_size)
+        for i in range(count)
+    ]
+
+def numpy_generator(seed: RandomSeed | None) -> np.random.Generator:
+    """NumPy generator for the seed; a generator is used as is."""
+    if isinstance(seed, np.random.Generator):
+        return seed
+    return np.random.default_rng(seed)
+
+def python_random(seed: RandomSeed | None) -> random.Random:
+    """
+    Local Python random stream for scalar hot loops, where it is faster than a NumPy generator.
+    An integer seeds it exactly like random.seed(), so results match the former global state.
+    """
+    if seed is None or isinstance(seed, int):
+        return random.Random(seed)
+    parent = seed_sequence(seed)
+    child = np.random.SeedSequence(parent.entropy, spawn_key=(*parent.spawn_key, _PYTHON_RANDOM_KEY), pool_size=parent.pool_size)
+    return random.Random(int.from_bytes(child.generate_state(4, np.uint64).tobytes(), "little"))
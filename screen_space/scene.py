@@ -1,16 +1,85 @@
 from dataclasses import dataclass
-from collections.abc import Sequence
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import bpy
 from mathutils import Matrix, Vector
+import numpy as np
+
+if TYPE_CHECKING:
+    from .geometry_cache import GeometryCache
 
 
 @dataclass
 class MeshTriangles:
-    vertices: Sequence[Vector]
-    normals: Sequence[Vector]
-    indices: Sequence[Sequence[int]] | None # One index sequence per triangle; if None, each triplet of vertices forms a triangle.
+    vertices: np.ndarray # (N, 3) float32 world-space positions
+    normals: np.ndarray # (N, 3) float32 world-space unit normals
+    indices: np.ndarray | None # (T, 3) int32 vertex indices per triangle; if None, each triplet of vertices forms a triangle.
+
+    @property
+    def triangle_count(self) -> int:
+        return len(self.vertices) // 3 if self.indices is None else len(self.indices)
+
+@dataclass
+class InstancedMesh:
+    triangles: MeshTriangles # in the mesh's local space
+    matrices: np.ndarray # (K, 4, 4) float64 model matrices, one per instance
+
+    @property
+    def normal_matrices(self) -> np.ndarray:
+        """(K, 3, 3) inverse transposes of the upper 3x3 of the model matrices."""
+        return np.linalg.inv(self.matrices[:, :3, :3]).transpose(0, 2, 1)
+
+def _mesh_corner_arrays(mesh: bpy.types.Mesh) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Local (V, 3) vertex positions, and the vertex indices and (3 T, 3) local normals of the corners of
+    the mesh's loop triangles, which triangulate n-gons. Corners of smooth faces take the vertex
+    normal, corners of flat faces the corner normal.
+    """
+    positions = np.empty((len(mesh.vertices), 3), dtype=np.float32)
+    mesh.vertices.foreach_get("co", positions.ravel())
+    triangle_count = len(mesh.loop_triangles)
+    triangle_loops = np.empty(3 * triangle_count, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("loops", triangle_loops)
+    triangle_polygons = np.empty(triangle_count, dtype=np.int32)
+    mesh.loop_triangles.foreach_get("polygon_index", triangle_polygons)
+    loop_vertices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vertices)
+    is_smooth = np.empty(len(mesh.polygons), dtype=bool)
+    mesh.polygons.foreach_get("use_smooth", is_smooth)
+    vertex_normals = np.empty((len(mesh.vertices), 3), dtype=np.float32)
+    mesh.vertex_normals.foreach_get("vector", vertex_normals.ravel())
+    corner_normals = np.empty((len(mesh.loops), 3), dtype=np.float32)
+    mesh.corner_normals.foreach_get("vector", corner_normals.ravel())
+
+    corner_vertices = loop_vertices[triangle_loops]
+    is_smooth_corner = np.repeat(is_smooth[triangle_polygons], 3)[:, np.newaxis]
+    normals = np.where(is_smooth_corner, vertex_normals[corner_vertices], corner_normals[triangle_loops])
+    return positions, corner_vertices, normals
+
+def _indexed_mesh_arrays(mesh: bpy.types.Mesh) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Local (V', 3) positions and normals and (T, 3) triangle indices of the mesh's loop triangles.
+    Corners share a vertex wherever they share both the mesh vertex and the normal, so vertices are
+    only split along flat-shaded faces and custom normals.
+    """
+    positions, corner_vertices, normals = _mesh_corner_arrays(mesh)
+    keys = np.empty((corner_vertices.shape[0], 4), dtype=np.int32)
+    keys[:, 0] = corner_vertices
+    keys[:, 1:] = normals.view(np.int32)
+    _, first_corners, corner_indices = np.unique(
+        np.ascontiguousarray(keys).view(np.dtype((np.void, keys.itemsize * 4))).ravel(), return_index=True, return_inverse=True
+    )
+    indices = corner_indices.astype(np.int32).reshape(-1, 3)
+    return positions[corner_vertices[first_corners]], normals[first_corners], indices
+
+def _transform_points(points: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    return (points @ matrix[:3, :3].T + matrix[:3, 3]).astype(np.float32)
+
+def _transform_normals(normals: np.ndarray, matrix: np.ndarray) -> np.ndarray:
+    """Normals transformed by the inverse transpose of the matrix and normalized; zero normals stay zero."""
+    transformed = normals @ np.linalg.inv(matrix[:3, :3])
+    lengths = np.linalg.norm(transformed, axis=-1, keepdims=True)
+    return (transformed / np.where(lengths > 0.0, lengths, 1.0)).astype(np.float32)
 
 class BlenderScene:
     def __init__(self, light_obj: bpy.types.Object):
@@ -57,9 +126,14 @@ class BlenderScene:
         direction = self.light.matrix_world.to_3x3() @ Vector((0.0, 0.0, -1.0))
         return direction.normalized()
 
-    def world_triangle_data(self) -> MeshTriangles:
-        all_vertices = []
-        all_normals = []
+    def instanced_triangle_data(self, cache: "GeometryCache | None" = None) -> list[InstancedMesh]:
+        """
+        Local-space triangles of every distinct mesh among the visible instances, with the model
+        matrices of all instances that show it, so that repeated geometry is extracted only once.
+        With a cache, meshes whose geometry has not changed since an earlier run are not extracted again.
+        """
+        meshes: dict[int, InstancedMesh] = {}
+        matrices: dict[int, list[np.ndarray]] = {}
 
         depsgraph = bpy.context.evaluated_depsgraph_get()
 
@@ -68,29 +142,38 @@ class BlenderScene:
             if obj.type != "MESH" or not inst.show_self:
                 continue
 
+            # Instances of the same evaluated mesh share its data; inst is only valid during the iteration
             mesh = obj.data
-            model_matrix = inst.matrix_world
-            normal_matrix = model_matrix.inverted().transposed().to_3x3()
-
-            world_vertices = [(model_matrix @ vertex.co.to_4d()).to_3d() for vertex in mesh.vertices]
-            world_vertex_normals = [(normal_matrix @ vertex.normal).normalized() for vertex in mesh.vertices]
-
-            for face in mesh.polygons:
-                face_loops = [mesh.loops[loop_index] for loop_index in face.loop_indices]
-                face_vertices = [world_vertices[loop.vertex_index] for loop in face_loops]
-                if face.use_smooth:
-                    face_normals = [world_vertex_normals[loop.vertex_index] for loop in face_loops]
-                else:
-                    face_normals = [(normal_matrix @ loop.normal).normalized() for loop in face_loops]
-                if len(face_vertices) == 3:
-                    all_vertices.extend(face_vertices)
-                    all_normals.extend(face_normals)
-                elif len(face_vertices) == 4: # Triangulate quads on the fly
-                    all_vertices.extend(face_vertices[:3])
-                    all_normals.extend(face_normals[:3])
-                    all_vertices.extend([face_vertices[0], face_vertices[2], face_vertices[3]])
-                    all_normals.extend([face_normals[0], face_normals[2], face_normals[3]])
-                else:
-                    raise ValueError("Only triangles and quads are supported")
-
-        return MeshTriangles(all_vertices, all_normals, None)
+            key = mesh.as_pointer()
+            if key not in meshes:
+                triangles = None if cache is None else cache.get(obj, mesh)
+                if triangles is None:
+                    if len(mesh.loop_triangles) == 0:
+                        continue
+                    triangles = MeshTriangles(*_indexed_mesh_arrays(mesh))
+                    if cache is not None:
+                        cache.put(obj, mesh, triangles)
+                meshes[key] = InstancedMesh(triangles, None)
+                matrices[key] = []
+            matrices[key].append(np.array(inst.matrix_world, dtype=np.float64))
+
+        for key, instanced_mesh in meshes.items():
+            instanced_mesh.matrices = np.stack(matrices[key])
+        return list(meshes.values())
+
+    def world_triangle_data(self) -> MeshTriangles:
+        """World-space triangles of all visible mesh instances, as shared vertices and triangle indices."""
+        all_vertices = [np.zeros((0, 3), dtype=np.float32)]
+        all_normals = [np.zeros((0, 3), dtype=np.float32)]
+        all_indices = [np.zeros((0, 3), dtype=np.int32)]
+        vertex_count = 0
+
+        for instanced_mesh in self.instanced_triangle_data():
+            triangles = instanced_mesh.triangles
+            for model_matrix in instanced_mesh.matrices:
+                all_vertices.append(_transform_points(triangles.vertices, model_matrix))
+                all_normals.append(_transform_normals(triangles.normals, model_matrix))
+                all_indices.append(triangles.indices + vertex_count)
+                vertex_count += triangles.vertices.shape[0]
+
+        return MeshTriangles(np.concatenate(all_vertices), np.concatenate(all_normals), np.concatenate(all_indices))
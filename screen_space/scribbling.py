@@ -1,61 +1,298 @@
+import math
 import random
 
-from .stippling import Stipple
+import numpy as np
 
+from .random_streams import RandomSeed, numpy_generator, python_random
+from .statistics import GeneratorStatistics, timed
+
+
+def _hilbert_indices(xs: np.ndarray, ys: np.ndarray, order: int) -> np.ndarray:
+    """Hilbert curve indices of integer coordinates in [0, 2^order)."""
+    n = 1 << order
+    x = xs.astype(np.int64)
+    y = ys.astype(np.int64)
+    d = np.zeros_like(x)
+    s = n >> 1
+    while s > 0:
+        rx = ((x & s) > 0).astype(np.int64)
+        ry = ((y & s) > 0).astype(np.int64)
+        d += s * s * ((3 * rx) ^ ry)
+        # Rotate the quadrant so that the lower bits follow the curve
+        flip = (ry == 0) & (rx == 1)
+        x = np.where(flip, n - 1 - x, x)
+        y = np.where(flip, n - 1 - y, y)
+        swap = ry == 0
+        x, y = np.where(swap, y, x), np.where(swap, x, y)
+        s >>= 1
+    return d
+
+def _spread_bits_3d(v: np.ndarray) -> np.ndarray:
+    """Insert two zero bits between each of the lower 21 bits."""
+    v = v.astype(np.uint64) & np.uint64(0x1fffff)
+    v = (v | v << np.uint64(32)) & np.uint64(0x1f00000000ffff)
+    v = (v | v << np.uint64(16)) & np.uint64(0x1f0000ff0000ff)
+    v = (v | v << np.uint64(8)) & np.uint64(0x100f00f00f00f00f)
+    v = (v | v << np.uint64(4)) & np.uint64(0x10c30c30c30c30c3)
+    v = (v | v << np.uint64(2)) & np.uint64(0x1249249249249249)
+    return v
+
+def _morton_indices(xs: np.ndarray, ys: np.ndarray, zs: np.ndarray) -> np.ndarray:
+    """Morton (Z-order) indices of integer coordinates in [0, 2^21)."""
+    return _spread_bits_3d(xs) | (_spread_bits_3d(ys) << np.uint64(1)) | (_spread_bits_3d(zs) << np.uint64(2))
+
+
+class _StippleGrid:
+    """Uniform grid over stipple indices that supports removal and exact nearest-neighbor queries."""
+    def __init__(self, points: list[tuple[float, float, float]], indices: list[int]):
+        self.points = points
+        self.rebuild(indices)
+
+    def rebuild(self, indices: list[int]):
+        xs = [self.points[i][0] for i in indices]
+        ys = [self.points[i][1] for i in indices]
+        self.x_min = min(xs)
+        self.y_min = min(ys)
+        extent_x = max(xs) - self.x_min
+        extent_y = max(ys) - self.y_min
+        # Aim for about two points per cell
+        self.cell_size = max(math.sqrt(2.0 * max(extent_x * extent_y, 1.0) / len(indices)), 1.0e-3)
+        self.cells_x = int(extent_x / self.cell_size) + 1
+        self.cells_y = int(extent_y / self.cell_size) + 1
+        self.cells: list[list[int]] = [[] for _ in range(self.cells_x * self.cells_y)]
+        for i in indices:
+            self.cells[self._cell_index(*self._cell_coordinates(self.points[i]))].append(i)
+        self.count = len(indices)
+        self.count_at_rebuild = self.count
+        self.scanned_count = 0 # stipples compared by nearest() since the grid was created
+
+    def _cell_coordinates(self, p: tuple[float, float, float]) -> tuple[int, int]:
+        cx = max(min(int((p[0] - self.x_min) / self.cell_size), self.cells_x - 1), 0)
+        cy = max(min(int((p[1] - self.y_min) / self.cell_size), self.cells_y - 1), 0)
+        return (cx, cy)
+
+    def _cell_index(self, cx: int, cy: int) -> int:
+        return cy * self.cells_x + cx
+
+    def remove(self, i: int):
+        self.cells[self._cell_index(*self._cell_coordinates(self.points[i]))].remove(i)
+        self.count -= 1
+        # Keep the density of occupied cells roughly constant as points are consumed
+        if 0 < self.count < self.count_at_rebuild // 4:
+            self.rebuild([j for cell in self.cells for j in cell])
+
+    def nearest(
+        self,
+        last: tuple[float, float, float],
+        depth_factor: float,
+        jitter: float,
+        random_source: random.Random
+    ) -> int:
+        """Index of the stipple minimizing the (optionally jittered) depth-weighted distance to last."""
+        cx, cy = self._cell_coordinates(last)
+        last_x, last_y, last_depth = last
+        min_distance = float("inf")
+        nearest_index = -1
+        max_ring = max(cx, cy, self.cells_x - 1 - cx, self.cells_y - 1 - cy)
+        scanned_count = 0
+        for ring in range(max_ring + 1):
+            for iy in range(max(cy - ring, 0), min(cy + ring, self.cells_y - 1) + 1):
+                on_edge_row = iy == cy - ring or iy == cy + ring
+                ix_step = 1 if on_edge_row else 2 * ring
+                for ix in range(cx - ring, cx + ring + 1, max(ix_step, 1)):
+                    if not 0 <= ix < self.cells_x:
+                        continue
+                    cell = self.cells[iy * self.cells_x + ix]
+                    scanned_count += len(cell)
+                    for i in cell:
+                        x, y, depth = self.points[i]
+                        distance = (x - last_x)**2 + (y - last_y)**2
+                        if last_depth + depth > 0.0:
+                            distance += depth_factor * abs(depth - last_depth) / (last_depth + depth)
+                        if jitter > 0.0:
+                            distance *= 1.0 + jitter * random_source.random()
+                        if distance < min_distance:
+                            min_distance = distance
+                            nearest_index = i
+            # Points beyond this ring are at least ring * cell_size away; the metric never undercuts that
+            if nearest_index >= 0 and min_distance <= (ring * self.cell_size)**2:
+                break
+        self.scanned_count += scanned_count
+        return nearest_index
 
 def scribbles_from_stipples(
-        stipples: list[Stipple],
+        stipples: np.ndarray,
         initial_sampling_rate: int = 50,
         min_remaining_point_fraction: float = 0.025,
         depth_factor: float = 1.0,
-        stipple_stroke_length: float = 0.0
-) -> list[tuple[float, float]]:
+        stipple_stroke_length: float = 0.0,
+        search: str = "SAMPLED",
+        jitter: float = 0.0,
+        rng_seed: RandomSeed | None = None,
+        statistics: GeneratorStatistics | None = None
+) -> np.ndarray:
+    """
+    Connect stipples into a scribble by repeatedly moving to a nearby unvisited stipple.
+
+    The stipples are a structured array of STIPPLE_DTYPE and the scribble is returned as (N, 2)
+    points. rng_seed is an integer, a seed sequence or a NumPy generator; None draws fresh entropy.
+
+    The "SAMPLED" search scans a random sub-sample of the remaining stipples, thinning out with
+    initial_sampling_rate, for an approximate nearest neighbor in O(n^2) total. The "INDEXED" search
+    finds the exact nearest neighbor under the same depth-weighted metric with a uniform grid that
+    is rebuilt as stipples are consumed; jitter > 0 scales each candidate's distance by a random
+    factor in [1, 1 + jitter] to keep some of the hand-drawn irregularity.
+
+    The "HILBERT" and "MORTON" orderings visit every stipple in the order of a randomly shifted
+    space-filling curve in O(n log n). The Morton curve runs through (x, y, depth) with the depth
+    relative to the mean stipple depth, scaled by depth_factor times the larger xy extent of the
+    stipples, so that with depth_factor = 1 a depth difference of the mean depth counts as much as
+    crossing all stipples. There, jitter perturbs the coordinates by up to jitter times the mean
+    stipple spacing before sorting.
+
+    With statistics, the nearest-neighbor searches and the stipples they compared are counted as
+    registry queries and candidates scanned, and the "path" and "strokes" phases timed.
+    """
     if len(stipples) < 2:
-        return []
+        return np.zeros((0, 2), dtype=np.float64)
 
+    random_source = python_random(rng_seed)
+    rng = numpy_generator(rng_seed)
+
+    with timed(statistics, "path"):
+        if search == "HILBERT" or search == "MORTON":
+            path = _curve_scribble_path(stipples, search, depth_factor, jitter, rng)
+        else:
+            points = list(zip(stipples["x"].tolist(), stipples["y"].tolist(), stipples["depth"].tolist()))
+            if search == "INDEXED":
+                path = _indexed_scribble_path(
+                    points, min_remaining_point_fraction, depth_factor, jitter, random_source, statistics
+                )
+            elif search == "SAMPLED":
+                path = _sampled_scribble_path(
+                    points, initial_sampling_rate, min_remaining_point_fraction, depth_factor, random_source, statistics
+                )
+            else:
+                raise ValueError(f"Unknown scribble search '{search}'")
+
+    with timed(statistics, "strokes"):
+        path_stipples = stipples[path]
+        xs = path_stipples["x"].astype(np.float64)
+        ys = path_stipples["y"].astype(np.float64)
+        if stipple_stroke_length > 0.0:
+            # Move each point randomly along its stipple's direction
+            t = (rng.random(len(path_stipples)) - 0.5) * stipple_stroke_length
+            xs += t * path_stipples["cos"]
+            ys += t * path_stipples["sin"]
+
+    return np.stack((xs, ys), axis=-1)
+
+def _curve_scribble_path(
+        stipples: np.ndarray,
+        curve: str,
+        depth_factor: float,
+        jitter: float,
+        rng: np.random.Generator
+) -> np.ndarray:
+    xs = stipples["x"].astype(np.float64)
+    ys = stipples["y"].astype(np.float64)
+    coordinates = [xs - xs.min(), ys - ys.min()]
+    if curve == "MORTON":
+        depths = stipples["depth"].astype(np.float64)
+        mean_depth = depths.mean()
+        # Relative depths would be negligible against pixel coordinates; scale them to the xy extent
+        xy_extent = max(float(coordinates[0].max()), float(coordinates[1].max()), 1.0)
+        zs = depth_factor * xy_extent * depths / mean_depth if mean_depth > 0.0 else np.zeros_like(depths)
+        coordinates.append(zs - zs.min())
+
+    if jitter > 0.0:
+        spacing = math.sqrt(max(float(coordinates[0].max() * coordinates[1].max()), 1.0) / len(stipples))
+        coordinates = [c + jitter * spacing * (rng.random(c.shape[0]) - 0.5) for c in coordinates]
+        coordinates = [c - c.min() for c in coordinates]
+    extent = max(max(float(c.max()) for c in coordinates), 1.0e-6)
+
+    # Shift the points randomly within a curve domain twice the size of their extent,
+    # so that repeated scribbles of the same stipples break at different places
+    order = 16 if curve == "HILBERT" else 21
+    scale = ((1 << order) - 1) / (2.0 * extent)
+    quantized = [((c + extent * rng.random()) * scale).astype(np.int64) for c in coordinates]
+    if curve == "HILBERT":
+        keys = _hilbert_indices(quantized[0], quantized[1], order)
+    else:
+        keys = _morton_indices(quantized[0], quantized[1], quantized[2])
+    return np.argsort(keys, kind="stable")
+
+def _indexed_scribble_path(
+        points: list[tuple[float, float, float]],
+        min_remaining_point_fraction: float,
+        depth_factor: float,
+        jitter: float,
+        random_source: random.Random,
+        statistics: GeneratorStatistics | None = None
+) -> list[int]:
+    indices = list(range(len(points)))
+    random_source.shuffle(indices)
+    grid = _StippleGrid(points, indices)
+
+    path = [indices[0]]
+    grid.remove(indices[0])
+
+    while grid.count / len(points) > min_remaining_point_fraction:
+        nearest_index = grid.nearest(points[path[-1]], depth_factor, jitter, random_source)
+        path.append(nearest_index)
+        grid.remove(nearest_index)
+
+    if statistics is not None:
+        statistics.registry_queries += len(path) - 1
+        statistics.candidates_scanned += grid.scanned_count
+    return path
+
+def _sampled_scribble_path(
+        points: list[tuple[float, float, float]],
+        initial_sampling_rate: int,
+        min_remaining_point_fraction: float,
+        depth_factor: float,
+        random_source: random.Random,
+        statistics: GeneratorStatistics | None = None
+) -> list[int]:
     path = []
-    points = stipples.copy()
-    random.shuffle(points)
+    remaining = list(range(len(points)))
+    random_source.shuffle(remaining)
 
-    path.append(points.pop(0))
+    path.append(remaining.pop(0))
+    scanned_count = 0
 
-    while len(points) / len(stipples) > min_remaining_point_fraction:
+    while len(remaining) / len(points) > min_remaining_point_fraction:
         min_distance = float("inf")
         nearest_index = 0
-        sampling_rate = max(1, int(initial_sampling_rate * len(points) / len(stipples)))
+        sampling_rate = max(1, int(initial_sampling_rate * len(remaining) / len(points)))
 
-        last_p = path[-1]
-        i = min(len(points) - 1, random.randint(0, sampling_rate))
-        while i < len(points):
-            p = points[i]
+        last_x, last_y, last_depth = points[path[-1]]
+        i = min(len(remaining) - 1, random_source.randint(0, sampling_rate))
+        while i < len(remaining):
+            x, y, depth = points[remaining[i]]
 
-            spatial_dist = (p.x - last_p.x)**2 + (p.y - last_p.y)**2
+            spatial_dist = (x - last_x)**2 + (y - last_y)**2
             depth_dist = 0.0
-            if last_p.depth + p.depth > 0.0:
-                depth_dist = depth_factor * abs(p.depth - last_p.depth) / (last_p.depth + p.depth)
+            if last_depth + depth > 0.0:
+                depth_dist = depth_factor * abs(depth - last_depth) / (last_depth + depth)
 
             distance = spatial_dist + depth_dist
+            scanned_count += 1
 
             if distance < min_distance:
                 min_distance = distance
                 nearest_index = i
 
-            i_next = i + 1 + random.randint(0, sampling_rate)
-            if i_next >= len(points):
+            i_next = i + 1 + random_source.randint(0, sampling_rate)
+            if i_next >= len(remaining):
                 break
             i = i_next
 
-        if nearest_index < len(points):
-            path.append(points.pop(nearest_index))
-
-    def stipple_to_point(stipple: Stipple) -> tuple[float, float]:
-        if stipple_stroke_length > 0.0:
-            t = (random.random() - 0.5) * stipple_stroke_length
-            return (
-                stipple.x + t * stipple.direction[0],
-                stipple.y + t * stipple.direction[1]
-            )
-        else:
-            return (stipple.x, stipple.y)
+        if nearest_index < len(remaining):
+            path.append(remaining.pop(nearest_index))
 
-    return [stipple_to_point(s) for s in path]
+    if statistics is not None:
+        statistics.registry_queries += len(path) - 1
+        statistics.candidates_scanned += scanned_count
+    return path
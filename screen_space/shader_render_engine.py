@@ -7,7 +7,7 @@ import gpu
 import numpy as np
 from mathutils import Matrix, Vector
 
-from .scene import MeshTriangles
+from .scene import InstancedMesh, MeshTriangles
 
 
 @dataclass
@@ -23,6 +23,8 @@ class ShaderRenderEngine:
             fragment_source=__class__._read_file("fragment_shader.glsl"),
             constants=[
                 ShaderAttribute("MAT4", "viewProjectionMatrix"),
+                ShaderAttribute("MAT4", "modelMatrix"),
+                ShaderAttribute("MAT4", "normalMatrix"), # upper 3x3 used; avoids the padding rules of mat3
                 ShaderAttribute("VEC3", "light"),
                 ShaderAttribute("BOOL", "isDirectionalLight"),
                 ShaderAttribute("FLOAT", "orientationOffset"),
@@ -94,8 +96,9 @@ class ShaderRenderEngine:
             vertex_buffer.attr_fill("normal", triangles.normals)
 
         batch = None
-        if triangles.indices is not None:
-            index_buffer = gpu.types.GPUIndexBuf(type="TRIS", seq=triangles.indices)
+        if triangles.indices is not None and len(triangles.indices) > 0:
+            # Shared vertices are uploaded once and referenced by index
+            index_buffer = gpu.types.GPUIndexBuf(type="TRIS", seq=np.ascontiguousarray(triangles.indices, dtype=np.int32))
             batch = gpu.types.GPUBatch(type="TRIS", buf=vertex_buffer, elem=index_buffer)
         else:
             batch = gpu.types.GPUBatch(type="TRIS", buf=vertex_buffer)
@@ -153,9 +156,16 @@ class ShaderRenderEngine:
         rgb_pixels = pixels.reshape((height, width, 4))[:, :, :3]
         return rgb_pixels
 
+    @staticmethod
+    def _column_major(matrix: np.ndarray) -> list[float]:
+        """4x4 matrix, or 3x3 matrix embedded in one, flattened column by column as GLSL expects."""
+        padded = np.eye(4)
+        padded[:matrix.shape[0], :matrix.shape[1]] = matrix
+        return padded.T.ravel().tolist()
+
     def render_coverage_luminance_depth_direction(
             self,
-            triangles: MeshTriangles,
+            triangles: MeshTriangles | Sequence[InstancedMesh],
             view_projection_matrix: Matrix,
             camera_clip_range: tuple[float, float],
             light: Vector,
@@ -172,7 +182,8 @@ class ShaderRenderEngine:
         to extract various properties from the scene.
 
         Args:
-            triangles: The mesh triangle data to render.
+            triangles: World-space mesh triangles, or distinct local-space meshes with the model
+                matrices of their instances. Each mesh is uploaded once and drawn once per instance.
             view_projection_matrix: Combined view and projection matrix for the camera.
             camera_clip_range: Tuple of (near, far) clipping distances.
             light: Position or direction of the light.
@@ -189,7 +200,9 @@ class ShaderRenderEngine:
             - Channel 3: Cosine of orientation angles
             - Channel 4: Sine of orientation angles
         """
-        batch = __class__._prepare_batch(triangles)
+        if isinstance(triangles, MeshTriangles):
+            triangles = [InstancedMesh(triangles, np.eye(4)[np.newaxis])]
+        batches = [__class__._prepare_batch(instanced_mesh.triangles) for instanced_mesh in triangles]
         depth_texture = gpu.types.GPUTexture(size=(width, height), format="DEPTH_COMPONENT32F")
         depth_texture.clear(format="FLOAT", value=(1.0,))
         color_texture = gpu.types.GPUTexture(size=(width, height), format="RG32F")
@@ -201,7 +214,14 @@ class ShaderRenderEngine:
             self.shader.uniform_bool("isDirectionalLight", is_directional_light)
             self.shader.uniform_float("orientationOffset", orientation_offset)
             __class__._set_gpu_state()
-            batch.draw(self.shader)
+            for batch, instanced_mesh in zip(batches, triangles):
+                normal_matrices = instanced_mesh.normal_matrices
+                for model_matrix, normal_matrix in zip(instanced_mesh.matrices, normal_matrices):
+                    self.shader.uniform_float("modelMatrix", __class__._column_major(model_matrix))
+                    self.shader.uniform_float("normalMatrix", __class__._column_major(normal_matrix))
+                    # Mirroring instances flip the winding order of their triangles
+                    gpu.state.front_facing_set(bool(np.linalg.det(model_matrix[:3, :3]) < 0.0))
+                    batch.draw(self.shader)
             __class__._reset_gpu_state()
 
             # Read depth texture and linearize values
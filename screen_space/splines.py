@@ -1,3 +1,9 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .polylines import Polylines
+
+
 def catmull_rom_spline(p0: tuple[float, float], p1: tuple[float, float], p2: tuple[float, float], p3: tuple[float, float], t: float) -> tuple[float, float]:
     t2 = t * t
     t3 = t2 * t
@@ -12,20 +18,87 @@ def catmull_rom_spline(p0: tuple[float, float], p1: tuple[float, float], p2: tup
 
     return (x, y)
 
+def catmull_rom_basis(points_per_segment: int) -> np.ndarray:
+    """(points_per_segment, 4) weights of the four control points at t = j / points_per_segment."""
+    t = np.arange(points_per_segment, dtype=np.float64) / points_per_segment
+    t2 = t * t
+    t3 = t2 * t
+    return np.stack((
+        -0.5 * t3 + t2 - 0.5 * t,
+        1.5 * t3 - 2.5 * t2 + 1,
+        -1.5 * t3 + 2 * t2 + 0.5 * t,
+        0.5 * t3 - 0.5 * t2
+    ), axis=-1)
+
+def _ranks(counts: np.ndarray) -> np.ndarray:
+    """0, 1, ..., counts[0] - 1, 0, 1, ..., counts[1] - 1, ... as one array."""
+    ends = np.cumsum(counts)
+    return np.arange(int(ends[-1]) if ends.size else 0) - np.repeat(ends - counts, counts)
+
+def _interpolate_windows(points: np.ndarray, starts: np.ndarray, basis: np.ndarray) -> np.ndarray:
+    """Points of the segments whose four control points begin at the given indices, segment by segment."""
+    windows = sliding_window_view(points, 4, axis=0)[starts] # (segments, 2, 4)
+    return (windows @ basis.T).transpose(0, 2, 1).reshape(-1, 2)
 
 def catmull_rom_interpolate(points: list[tuple[float, float]], points_per_segment: int = 10) -> list[tuple[float, float]]:
     assert len(points) >= 4, "At least 4 points are required for Catmull-Rom interpolation"
 
-    generated_points = []
+    points_array = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    starts = np.arange(len(points) - 3)
+    return list(map(tuple, _interpolate_windows(points_array, starts, catmull_rom_basis(points_per_segment)).tolist()))
+
+def catmull_rom_interpolate_polylines(
+    polylines: Polylines,
+    points_per_segment: int = 10,
+    include_endpoints: bool = False
+) -> Polylines:
+    """
+    Interpolate all polylines at once, with one matrix product over the control point windows.
 
-    for i in range(len(points) - 3):
-        p0 = points[i]
-        p1 = points[i + 1]
-        p2 = points[i + 2]
-        p3 = points[i + 3]
+    By default, like catmull_rom_interpolate, a polyline of n >= 4 points yields the n - 3 segments
+    between its second and second to last point, and shorter polylines are dropped. With
+    include_endpoints, each polyline is extended by a mirrored control point at either end, so that
+    the curve runs through all n >= 2 points and ends exactly at the last one.
+    """
+    basis = catmull_rom_basis(points_per_segment)
+    if include_endpoints:
+        polylines = polylines.filter(2)
+        if len(polylines) == 0:
+            return Polylines()
+        lengths = polylines.lengths
+        line_count = len(polylines)
+        points = polylines.points.astype(np.float64)
+        first = polylines.offsets[:-1]
+        last = polylines.offsets[1:] - 1
+        # Each polyline becomes (2 p_0 - p_1, p_0, ..., p_n-1, 2 p_n-1 - p_n-2) in the padded buffer
+        padded_offsets = polylines.offsets + 2 * np.arange(line_count + 1)
+        padded = np.empty((points.shape[0] + 2 * line_count, 2), dtype=np.float64)
+        is_original = np.ones(padded.shape[0], dtype=bool)
+        is_original[padded_offsets[:-1]] = False
+        is_original[padded_offsets[1:] - 1] = False
+        padded[is_original] = points
+        padded[padded_offsets[:-1]] = 2.0 * points[first] - points[first + 1]
+        padded[padded_offsets[1:] - 1] = 2.0 * points[last] - points[last - 1]
+        segment_counts = lengths - 1
+        starts = np.repeat(padded_offsets[:-1], segment_counts) + _ranks(segment_counts)
+        segment_points = _interpolate_windows(padded, starts, basis)
 
-        for j in range(points_per_segment):
-            t = j / points_per_segment
-            generated_points.append(catmull_rom_spline(p0, p1, p2, p3, t))
+        # Every polyline ends in its last control point
+        out_lengths = segment_counts * points_per_segment + 1
+        offsets = np.zeros(line_count + 1, dtype=np.int64)
+        np.cumsum(out_lengths, out=offsets[1:])
+        out = np.empty((int(offsets[-1]), 2), dtype=np.float64)
+        is_end = np.zeros(out.shape[0], dtype=bool)
+        is_end[offsets[1:] - 1] = True
+        out[~is_end] = segment_points
+        out[is_end] = points[last]
+        return Polylines(out, offsets)
 
-    return generated_points
+    polylines = polylines.filter(4)
+    segment_counts = polylines.lengths - 3
+    starts = np.repeat(polylines.offsets[:-1], segment_counts) + _ranks(segment_counts)
+    offsets = np.zeros(len(polylines) + 1, dtype=np.int64)
+    np.cumsum(segment_counts * points_per_segment, out=offsets[1:])
+    if starts.size == 0:
+        return Polylines(None, offsets)
+    return Polylines(_interpolate_windows(polylines.points.astype(np.float64), starts, basis), offsets)
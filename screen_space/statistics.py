@@ -0,0 +1,68 @@
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+import time
+
+import numpy as np
+
+
+@dataclass
+class GeneratorStatistics:
+    """
+    Counters and phase timings of generator runs, for finding out why a run is slow or sparse.
+
+    Generators only fill it in when one is passed, so it can stay wired into production runs:
+    without it, hot loops pay no more than a None check per line, candidate batch or scribble step.
+    Runs passed the same object accumulate; tiled runs merge the statistics of their tiles, so
+    timings then add up the time spent in all worker processes.
+
+    rejections counts start points and candidates that were not accepted, terminations the reasons
+    why streamline integration stopped, both by reason.
+    """
+    grid_samples: int = 0
+    registry_queries: int = 0
+    candidates_scanned: int = 0 # registry entries compared against query points
+    rejections: Counter = field(default_factory=Counter)
+    terminations: Counter = field(default_factory=Counter)
+    timings: dict[str, float] = field(default_factory=dict)
+
+    @contextmanager
+    def phase(self, name: str):
+        """Add the wall-clock time of the enclosed block to the timing of the phase."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start_time
+
+    def merge(self, other: "GeneratorStatistics"):
+        self.grid_samples += other.grid_samples
+        self.registry_queries += other.registry_queries
+        self.candidates_scanned += other.candidates_scanned
+        self.rejections.update(other.rejections)
+        self.terminations.update(other.terminations)
+        for name, seconds in other.timings.items():
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+    def summary(self) -> str:
+        rows = [
+            ("grid samples", f"{self.grid_samples}"),
+            ("registry queries", f"{self.registry_queries}"),
+            ("candidates scanned", f"{self.candidates_scanned}"),
+            ("candidates per query", f"{self.candidates_scanned / max(self.registry_queries, 1):.1f}")
+        ]
+        rows += [(f"rejected: {reason}", f"{count}") for reason, count in self.rejections.most_common()]
+        rows += [(f"stopped: {reason}", f"{count}") for reason, count in self.terminations.most_common()]
+        rows += [(f"time: {name}", f"{seconds:.3f} s") for name, seconds in self.timings.items()]
+        width = max(len(label) for label, _ in rows)
+        return "\n".join(f"{label:<{width}}  {value:>12}" for label, value in rows)
+
+def timed(statistics: GeneratorStatistics | None, name: str):
+    """statistics.phase(name), or a no-op context without statistics."""
+    return nullcontext() if statistics is None else statistics.phase(name)
+
+def count_rejections(statistics: GeneratorStatistics, reason: str, mask: np.ndarray):
+    """Count the True entries of mask as rejections for reason."""
+    count = int(np.count_nonzero(mask))
+    if count:
+        statistics.rejections[reason] += count
@@ -1,82 +1,468 @@
-from dataclasses import dataclass
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 import math
 import random
 import numpy as np
 
-from .grid import PixelDataGrid
-from .point_registry import PointRegistry
+from .budget import Budget
+from .grid import GridValues, PixelDataGrid
+from .point_registry import PointRegistry, create_point_registry
+from .polylines import pixels_to_drawing_positions
+from .random_streams import RandomSeed, numpy_generator, python_random, spawn_seeds
+from .statistics import GeneratorStatistics, count_rejections, timed
+from .tiling import Tile, TileLayout
 
 
-@dataclass
-class Stipple:
-    x: float
-    y: float
-    depth: float
-    direction: tuple[float, float]  # (cos, sin) of the orientation angle
+# Stipples are rows of a structured array; (cos, sin) is the orientation angle
+STIPPLE_DTYPE = np.dtype([
+    ("x", np.float32),
+    ("y", np.float32),
+    ("depth", np.float32),
+    ("cos", np.float32),
+    ("sin", np.float32)
+])
+
+class _StippleBuffer:
+    """Growable structured array of stipples."""
+    def __init__(self, capacity: int = 1024):
+        self.stipples = np.empty(capacity, dtype=STIPPLE_DTYPE)
+        self.count = 0
+
+    def extend(self, xs: np.ndarray, ys: np.ndarray, values: GridValues, indices: list[int]):
+        n = len(indices)
+        if n == 0:
+            return
+        if self.count + n > self.stipples.shape[0]:
+            grown = np.empty(max(2 * self.stipples.shape[0], self.count + n), dtype=STIPPLE_DTYPE)
+            grown[:self.count] = self.stipples[:self.count]
+            self.stipples = grown
+        added = self.stipples[self.count:self.count + n]
+        added["x"] = xs[indices]
+        added["y"] = ys[indices]
+        added["depth"] = values.depth[indices]
+        added["cos"] = values.direction_cos[indices]
+        added["sin"] = values.direction_sin[indices]
+        self.count += n
+
+    def to_array(self) -> np.ndarray:
+        return self.stipples[:self.count].copy()
 
 def radius_from_luminance(luminance: float, r_min: float, r_max: float, gamma: float) -> float:
     return r_min + (r_max - r_min) * pow(luminance, 0.5 * gamma)
 
+def radii_from_luminances(luminances: np.ndarray, r_min: float, r_max: float, gamma: float) -> np.ndarray:
+    return r_min + (r_max - r_min) * np.power(luminances, 0.5 * gamma)
+
+def _neighbourhood_max(plane: np.ndarray) -> np.ndarray:
+    """Maximum over the 3x3 neighbourhood of every pixel of a (height, width) plane."""
+    padded = np.pad(plane, 1, mode="edge")
+    height, width = plane.shape
+    result = plane.copy()
+    for dy in range(3):
+        for dx in range(3):
+            np.maximum(result, padded[dy:dy + height, dx:dx + width], out=result)
+    return result
+
+def add_stippling_planes(grid: PixelDataGrid, r_min: float, r_max: float, gamma: float):
+    """
+    Precompute the plane "radius" on the grid.
+
+    Every pixel holds the radius of the brightest pixel in its 3x3 neighbourhood. All four pixels
+    a sample interpolates between are in each other's neighbourhood, so the interpolated radius is
+    never below the radius of the interpolated luminance and stipples keep at least their radius apart.
+    The stipplable test is that of the default path.
+    """
+    luminance = _neighbourhood_max(grid.normalized_channel(1))
+    grid.add_plane("radius", radii_from_luminances(luminance, r_min, r_max, gamma))
+
+def _sample_stipple_values(
+    grid: PixelDataGrid,
+    xs: np.ndarray,
+    ys: np.ndarray,
+    parameters: dict,
+    use_precomputed_planes: bool
+) -> tuple[GridValues, np.ndarray, np.ndarray]:
+    """Grid values, radii and the stipplable mask at the given points."""
+    values = grid.grid_values(xs, ys)
+    if use_precomputed_planes:
+        radii = grid.plane_values("radius", xs, ys)
+    else:
+        radii = radii_from_luminances(values.luminance, parameters["r_min"], parameters["r_max"], parameters["gamma"])
+    is_stipplable = values.covered & (values.luminance <= parameters["max_stippled_luminance"])
+    return values, radii, is_stipplable
+
+# Active points whose child candidates the batched mode draws and tests together
+_BATCH_CENTERS = 16
+
+def _greedy_non_conflicting(xs: np.ndarray, ys: np.ndarray, radii: np.ndarray) -> np.ndarray:
+    """
+    Mask of the candidates kept when going through them in order and keeping each one that has no
+    kept predecessor within its own radius.
+
+    The first open candidate is always kept, so each step keeps it and closes the later candidates
+    whose radius it lies within, which takes one vectorized step per kept candidate.
+    """
+    count = xs.shape[0]
+    is_kept = np.zeros(count, dtype=bool)
+    is_open = np.ones(count, dtype=bool)
+    i = 0
+    while i < count:
+        is_kept[i] = True
+        dx = xs[i + 1:] - xs[i]
+        dy = ys[i + 1:] - ys[i]
+        is_open[i + 1:] &= dx * dx + dy * dy >= radii[i + 1:] * radii[i + 1:]
+        following = np.flatnonzero(is_open[i + 1:])
+        if following.size == 0:
+            break
+        i += 1 + int(following[0])
+    return is_kept
+
+def _grow_stipples(
+    grid: PixelDataGrid,
+    registry: PointRegistry,
+    seed_points: np.ndarray,
+    queue: deque,
+    parameters: dict,
+    random_source: random.Random,
+    rng: np.random.Generator,
+    batch_candidates: bool,
+    use_precomputed_planes: bool,
+    bounds: tuple[float, float, float, float] | None = None,
+    budget: Budget | None = None,
+    statistics: GeneratorStatistics | None = None
+) -> _StippleBuffer:
+    """
+    Place the (n, 2) seed points where allowed, then grow children from every active point in the
+    queue of (entity id, radius, point) and from every new stipple, in breadth-first order.
+    random_source provides random() for the sequential mode, rng the candidates of the batched mode.
+    Growth stops early once the budget is exhausted; the batched mode charges it once per batch.
+    Statistics, if given, are filled in as it goes.
+    """
+    child_count = parameters["child_count"]
+    stipples = _StippleBuffer()
+
+    def is_exhausted() -> bool:
+        return budget is not None and budget.is_exhausted()
+
+    def accept(p: tuple[float, float], r: float):
+        if budget is not None:
+            budget.add_points(1)
+        queue.append((registry.add_point(p), r, p))
+
+    def sample(xs: np.ndarray, ys: np.ndarray) -> tuple[GridValues, np.ndarray, np.ndarray]:
+        values, radii, is_stipplable = _sample_stipple_values(grid, xs, ys, parameters, use_precomputed_planes)
+        if statistics is not None:
+            statistics.grid_samples += xs.shape[0]
+            count_rejections(statistics, "uncovered", ~values.covered)
+            count_rejections(statistics, "luminance", values.covered & ~is_stipplable)
+        if bounds is not None:
+            is_inside = (xs >= bounds[0]) & (xs < bounds[2]) & (ys >= bounds[1]) & (ys < bounds[3])
+            if statistics is not None:
+                count_rejections(statistics, "outside_tile", is_stipplable & ~is_inside)
+            is_stipplable &= is_inside
+        return values, radii, is_stipplable
+
+    def grow_batch(centers: list[tuple[int, float, tuple[float, float]]]):
+        """Draw and test the child candidates of the active points together, in the order of the points."""
+        center_ids = np.array([center[0] for center in centers], dtype=np.int64)
+        center_radii = np.array([center[1] for center in centers], dtype=np.float64)
+        center_points = np.array([center[2] for center in centers], dtype=np.float64)
+        angles = (2.0 * math.pi) * rng.random((len(centers), child_count))
+        distances = center_radii[:, np.newaxis] * (1.0 + rng.random((len(centers), child_count)))
+        candidate_xs = (center_points[:, 0:1] + distances * np.cos(angles)).reshape(-1)
+        candidate_ys = (center_points[:, 1:2] + distances * np.sin(angles)).reshape(-1)
+        candidate_values, candidate_radii, is_candidate = sample(candidate_xs, candidate_ys)
+
+        candidates = np.flatnonzero(is_candidate)
+        if candidates.size == 0:
+            return
+        is_allowed = registry.are_points_allowed(
+            candidate_xs[candidates], candidate_ys[candidates], candidate_radii[candidates], 0.0,
+            center_ids[candidates // child_count]
+        )
+        allowed = candidates[is_allowed]
+        is_kept = _greedy_non_conflicting(candidate_xs[allowed], candidate_ys[allowed], candidate_radii[allowed])
+        if statistics is not None:
+            count_rejections(statistics, "proximity", ~is_allowed)
+            count_rejections(statistics, "proximity", ~is_kept)
+        accepted = allowed[is_kept]
+        if budget is not None:
+            remaining_points = budget.remaining_points()
+            if remaining_points is not None:
+                accepted = accepted[:remaining_points]
+            budget.add_points(accepted.size)
+        if accepted.size == 0:
+            return
+
+        points = np.stack((candidate_xs[accepted], candidate_ys[accepted]), axis=-1)
+        first_id = registry.add_separate_points(points)
+        queue.extend(zip(
+            range(first_id, first_id + accepted.size), candidate_radii[accepted].tolist(), map(tuple, points.tolist())
+        ))
+        stipples.extend(candidate_xs, candidate_ys, candidate_values, accepted.tolist())
+
+    # Seeds go first, points already in the queue are grown from afterwards
+    with timed(statistics, "seeding"):
+        if seed_points.shape[0] > 0:
+            seed_values, seed_radii, is_seed = sample(seed_points[:, 0], seed_points[:, 1])
+            seeded: list[int] = []
+            for i, p in enumerate(map(tuple, seed_points.tolist())):
+                if is_exhausted():
+                    break
+                r = float(seed_radii[i])
+                if is_seed[i]:
+                    if registry.is_point_allowed(p, r, r, 0):
+                        accept(p, r)
+                        seeded.append(i)
+                    elif statistics is not None:
+                        statistics.rejections["proximity"] += 1
+            stipples.extend(seed_points[:, 0], seed_points[:, 1], seed_values, seeded)
+
+    # Grow from queue
+    with timed(statistics, "growth"):
+        while queue and not is_exhausted():
+            if batch_candidates:
+                grow_batch([queue.popleft() for _ in range(min(len(queue), _BATCH_CENTERS))])
+                continue
+
+            id_center, r_center, center = queue.popleft()
+            angles = np.empty(child_count, dtype=np.float64)
+            distances = np.empty(child_count, dtype=np.float64)
+            for k in range(child_count):
+                angles[k] = 2.0 * math.pi * random_source.random()
+                distances[k] = r_center * (1.0 + random_source.random())
+            candidate_xs = center[0] + distances * np.cos(angles)
+            candidate_ys = center[1] + distances * np.sin(angles)
+            candidate_values, candidate_radii, is_candidate = sample(candidate_xs, candidate_ys)
+
+            accepted_indices = []
+            for k in np.flatnonzero(is_candidate).tolist():
+                if is_exhausted():
+                    break
+                p_candidate = (float(candidate_xs[k]), float(candidate_ys[k]))
+                r_candidate = float(candidate_radii[k])
+                if registry.is_point_allowed(p_candidate, r_candidate, 0.0, id_center):
+                    accept(p_candidate, r_candidate)
+                    accepted_indices.append(k)
+                elif statistics is not None:
+                    statistics.rejections["proximity"] += 1
+            stipples.extend(candidate_xs, candidate_ys, candidate_values, accepted_indices)
+
+    return stipples
+
 def poisson_disk_stipples(
         grid: PixelDataGrid,
-        rng_seed: int,
+        rng_seed: RandomSeed,
         seed_box_size: int,
         r_max: float,
         r_min: float,
         gamma: float,
         max_stippled_luminance: float = 1.0,
-        child_count: int = 100
-    ) -> list[Stipple]:
+        child_count: int = 100,
+        use_precomputed_planes: bool = False,
+        registry_type: str = "GRID",
+        batch_candidates: bool = False,
+        workers: int = 1,
+        tile_size: int = 512,
+        budget: Budget | None = None,
+        statistics: GeneratorStatistics | None = None
+    ) -> np.ndarray:
+    """
+    Generate stipples by Poisson disk sampling with a luminance-dependent radius.
+
+    The stipples are returned as a structured array of STIPPLE_DTYPE. rng_seed is an integer, a seed
+    sequence or a NumPy generator; no global random state is used.
+
+    With batch_candidates, the child candidates of up to _BATCH_CENTERS active points are drawn from a
+    NumPy generator and tested against the registry in one vectorized query; conflicts among the
+    candidates themselves are then resolved in candidate order, and the survivors are added at once.
+    The output is deterministic for a given rng_seed but differs from the output of the sequential mode.
+
+    With workers > 1, the grid is split into tiles of tile_size pixels that are grown phase by phase
+    in a process pool with generators seeded per tile; see _tiled_stipples.
+
+    With a budget, the seeds are placed darkest first, so that a run cut short by its time or point
+    limit has already covered the most important regions; budget.truncated then tells whether it was.
+
+    With statistics, grid samples, registry queries and rejected seeds and candidates are counted,
+    and the seeding and growth phases timed; see GeneratorStatistics.
+    """
     width = grid.width
     height = grid.height
-    registry = PointRegistry(width, height, r_max)
-    queue: deque = deque()
-    stipples: list[Stipple] = []
+    if use_precomputed_planes:
+        add_stippling_planes(grid, r_min, r_max, gamma)
+    parameters = {
+        "r_min": r_min,
+        "r_max": r_max,
+        "gamma": gamma,
+        "max_stippled_luminance": max_stippled_luminance,
+        "child_count": child_count
+    }
 
-    random.seed(rng_seed)
+    random_source = python_random(rng_seed)
+    rng = numpy_generator(rng_seed)
 
     # Seed points on a jittered grid
     cell_count_x = int(width / seed_box_size)
     cell_count_y = int(height / seed_box_size)
     cell_width = float(width) / float(cell_count_x)
     cell_height = float(height) / float(cell_count_y)
-    for iy in range(cell_count_y):
-        for ix in range(cell_count_x):
-            sx = cell_width * (ix + random.random())
-            sy = cell_height * (iy + random.random())
-            p = (sx, sy)
-
-            gv = grid.grid_value(sx, sy)
-            r = radius_from_luminance(gv.luminance, r_min, r_max, gamma)
-            if (gv.is_covered() and 
-                gv.luminance <= max_stippled_luminance and
-                registry.is_point_allowed(p, r, r, 0)):
-                pid = registry.add_point(p)
-                queue.append((pid, r, p))
-                stipples.append(Stipple(p[0], p[1], gv.depth, gv.direction))
+    if batch_candidates:
+        cell_iy, cell_ix = np.mgrid[0:cell_count_y, 0:cell_count_x]
+        jitter = rng.random((cell_count_y, cell_count_x, 2))
+        seed_points = np.stack((cell_width * (cell_ix + jitter[..., 0]), cell_height * (cell_iy + jitter[..., 1])), axis=-1).reshape(-1, 2)
+    else:
+        seed_points = np.array([
+            (cell_width * (ix + random_source.random()), cell_height * (iy + random_source.random()))
+            for iy in range(cell_count_y) for ix in range(cell_count_x)
+        ], dtype=np.float64).reshape(-1, 2)
+    if budget is not None:
+        seed_points = seed_points[np.argsort(grid.grid_values(seed_points[:, 0], seed_points[:, 1]).luminance, kind="stable")]
 
+    if workers > 1:
+        return _tiled_stipples(
+            grid, seed_points, parameters, rng_seed, batch_candidates, use_precomputed_planes, registry_type, workers, tile_size,
+            budget, statistics
+        )
 
-    # Grow from queue
-    while queue:
-        id_center, r_center, center = queue.popleft()
-        for _ in range(child_count):
-            angle = 2.0 * math.pi * random.random()
-            d = r_center * (1.0 + random.random())
-            p_candidate = (
-                center[0] + d * math.cos(angle),
-                center[1] + d * math.sin(angle)
-            )
-            gv = grid.grid_value(p_candidate[0], p_candidate[1])
-            r_candidate = radius_from_luminance(gv.luminance, r_min, r_max, gamma)
-            if (gv.is_covered() and 
-                gv.luminance <= max_stippled_luminance and
-                registry.is_point_allowed(p_candidate, r_candidate, 0.0, id_center)):
-                pid = registry.add_point(p_candidate)
-                queue.append((pid, r_candidate, p_candidate))
-                stipples.append(Stipple(p_candidate[0], p_candidate[1], gv.depth, gv.direction))
+    registry = create_point_registry(registry_type, width, height, r_max, r_min, statistics)
+    stipples = _grow_stipples(
+        grid, registry, seed_points, deque(), parameters, random_source, rng, batch_candidates, use_precomputed_planes,
+        budget=budget, statistics=statistics
+    )
+    return stipples.to_array()
 
-    return stipples
+@dataclass
+class _StipplingTileTask:
+    pixels: np.ndarray # (height, width, 5) pixels of the halo region
+    origin: tuple[int, int] # halo region corner in grid coordinates
+    bounds: tuple[float, float, float, float] # tile box in local coordinates
+    seed_points: np.ndarray # (n, 2), local coordinates
+    halo_points: np.ndarray # (m, 2) stipples of earlier phases within the halo region, local coordinates
+    seed: np.random.SeedSequence # child stream of the tile
+    parameters: dict
+    batch_candidates: bool
+    use_precomputed_planes: bool
+    registry_type: str
+    budget: Budget | None # share of the overall budget for this tile
+    collect_statistics: bool
+
+def _stipple_tile(task: _StipplingTileTask) -> tuple[np.ndarray, bool, GeneratorStatistics | None]:
+    """
+    Stipples of one tile in grid coordinates, grown from its seeds and from the stipples in its halo,
+    whether the tile budget cut them short, and the tile's statistics if requested.
+    """
+    parameters = task.parameters
+    grid = PixelDataGrid(task.pixels)
+    if task.use_precomputed_planes:
+        add_stippling_planes(grid, parameters["r_min"], parameters["r_max"], parameters["gamma"])
+    statistics = GeneratorStatistics() if task.collect_statistics else None
+    registry = create_point_registry(
+        task.registry_type, grid.width, grid.height, parameters["r_max"], parameters["r_min"], statistics
+    )
+
+    queue: deque = deque()
+    if task.halo_points.shape[0] > 0:
+        _, halo_radii, _ = _sample_stipple_values(
+            grid, task.halo_points[:, 0], task.halo_points[:, 1], parameters, task.use_precomputed_planes
+        )
+        for p, r in zip(map(tuple, task.halo_points.tolist()), halo_radii.tolist()):
+            queue.append((registry.add_point(p), r, p))
+
+    random_source = python_random(task.seed)
+    rng = numpy_generator(task.seed)
+    stipples = _grow_stipples(
+        grid, registry, task.seed_points, queue, parameters, random_source, rng,
+        task.batch_candidates, task.use_precomputed_planes, task.bounds, task.budget, statistics
+    ).to_array()
+    stipples["x"] += task.origin[0]
+    stipples["y"] += task.origin[1]
+    return stipples, task.budget is not None and task.budget.truncated, statistics
+
+def _tiled_stipples(
+    grid: PixelDataGrid,
+    seed_points: np.ndarray,
+    parameters: dict,
+    rng_seed: RandomSeed,
+    batch_candidates: bool,
+    use_precomputed_planes: bool,
+    registry_type: str,
+    workers: int,
+    tile_size: int,
+    budget: Budget | None = None,
+    statistics: GeneratorStatistics | None = None
+) -> np.ndarray:
+    """
+    Grow the stipples tile by tile in 2x2 phases, with the tiles of each phase in a process pool.
+
+    Stipples are confined to their tile, so tiles of the same phase are far enough apart not to
+    interfere. Every tile tests its candidates against, and grows from, the stipples of earlier phases
+    within its halo, so the radius condition holds across the seams. Tiles draw from child streams
+    spawned from rng_seed per tile and are merged in tile order, so the result does not depend on
+    the number of workers.
+
+    The budget is shared out among phases and tiles as in _tiled_streamlines.
+    """
+    halo = int(math.ceil(2.0 * parameters["r_max"])) + 2
+    layout = TileLayout(grid.width, grid.height, max(tile_size, 2 * halo), halo)
+
+    tile_seed_indices: dict[tuple[int, int], list[int]] = {t.key: [] for t in layout.tiles}
+    for i, (x, y) in enumerate(seed_points.tolist()):
+        tile = layout.tile_at(x, y)
+        if tile is not None:
+            tile_seed_indices[tile.key].append(i)
+
+    tile_streams = spawn_seeds(rng_seed, len(layout.tiles))
+    tile_stipples: dict[tuple[int, int], np.ndarray] = {}
+
+    def make_task(tile: Tile, tile_budget: Budget | None) -> _StipplingTileTask:
+        x0, y0, x1, y1 = layout.halo_region(tile)
+        halo_points = [np.zeros((0, 2), dtype=np.float64)]
+        for neighbor in layout.tiles_overlapping(tile.x_min, tile.y_min, tile.x_max, tile.y_max):
+            stipples = tile_stipples.get(neighbor.key)
+            if stipples is None:
+                continue
+            xs = stipples["x"].astype(np.float64)
+            ys = stipples["y"].astype(np.float64)
+            inside = (xs >= x0) & (xs < x1) & (ys >= y0) & (ys < y1)
+            halo_points.append(np.stack((xs[inside] - x0, ys[inside] - y0), axis=-1))
+        return _StipplingTileTask(
+            layout.crop_pixels(grid, tile),
+            (x0, y0),
+            layout.local_bounds(tile),
+            seed_points[tile_seed_indices[tile.key]] - (x0, y0),
+            np.concatenate(halo_points),
+            tile_streams[tile.iy * layout.tiles_x + tile.ix],
+            parameters,
+            batch_candidates,
+            use_precomputed_planes,
+            registry_type,
+            tile_budget,
+            statistics is not None
+        )
+
+    remaining_tiles = len(layout.tiles)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for phase in layout.phases(2):
+            if budget is not None and budget.is_exhausted():
+                break
+            tasks = [
+                make_task(tile, None if budget is None else budget.share(len(phase) / remaining_tiles, 1.0 / remaining_tiles))
+                for tile in phase
+            ]
+            for tile, (stipples, truncated, tile_statistics) in zip(phase, executor.map(_stipple_tile, tasks)):
+                tile_stipples[tile.key] = stipples
+                if budget is not None:
+                    budget.add_points(len(stipples))
+                    budget.truncated |= truncated
+                if statistics is not None:
+                    statistics.merge(tile_statistics)
+            remaining_tiles -= len(phase)
+
+    return np.concatenate([
+        tile_stipples[tile.key] for phase in layout.phases(2) for tile in phase if tile.key in tile_stipples
+    ] or [np.zeros(0, dtype=STIPPLE_DTYPE)])
 
 def stipples_to_stroke_positions(
     width: int,
@@ -84,29 +470,13 @@ def stipples_to_stroke_positions(
     drawing_origin: tuple[float, float, float],
     drawing_x_axis: tuple[float, float, float],
     drawing_y_axis: tuple[float, float, float],
-    stipples: list[Stipple],
+    stipples: np.ndarray,
     stroke_length: float = 0.0
 ) -> np.ndarray:
-    width_inv = 1.0 / width
-    height_inv = 1.0 / height
-
-    def project_point(x: float, y: float) -> tuple[float, float, float]:
-        x_coord = x * width_inv
-        y_coord = y * height_inv
-        return (
-            drawing_origin[0] + x_coord * drawing_x_axis[0] + y_coord * drawing_y_axis[0],
-            drawing_origin[1] + x_coord * drawing_x_axis[1] + y_coord * drawing_y_axis[1],
-            drawing_origin[2] + x_coord * drawing_x_axis[2] + y_coord * drawing_y_axis[2]
-        )
+    points = np.stack((stipples["x"], stipples["y"]), axis=-1).astype(np.float64)
+    if stroke_length > 0.0:
+        # Two points per stipple, centered on it along its direction
+        offsets = 0.5 * stroke_length * np.stack((stipples["cos"], stipples["sin"]), axis=-1).astype(np.float64)
+        points = np.stack((points - offsets, points + offsets), axis=1).reshape(-1, 2)
 
-    positions = []
-    for s in stipples:
-        if stroke_length > 0.0:
-            dx = 0.5 * stroke_length * s.direction[0]
-            dy = 0.5 * stroke_length * s.direction[1]
-            positions.append(project_point(s.x - dx, s.y - dy))
-            positions.append(project_point(s.x + dx, s.y + dy))
-        else:
-            positions.append(project_point(s.x, s.y))
-
-    return np.array(positions, dtype=np.float32)
+    return pixels_to_drawing_positions(points, width, height, drawing_origin, drawing_x_axis, drawing_y_axis)
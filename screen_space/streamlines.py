@@ -1,17 +1,311 @@
 from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 import math
-import random
 import numpy as np
 
-from .grid import PixelDataGrid
-from .point_registry import PointRegistry
+from .budget import Budget
+from .grid import GridValue, GridValues, PixelDataGrid
+from .point_registry import PointRegistry, create_point_registry
+from .polylines import Polylines, pixels_to_drawing_positions
+from .random_streams import RandomSeed, python_random
+from .statistics import GeneratorStatistics, count_rejections, timed
+from .tiling import Tile, TileLayout
 
 
 def d_sep_from_luminance(d_sep_max: float, d_sep_shadow_factor: float, gamma_luminance: float, luminance: float) -> float:
     d_sep_min = d_sep_max * d_sep_shadow_factor
     return d_sep_min + (d_sep_max - d_sep_min) * math.pow(luminance, gamma_luminance)
 
-def flow_field_streamline(
+def d_sep_from_luminances(d_sep_max: float, d_sep_shadow_factor: float, gamma_luminance: float, luminances: np.ndarray) -> np.ndarray:
+    d_sep_min = d_sep_max * d_sep_shadow_factor
+    return d_sep_min + (d_sep_max - d_sep_min) * np.power(luminances, gamma_luminance)
+
+def add_hatching_planes(grid: PixelDataGrid, d_sep_max: float, d_sep_shadow_factor: float, gamma_luminance: float):
+    """
+    Precompute the plane "d_sep" on the grid, premultiplied by coverage.
+
+    Looked up with normalized_plane_value() it weights the pixels like grid_value() weights the
+    luminance, so the separation matches the one from the interpolated luminance, exactly for
+    gamma_luminance 1. The coverage, depth step and luminance tests are those of the default path.
+    """
+    coverage = grid.pixels[:, 0].reshape(grid.height, grid.width)
+    luminance = grid.normalized_channel(1)
+    grid.add_plane("d_sep", coverage * d_sep_from_luminances(d_sep_max, d_sep_shadow_factor, gamma_luminance, luminance))
+
+def _step_test_distance(
+    grid: PixelDataGrid,
+    point_registry: PointRegistry,
+    p_new: tuple[float, float],
+    gv: GridValue,
+    depth_difference: float,
+    d_sep_max: float,
+    d_sep_shadow_factor: float,
+    gamma_luminance: float,
+    d_test_factor: float,
+    max_depth_step: float,
+    max_hatched_luminance: float,
+    use_precomputed_planes: bool,
+    own_entity_id: int
+) -> float | None:
+    """Test distance d_test_factor * d_sep at p_new, or None if the streamline must not continue there."""
+    if use_precomputed_planes:
+        d_sep = grid.normalized_plane_value("d_sep", p_new[0], p_new[1], gv.coverage)
+    else:
+        d_sep = d_sep_from_luminance(d_sep_max, d_sep_shadow_factor, gamma_luminance, gv.luminance)
+    d_sep_l = d_test_factor * d_sep
+    if (not gv.is_covered() or
+        depth_difference > max_depth_step or
+        gv.luminance > max_hatched_luminance or
+        not point_registry.is_point_allowed(p_new, d_sep_l, 0.0 if own_entity_id else d_sep_l, own_entity_id)):
+        return None
+    return d_sep_l
+
+def _stop_reason(
+    gv: GridValue,
+    new_accum_angle: float,
+    accum_limit: float,
+    depth_difference: float,
+    max_depth_step: float,
+    max_hatched_luminance: float
+) -> str:
+    """Which test stopped a streamline at p_new, in the order of the tests; only used for statistics."""
+    if new_accum_angle > accum_limit:
+        return "angle"
+    if not gv.is_covered():
+        return "uncovered"
+    if depth_difference > max_depth_step:
+        return "depth_step"
+    if gv.luminance > max_hatched_luminance:
+        return "luminance"
+    return "proximity"
+
+def continue_streamline(
+    grid: PixelDataGrid,
+    point_registry: PointRegistry,
+    lp0: tuple[float, float],
+    direction0: tuple[float, float],
+    depth0: float,
+    step: float,
+    accum_limit: float,
+    step_count: int,
+    d_sep_max: float,
+    d_sep_shadow_factor: float,
+    gamma_luminance: float,
+    d_test_factor: float,
+    max_depth_step: float,
+    max_hatched_luminance: float,
+    use_precomputed_planes: bool = False,
+    bounds: tuple[float, float, float, float] | None = None,
+    own_entity_id: int = 0,
+    integrator: str = "EULER",
+    max_step_error: float = 0.05,
+    statistics: GeneratorStatistics | None = None
+) -> tuple[list[tuple[float, float]], float, tuple[float, float] | None]:
+    """
+    Integrate a streamline from lp0 (excluded) for at most step_count steps.
+
+    Returns the new points, the accumulated angle of the accepted steps and, if integration left
+    bounds (x_min, y_min, x_max, y_max), the first point outside. Points of own_entity_id in the
+    registry are ignored, so that a registered line can be continued.
+
+    The "EULER" integrator takes fixed steps of length |step|. "RK2" and "RK4" adapt the step length
+    between |step| and the local test distance to keep the estimated position error of each step
+    below max_step_error pixels; see _continue_streamline_adaptive().
+
+    With statistics, grid samples and the reason for stopping are counted once the loop ends.
+    """
+    if integrator != "EULER":
+        return _continue_streamline_adaptive(
+            grid, point_registry, lp0, direction0, depth0, step, accum_limit, step_count,
+            d_sep_max, d_sep_shadow_factor, gamma_luminance, d_test_factor, max_depth_step, max_hatched_luminance,
+            use_precomputed_planes, bounds, own_entity_id, integrator, max_step_error, statistics
+        )
+
+    line: list[tuple[float, float]] = []
+    lp_last = lp0
+    next_dir = direction0
+    last_depth = depth0
+    accum_angle = 0.0
+    exit_point = None
+
+    for _ in range(step_count):
+        p_new = (
+            lp_last[0] + next_dir[0] * step,
+            lp_last[1] + next_dir[1] * step
+        )
+        if bounds is not None and not (bounds[0] <= p_new[0] < bounds[2] and bounds[1] <= p_new[1] < bounds[3]):
+            exit_point = p_new
+            if statistics is not None:
+                statistics.grid_samples += len(line)
+                statistics.terminations["border"] += 1
+            break
+        gv = grid.grid_value(p_new[0], p_new[1])
+        new_dir = gv.direction
+        dot = max(-1.0, min(1.0, next_dir[0]*new_dir[0] + next_dir[1]*new_dir[1]))
+        new_accum_angle = accum_angle + math.acos(dot)
+        if new_accum_angle > accum_limit or _step_test_distance(
+            grid, point_registry, p_new, gv, abs(gv.depth - last_depth),
+            d_sep_max, d_sep_shadow_factor, gamma_luminance, d_test_factor, max_depth_step, max_hatched_luminance,
+            use_precomputed_planes, own_entity_id
+        ) is None:
+            if statistics is not None:
+                statistics.grid_samples += len(line) + 1
+                statistics.terminations[_stop_reason(
+                    gv, new_accum_angle, accum_limit, abs(gv.depth - last_depth), max_depth_step, max_hatched_luminance
+                )] += 1
+            break
+
+        line.append(p_new)
+        accum_angle = new_accum_angle
+        lp_last = p_new
+        next_dir = gv.direction
+        last_depth = gv.depth
+    else:
+        if statistics is not None:
+            statistics.grid_samples += len(line)
+            statistics.terminations["max_steps"] += 1
+    return line, accum_angle, exit_point
+
+def _continue_streamline_adaptive(
+    grid: PixelDataGrid,
+    point_registry: PointRegistry,
+    lp0: tuple[float, float],
+    direction0: tuple[float, float],
+    depth0: float,
+    step: float,
+    accum_limit: float,
+    step_count: int,
+    d_sep_max: float,
+    d_sep_shadow_factor: float,
+    gamma_luminance: float,
+    d_test_factor: float,
+    max_depth_step: float,
+    max_hatched_luminance: float,
+    use_precomputed_planes: bool,
+    bounds: tuple[float, float, float, float] | None,
+    own_entity_id: int,
+    integrator: str,
+    max_step_error: float,
+    statistics: GeneratorStatistics | None = None
+) -> tuple[list[tuple[float, float]], float, tuple[float, float] | None]:
+    """
+    Runge-Kutta counterpart of the Euler loop in continue_streamline() with adaptive step length.
+
+    "RK2" is Heun's method with the Euler step as error estimate, "RK4" the classic fourth-order
+    method with the midpoint step as error estimate. A step whose estimate exceeds max_step_error is
+    retried with a shorter length, down to |step|; after an accepted step the length grows again,
+    up to the test distance at the new point so that the registry test cannot skip over other lines.
+
+    Step lengths count against step_count in units of |step|, and the depth difference allowed per
+    step scales with its length, so the criteria match the Euler integrator per unit of length.
+    """
+    if integrator not in ("RK2", "RK4"):
+        raise ValueError(f"Unknown streamline integrator '{integrator}'")
+    min_length = abs(step)
+    sign = 1.0 if step >= 0.0 else -1.0
+    error_exponent = 0.5 if integrator == "RK2" else 1.0 / 3.0
+
+    def direction_at(p: tuple[float, float]) -> tuple[float, float]:
+        if statistics is not None:
+            statistics.grid_samples += 1
+        direction = grid.grid_value(p[0], p[1]).direction
+        return (sign * direction[0], sign * direction[1])
+
+    line: list[tuple[float, float]] = []
+    lp_last = lp0
+    next_dir = direction0
+    last_depth = depth0
+    accum_angle = 0.0
+    exit_point = None
+    steps_taken = 0.0
+    max_length = min_length
+    length = min_length
+
+    while steps_taken < step_count:
+        # Never overshoot the remaining budget
+        length = max(min(length, max_length, (step_count - steps_taken) * min_length), min_length)
+        k1 = (sign * next_dir[0], sign * next_dir[1])
+        while True:
+            if integrator == "RK2":
+                k2 = direction_at((lp_last[0] + length * k1[0], lp_last[1] + length * k1[1]))
+                dx = 0.5 * (k1[0] + k2[0])
+                dy = 0.5 * (k1[1] + k2[1])
+                # Difference to the Euler step
+                error = length * math.hypot(dx - k1[0], dy - k1[1])
+            else:
+                k2 = direction_at((lp_last[0] + 0.5 * length * k1[0], lp_last[1] + 0.5 * length * k1[1]))
+                k3 = direction_at((lp_last[0] + 0.5 * length * k2[0], lp_last[1] + 0.5 * length * k2[1]))
+                k4 = direction_at((lp_last[0] + length * k3[0], lp_last[1] + length * k3[1]))
+                dx = (k1[0] + 2.0 * k2[0] + 2.0 * k3[0] + k4[0]) / 6.0
+                dy = (k1[1] + 2.0 * k2[1] + 2.0 * k3[1] + k4[1]) / 6.0
+                # Difference to the midpoint step
+                error = length * math.hypot(dx - k2[0], dy - k2[1])
+            if error <= max_step_error or length <= min_length:
+                break
+            length = max(length * max(0.2, 0.9 * (max_step_error / error)**error_exponent), min_length)
+
+        p_new = (lp_last[0] + length * dx, lp_last[1] + length * dy)
+        if bounds is not None and not (bounds[0] <= p_new[0] < bounds[2] and bounds[1] <= p_new[1] < bounds[3]):
+            exit_point = p_new
+            if statistics is not None:
+                statistics.terminations["border"] += 1
+            break
+        if statistics is not None:
+            statistics.grid_samples += 1
+        gv = grid.grid_value(p_new[0], p_new[1])
+        new_dir = gv.direction
+        dot = max(-1.0, min(1.0, next_dir[0]*new_dir[0] + next_dir[1]*new_dir[1]))
+        new_accum_angle = accum_angle + math.acos(dot)
+        depth_difference = abs(gv.depth - last_depth) * min_length / length
+        d_sep_l = None
+        if new_accum_angle <= accum_limit and depth_difference <= max_depth_step:
+            d_sep_l = _step_test_distance(
+                grid, point_registry, p_new, gv, depth_difference,
+                d_sep_max, d_sep_shadow_factor, gamma_luminance, d_test_factor, max_depth_step, max_hatched_luminance,
+                use_precomputed_planes, own_entity_id
+            )
+        if d_sep_l is None:
+            if statistics is not None:
+                statistics.terminations[_stop_reason(
+                    gv, new_accum_angle, accum_limit, depth_difference, max_depth_step, max_hatched_luminance
+                )] += 1
+            break
+
+        line.append(p_new)
+        accum_angle = new_accum_angle
+        lp_last = p_new
+        next_dir = gv.direction
+        last_depth = gv.depth
+        steps_taken += length / min_length
+        max_length = max(d_sep_l, min_length)
+        length *= 2.0 if error == 0.0 else min(2.0, 0.9 * (max_step_error / error)**error_exponent)
+    else:
+        if statistics is not None:
+            statistics.terminations["max_steps"] += 1
+    return line, accum_angle, exit_point
+
+def _step_count(points: list[tuple[float, float]], step: float, integrator: str) -> int:
+    """Number of steps of length |step| along the points, counted like the steps of the integrator."""
+    if integrator == "EULER" or len(points) < 2:
+        return max(len(points) - 1, 0)
+    segments = np.diff(np.array(points, dtype=np.float64), axis=0)
+    return int(math.ceil(np.hypot(segments[:, 0], segments[:, 1]).sum() / abs(step) - 1.0e-6))
+
+@dataclass
+class _OpenEnd:
+    """End of a streamline whose integration stopped at a tile border."""
+    exit_point: tuple[float, float]
+    accum_angle: float
+    step_count: int
+
+@dataclass
+class _TracedStreamline:
+    points: list[tuple[float, float]]
+    forward_end: _OpenEnd | None = None
+    backward_end: _OpenEnd | None = None
+
+def _trace_streamline(
     grid: PixelDataGrid,
     point_registry: PointRegistry,
     start_from_streamline_id: int,
@@ -26,69 +320,418 @@ def flow_field_streamline(
     max_hatched_luminance: float,
     max_steps: int,
     min_steps: int,
-) -> list[tuple[float, float]] | None:
-    gv_start = grid.grid_value(p_start[0], p_start[1])
+    gv_start: GridValue | None = None,
+    use_precomputed_planes: bool = False,
+    bounds: tuple[float, float, float, float] | None = None,
+    integrator: str = "EULER",
+    max_step_error: float = 0.05,
+    statistics: GeneratorStatistics | None = None
+) -> _TracedStreamline | None:
+    if bounds is not None and not (bounds[0] <= p_start[0] < bounds[2] and bounds[1] <= p_start[1] < bounds[3]):
+        if statistics is not None:
+            statistics.rejections["outside_tile"] += 1
+        return None
+    if gv_start is None:
+        if statistics is not None:
+            statistics.grid_samples += 1
+        gv_start = grid.grid_value(p_start[0], p_start[1])
     if gv_start is None or not gv_start.is_covered() or gv_start.luminance > max_hatched_luminance:
+        if statistics is not None:
+            statistics.rejections["uncovered" if gv_start is None or not gv_start.is_covered() else "luminance"] += 1
         return None
 
-    d_sep_start = d_sep_from_luminance(d_sep_max, d_sep_shadow_factor, gamma_luminance, gv_start.luminance)
+    if use_precomputed_planes:
+        d_sep_start = grid.normalized_plane_value("d_sep", p_start[0], p_start[1], gv_start.coverage)
+    else:
+        d_sep_start = d_sep_from_luminance(d_sep_max, d_sep_shadow_factor, gamma_luminance, gv_start.luminance)
     if not point_registry.is_point_allowed(
         p_start, d_sep_start, d_test_factor * d_sep_start, start_from_streamline_id
     ):
+        if statistics is not None:
+            statistics.rejections["proximity"] += 1
         return None
 
-    def continue_line(
-        lp0: tuple[float, float],
-        direction0: tuple[float, float],
-        depth0: float,
-        step: float,
-        accum_limit: float,
-        step_count: int
-    ) -> list[tuple[float, float]]:
-        line: list[tuple[float, float]] = []
-        lp_last = lp0
-        next_dir = direction0
-        last_depth = depth0
-        accum_angle = 0.0
-
-        for _ in range(step_count):
-            p_new = (
-                lp_last[0] + next_dir[0] * step,
-                lp_last[1] + next_dir[1] * step
-            )
-            gv = grid.grid_value(p_new[0], p_new[1])
-            new_dir = gv.direction
-            dot = max(-1.0, min(1.0, next_dir[0]*new_dir[0] + next_dir[1]*new_dir[1]))
-            accum_angle += math.acos(dot)
-            d_sep = d_sep_from_luminance(d_sep_max, d_sep_shadow_factor, gamma_luminance, gv.luminance)
-            d_sep_l = d_test_factor * d_sep
-            if (not gv.is_covered() or
-                accum_angle > accum_limit or
-                abs(gv.depth - last_depth) > max_depth_step or
-                gv.luminance > max_hatched_luminance or
-                not point_registry.is_point_allowed(p_new, d_sep_l, d_sep_l, 0)):
-                break
-
-            line.append(p_new)
-            lp_last = p_new
-            next_dir = gv.direction
-            last_depth = gv.depth
-        return line
-
-    gv_start = grid.grid_value(p_start[0], p_start[1])
+    def continue_line(step: float) -> tuple[list[tuple[float, float]], _OpenEnd | None]:
+        line, accum_angle, exit_point = continue_streamline(
+            grid, point_registry, p_start, gv_start.direction, gv_start.depth,
+            step, 0.5 * max_accum_angle, max_steps // 2,
+            d_sep_max, d_sep_shadow_factor, gamma_luminance, d_test_factor, max_depth_step, max_hatched_luminance,
+            use_precomputed_planes, bounds, integrator=integrator, max_step_error=max_step_error, statistics=statistics
+        )
+        if exit_point is None:
+            return line, None
+        return line, _OpenEnd(exit_point, accum_angle, _step_count([p_start] + line, step, integrator))
 
     # forward and backward
-    fwd = continue_line(p_start, gv_start.direction, gv_start.depth,
-                        d_step, 0.5 * max_accum_angle, max_steps // 2)
-    bwd = continue_line(p_start, gv_start.direction, gv_start.depth,
-                        -d_step, 0.5 * max_accum_angle, max_steps // 2)
+    fwd, fwd_end = continue_line(d_step)
+    bwd, bwd_end = continue_line(-d_step)
     # combine
     line = list(reversed(bwd)) + [p_start] + fwd
-    return line if len(line) > (min_steps + 1) else None
+    # Lines cut at a tile border may still grow beyond min_steps
+    if _step_count(line, d_step, integrator) > min_steps or fwd_end is not None or bwd_end is not None:
+        return _TracedStreamline(line, fwd_end, bwd_end)
+    if statistics is not None:
+        statistics.rejections["min_steps"] += 1
+    return None
+
+def flow_field_streamline(
+    grid: PixelDataGrid,
+    point_registry: PointRegistry,
+    start_from_streamline_id: int,
+    p_start: tuple[float, float],
+    d_sep_max: float,
+    d_sep_shadow_factor: float,
+    gamma_luminance: float,
+    d_test_factor: float,
+    d_step: float,
+    max_depth_step: float,
+    max_accum_angle: float,
+    max_hatched_luminance: float,
+    max_steps: int,
+    min_steps: int,
+    gv_start: GridValue | None = None,
+    use_precomputed_planes: bool = False,
+    integrator: str = "EULER",
+    max_step_error: float = 0.05
+) -> list[tuple[float, float]] | None:
+    traced = _trace_streamline(
+        grid, point_registry, start_from_streamline_id, p_start,
+        d_sep_max, d_sep_shadow_factor, gamma_luminance, d_test_factor, d_step, max_depth_step,
+        max_accum_angle, max_hatched_luminance, max_steps, min_steps,
+        gv_start, use_precomputed_planes, integrator=integrator, max_step_error=max_step_error
+    )
+    return None if traced is None else traced.points
+
+# Reasons for stopping a wavefront lane, indexed by the codes _integrate_wavefront() records
+_STOP_REASONS = ("max_steps", "border", "angle", "uncovered", "depth_step", "luminance", "proximity")
+
+# Start points integrated in lockstep at once. Most starts next to a line are blocked by the first
+# line traced from them, so small batches let the registry prune the pending starts in between
+_WAVEFRONT_STARTS = 64
+
+# Steps between the tests of the lanes against the registry as it was when the batch started
+_WAVEFRONT_PRUNE_STEPS = 4
+
+def _integrate_wavefront(
+    grid: PixelDataGrid,
+    registry: PointRegistry,
+    xs: np.ndarray,
+    ys: np.ndarray,
+    start_values: GridValues,
+    d_sep_max: float,
+    d_sep_shadow_factor: float,
+    gamma_luminance: float,
+    d_test_factor: float,
+    d_step: float,
+    max_depth_step: float,
+    max_accum_angle: float,
+    max_hatched_luminance: float,
+    max_steps: int,
+    use_precomputed_planes: bool,
+    bounds: tuple[float, float, float, float] | None,
+    statistics: GeneratorStatistics | None = None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray | None]:
+    """
+    Integrate the forward and backward halves of streamlines from all start points in lockstep,
+    with the same stopping criteria as continue_streamline(). The registry is only tested at the
+    first step and every _WAVEFRONT_PRUNE_STEPS steps after, so a lane may run a few steps past a
+    rejected point and a line accepted from a lane must still be cut where the registry rejects it.
+
+    Half i < n runs forward from start i, half n + i backward. Returns the (steps, 2n, 2) points and
+    (steps, 2n) test distances d_test_factor * d_sep per step, the step counts, the accumulated angles,
+    the (2n, 2) exit points, which are NaN unless the half left bounds, and with statistics the codes
+    of the reasons why the halves stopped, indexing _STOP_REASONS.
+    """
+    n = xs.shape[0]
+    step_count = max_steps // 2
+    accum_limit = 0.5 * max_accum_angle
+    steps = np.concatenate((np.full(n, d_step), np.full(n, -d_step)))
+    positions = np.tile(np.stack((xs, ys), axis=-1), (2, 1))
+    directions = np.tile(np.stack((start_values.direction_cos, start_values.direction_sin), axis=-1).astype(np.float64), (2, 1))
+    last_depths = np.tile(start_values.depth.astype(np.float64), 2)
+    accum_angles = np.zeros(2 * n, dtype=np.float64)
+    counts = np.zeros(2 * n, dtype=np.int64)
+    exit_points = np.full((2 * n, 2), np.nan)
+    points = np.empty((step_count, 2 * n, 2), dtype=np.float64)
+    test_distances = np.empty((step_count, 2 * n), dtype=np.float64)
+    stop_codes = None if statistics is None else np.zeros(2 * n, dtype=np.int8)
+
+    active = np.arange(2 * n)
+    for k in range(step_count):
+        if active.size == 0:
+            break
+        px = positions[active, 0] + directions[active, 0] * steps[active]
+        py = positions[active, 1] + directions[active, 1] * steps[active]
+        if bounds is not None:
+            inside = (px >= bounds[0]) & (px < bounds[2]) & (py >= bounds[1]) & (py < bounds[3])
+            exit_points[active[~inside]] = np.stack((px[~inside], py[~inside]), axis=-1)
+            if statistics is not None:
+                stop_codes[active[~inside]] = 1
+            active, px, py = active[inside], px[inside], py[inside]
+
+        gvs = grid.grid_values(px, py)
+        dots = np.clip(directions[active, 0] * gvs.direction_cos + directions[active, 1] * gvs.direction_sin, -1.0, 1.0)
+        new_accum_angles = accum_angles[active] + np.arccos(dots)
+        if use_precomputed_planes:
+            d_sep_ls = d_test_factor * grid.normalized_plane_values("d_sep", px, py, gvs.coverage)
+        else:
+            d_sep_ls = d_test_factor * d_sep_from_luminances(d_sep_max, d_sep_shadow_factor, gamma_luminance, gvs.luminance)
+        is_continued = (
+            gvs.covered &
+            (new_accum_angles <= accum_limit) &
+            (np.abs(gvs.depth - last_depths[active]) <= max_depth_step) &
+            (gvs.luminance <= max_hatched_luminance)
+        )
+
+        if statistics is not None:
+            statistics.grid_samples += px.shape[0]
+            stopped = ~is_continued
+            # Same order of tests as _stop_reason()
+            conditions = [new_accum_angles > accum_limit, ~gvs.covered, np.abs(gvs.depth - last_depths[active]) > max_depth_step]
+            stop_codes[active[stopped]] = np.select(conditions, [2, 3, 4], 5)[stopped]
+
+        if k % _WAVEFRONT_PRUNE_STEPS == 0:
+            # The registry only grows, so a point it rejects now is rejected by the final cut as well
+            for j in np.flatnonzero(is_continued).tolist():
+                d_sep_l = float(d_sep_ls[j])
+                if not registry.is_point_allowed((float(px[j]), float(py[j])), d_sep_l, d_sep_l, 0):
+                    is_continued[j] = False
+                    if statistics is not None:
+                        stop_codes[active[j]] = 6
+
+        active = active[is_continued]
+        points[k, active, 0] = px[is_continued]
+        points[k, active, 1] = py[is_continued]
+        test_distances[k, active] = d_sep_ls[is_continued]
+        positions[active, 0] = px[is_continued]
+        positions[active, 1] = py[is_continued]
+        directions[active, 0] = gvs.direction_cos[is_continued]
+        directions[active, 1] = gvs.direction_sin[is_continued]
+        last_depths[active] = gvs.depth[is_continued]
+        accum_angles[active] = new_accum_angles[is_continued]
+        counts[active] += 1
+
+    return points, test_distances, counts, accum_angles, exit_points, stop_codes
+
+def _wavefront_streamlines(
+    grid: PixelDataGrid,
+    registry: PointRegistry,
+    xs: np.ndarray,
+    ys: np.ndarray,
+    start_values: GridValues,
+    start_from_streamline_id: int,
+    parameters: dict,
+    use_precomputed_planes: bool,
+    bounds: tuple[float, float, float, float] | None,
+    statistics: GeneratorStatistics | None = None
+):
+    """
+    Generate the streamlines that _trace_streamline() would accept from the start points in order,
+    assuming that every yielded line is added to the registry before the next one is requested.
+
+    The start points are taken in batches of _WAVEFRONT_STARTS that the registry still allows, each
+    batch is integrated in lockstep by _integrate_wavefront(), and a serial pass then repeats the
+    start test and cuts each half at its first point rejected by the registry. The registry only
+    grows, so this yields the same lines as tracing the start points one by one.
+    """
+    d_test_factor = parameters["d_test_factor"]
+
+    if use_precomputed_planes:
+        d_sep_starts = grid.normalized_plane_values("d_sep", xs, ys, start_values.coverage)
+    else:
+        d_sep_starts = d_sep_from_luminances(
+            parameters["d_sep_max"], parameters["d_sep_shadow_factor"], parameters["gamma_luminance"], start_values.luminance
+        )
+    is_start = start_values.covered & (start_values.luminance <= parameters["max_hatched_luminance"])
+    if statistics is not None:
+        count_rejections(statistics, "uncovered", ~start_values.covered)
+        count_rejections(statistics, "luminance", start_values.covered & ~is_start)
+    if bounds is not None:
+        is_inside = (xs >= bounds[0]) & (xs < bounds[2]) & (ys >= bounds[1]) & (ys < bounds[3])
+        if statistics is not None:
+            count_rejections(statistics, "outside_tile", is_start & ~is_inside)
+        is_start &= is_inside
+
+    batch: list[int] = []
+    candidates = np.flatnonzero(is_start).tolist()
+    for position, i in enumerate(candidates):
+        # Lines accepted from earlier batches may already block the start
+        d_sep_start = float(d_sep_starts[i])
+        if registry.is_point_allowed((float(xs[i]), float(ys[i])), d_sep_start, d_test_factor * d_sep_start, start_from_streamline_id):
+            batch.append(i)
+        elif statistics is not None:
+            statistics.rejections["proximity"] += 1
+        if batch and (len(batch) == _WAVEFRONT_STARTS or position == len(candidates) - 1):
+            indices = np.array(batch, dtype=np.intp)
+            batch = []
+            yield from _wavefront_chunk(
+                grid, registry, xs[indices], ys[indices], d_sep_starts[indices], _select_grid_values(start_values, indices),
+                start_from_streamline_id, parameters, use_precomputed_planes, bounds, statistics
+            )
+
+def _select_grid_values(values: GridValues, indices: np.ndarray) -> GridValues:
+    return GridValues(
+        values.coverage[indices],
+        values.luminance[indices],
+        values.depth[indices],
+        values.direction_cos[indices],
+        values.direction_sin[indices],
+        values.covered[indices]
+    )
+
+def _wavefront_chunk(
+    grid: PixelDataGrid,
+    registry: PointRegistry,
+    xs: np.ndarray,
+    ys: np.ndarray,
+    d_sep_starts: np.ndarray,
+    start_values: GridValues,
+    start_from_streamline_id: int,
+    parameters: dict,
+    use_precomputed_planes: bool,
+    bounds: tuple[float, float, float, float] | None,
+    statistics: GeneratorStatistics | None
+):
+    """Integrate one batch of start points in lockstep and yield its lines for _wavefront_streamlines()."""
+    d_test_factor = parameters["d_test_factor"]
+    min_steps = parameters["min_steps"]
+    n = xs.shape[0]
+
+    points, test_distances, counts, accum_angles, exit_points, stop_codes = _integrate_wavefront(
+        grid, registry, xs, ys, start_values,
+        parameters["d_sep_max"], parameters["d_sep_shadow_factor"], parameters["gamma_luminance"], d_test_factor,
+        parameters["d_step"], parameters["max_depth_step"], parameters["max_accum_angle"],
+        parameters["max_hatched_luminance"], parameters["max_steps"], use_precomputed_planes, bounds, statistics
+    )
+
+    def accepted_half(lane: int) -> tuple[np.ndarray, _OpenEnd | None]:
+        count = int(counts[lane])
+        half = points[:count, lane]
+        end = None
+        if not np.isnan(exit_points[lane, 0]):
+            end = _OpenEnd((float(exit_points[lane, 0]), float(exit_points[lane, 1])), float(accum_angles[lane]), count)
+        if count > 0:
+            d_sep_ls = test_distances[:count, lane]
+            is_allowed = registry.are_points_allowed(half[:, 0], half[:, 1], d_sep_ls, d_sep_ls, 0)
+            if not is_allowed.all():
+                half = half[:int(np.argmin(is_allowed))]
+                end = None
+                if statistics is not None:
+                    statistics.terminations["proximity"] += 1
+                return half, end
+        if statistics is not None:
+            statistics.terminations[_STOP_REASONS[stop_codes[lane]]] += 1
+        return half, end
+
+    for i in range(n):
+        p_start = (float(xs[i]), float(ys[i]))
+        d_sep_start = float(d_sep_starts[i])
+        if not registry.is_point_allowed(p_start, d_sep_start, d_test_factor * d_sep_start, start_from_streamline_id):
+            if statistics is not None:
+                statistics.rejections["proximity"] += 1
+            continue
+        fwd, fwd_end = accepted_half(i)
+        bwd, bwd_end = accepted_half(n + i)
+        line = list(map(tuple, bwd[::-1].tolist())) + [p_start] + list(map(tuple, fwd.tolist()))
+        if len(line) > (min_steps + 1) or fwd_end is not None or bwd_end is not None:
+            yield _TracedStreamline(line, fwd_end, bwd_end)
+        elif statistics is not None:
+            statistics.rejections["min_steps"] += 1
+
+def _grow_streamlines(
+    grid: PixelDataGrid,
+    registry: PointRegistry,
+    seeds: list[tuple[float, float]],
+    queue: deque,
+    parameters: dict,
+    use_precomputed_planes: bool,
+    bounds: tuple[float, float, float, float] | None = None,
+    wavefront: bool = False,
+    budget: Budget | None = None,
+    statistics: GeneratorStatistics | None = None
+) -> list[_TracedStreamline]:
+    """
+    Trace streamlines from the seeds, then grow new ones next to every line in the queue of
+    (entity id, points) and next to every new line, in breadth-first order. With wavefront,
+    the start points of each batch are integrated together by _wavefront_streamlines().
+    Growth stops early once the budget is exhausted.
+    """
+    d_sep_max = parameters["d_sep_max"]
+    d_sep_shadow_factor = parameters["d_sep_shadow_factor"]
+    gamma_luminance = parameters["gamma_luminance"]
+    streamlines: list[_TracedStreamline] = []
+
+    def is_exhausted() -> bool:
+        return budget is not None and budget.is_exhausted()
+
+    def accept(traced: _TracedStreamline):
+        if budget is not None:
+            budget.add_points(len(traced.points))
+        sid = registry.add_points(traced.points)
+        queue.append((sid, np.array(traced.points, dtype=np.float64)))
+        streamlines.append(traced)
+
+    def trace_batch(xs: np.ndarray, ys: np.ndarray, start_from_streamline_id: int):
+        start_values = grid.grid_values(xs, ys)
+        if statistics is not None:
+            statistics.grid_samples += xs.shape[0]
+        if wavefront:
+            for traced in _wavefront_streamlines(
+                grid, registry, xs, ys, start_values, start_from_streamline_id, parameters, use_precomputed_planes, bounds,
+                statistics
+            ):
+                if is_exhausted():
+                    return
+                accept(traced)
+            return
+        for i, p_start in enumerate(zip(xs.tolist(), ys.tolist())):
+            if is_exhausted():
+                return
+            traced = _trace_streamline(
+                grid,
+                registry,
+                start_from_streamline_id=start_from_streamline_id,
+                p_start=p_start,
+                gv_start=start_values[i],
+                use_precomputed_planes=use_precomputed_planes,
+                bounds=bounds,
+                statistics=statistics,
+                **parameters
+            )
+            if traced is not None:
+                accept(traced)
+
+    # Seeds go first, lines already in the queue are grown from afterwards
+    if seeds:
+        with timed(statistics, "seeding"):
+            seed_points = np.array(seeds, dtype=np.float64)
+            trace_batch(seed_points[:, 0], seed_points[:, 1], 0)
+
+    # Grow from queue
+    with timed(statistics, "growth"):
+        while queue and not is_exhausted():
+            sid, line = queue.popleft()
+            gvs = grid.grid_values(line[:, 0], line[:, 1])
+            if statistics is not None:
+                statistics.grid_samples += line.shape[0]
+            if use_precomputed_planes:
+                d_seps = grid.normalized_plane_values("d_sep", line[:, 0], line[:, 1], gvs.coverage)
+            else:
+                d_seps = d_sep_from_luminances(d_sep_max, d_sep_shadow_factor, gamma_luminance, gvs.luminance)
+
+            # New seeds to both sides of every point, in the order (point, sign)
+            seed_xs = np.empty(2 * line.shape[0], dtype=np.float64)
+            seed_ys = np.empty(2 * line.shape[0], dtype=np.float64)
+            for k, sign in enumerate((-1.0, 1.0)):
+                seed_xs[k::2] = line[:, 0] - gvs.direction_sin * sign * d_seps
+                seed_ys[k::2] = line[:, 1] + gvs.direction_cos * sign * d_seps
+            trace_batch(seed_xs, seed_ys, sid)
+
+    return streamlines
 
 def flow_field_streamlines(
     grid: PixelDataGrid,
-    rng_seed: int,
+    rng_seed: RandomSeed,
     seed_box_size: int,
     d_sep_max: float,
     d_sep_shadow_factor: float,
@@ -99,80 +742,342 @@ def flow_field_streamlines(
     max_accum_angle: float,
     max_hatched_luminance: float,
     max_steps: int,
-    min_steps: int
-) -> list[list[tuple[float, float]]]:
+    min_steps: int,
+    use_precomputed_planes: bool = False,
+    registry_type: str = "GRID",
+    wavefront: bool = False,
+    workers: int = 1,
+    tile_size: int = 512,
+    integrator: str = "EULER",
+    max_step_error: float = 0.05,
+    budget: Budget | None = None,
+    statistics: GeneratorStatistics | None = None
+) -> Polylines:
+    """
+    Trace evenly spaced streamlines through the direction field of the grid.
+
+    rng_seed is an integer, a seed sequence or a NumPy generator; no global random state is used.
+
+    With wavefront, the streamlines started from each batch of seeds (the initial seeds, or the
+    seeds next to one line) are integrated in lockstep with vectorized grid lookups, and registry
+    tests happen once per batch and once per finished line instead of once per step. This yields
+    the same lines as the step-by-step integration up to floating-point rounding. It requires the
+    "EULER" integrator.
+
+    The "RK2" and "RK4" integrators take steps between d_step and the local test distance, keeping
+    the estimated error of each step below max_step_error pixels; max_steps and min_steps then
+    count line length in units of d_step. See continue_streamline().
+
+    With a budget, the seeds are visited darkest first, so that a run cut short by its time or point
+    limit has already hatched the most important regions; budget.truncated then tells whether it was.
+
+    With statistics, grid samples, registry queries, rejected start points and the reasons why lines
+    stopped are counted, and the seeding and growth phases timed; see GeneratorStatistics.
+
+    With workers > 1, the grid is split into tiles of tile_size pixels that are hatched phase by
+    phase in a process pool; see _tiled_streamlines. The result is deterministic for a given
+    rng_seed, but differs from the single-process result along the tile borders.
+    """
+    if wavefront and integrator != "EULER":
+        raise ValueError(f"Wavefront integration does not support the '{integrator}' integrator")
     width = grid.width
     height = grid.height
-    registry = PointRegistry(width, height, d_sep_max)
-    queue: deque = deque()
-    streamlines: list[list[tuple[float, float]]] = []
+    if use_precomputed_planes:
+        add_hatching_planes(grid, d_sep_max, d_sep_shadow_factor, gamma_luminance)
+    parameters = {
+        "d_sep_max": d_sep_max,
+        "d_sep_shadow_factor": d_sep_shadow_factor,
+        "gamma_luminance": gamma_luminance,
+        "d_test_factor": d_test_factor,
+        "d_step": d_step,
+        "max_depth_step": max_depth_step,
+        "max_accum_angle": max_accum_angle,
+        "max_hatched_luminance": max_hatched_luminance,
+        "max_steps": max_steps,
+        "min_steps": min_steps,
+        "integrator": integrator,
+        "max_step_error": max_step_error
+    }
 
-    random.seed(rng_seed)
+    random_source = python_random(rng_seed)
 
     # Seed points on a jittered grid
     cell_count_x = int(width / seed_box_size)
     cell_count_y = int(height / seed_box_size)
     cell_width = float(width) / float(cell_count_x)
     cell_height = float(height) / float(cell_count_y)
-    for iy in range(cell_count_y):
-        for ix in range(cell_count_x):
-            sx = cell_width * (ix + random.random())
-            sy = cell_height * (iy + random.random())
-            sl = flow_field_streamline(
-                grid,
-                registry,
-                start_from_streamline_id=0,
-                p_start=(sx,sy),
-                d_sep_max=d_sep_max,
-                d_sep_shadow_factor=d_sep_shadow_factor,
-                gamma_luminance=gamma_luminance,
-                d_test_factor=d_test_factor,
-                d_step=d_step,
-                max_depth_step=max_depth_step,
-                max_accum_angle=max_accum_angle,
-                max_hatched_luminance=max_hatched_luminance,
-                max_steps=max_steps,
-                min_steps=min_steps
+    seeds = [
+        (cell_width * (ix + random_source.random()), cell_height * (iy + random_source.random()))
+        for iy in range(cell_count_y) for ix in range(cell_count_x)
+    ]
+    if budget is not None and seeds:
+        seed_points = np.array(seeds, dtype=np.float64)
+        order = np.argsort(grid.grid_values(seed_points[:, 0], seed_points[:, 1]).luminance, kind="stable")
+        seeds = [seeds[i] for i in order.tolist()]
+
+    if workers > 1:
+        streamlines = _tiled_streamlines(
+            grid, seeds, parameters, use_precomputed_planes, registry_type, wavefront, workers, tile_size, budget, statistics
+        )
+        return Polylines.from_lines(streamlines)
+
+    registry = create_point_registry(
+        registry_type, width, height, d_sep_max, d_test_factor * d_sep_max * d_sep_shadow_factor, statistics
+    )
+    traced = _grow_streamlines(
+        grid, registry, seeds, deque(), parameters, use_precomputed_planes,
+        wavefront=wavefront, budget=budget, statistics=statistics
+    )
+    return Polylines.from_lines([t.points for t in traced])
+
+@dataclass
+class _HatchingTileTask:
+    pixels: np.ndarray # (height, width, 5) pixels of the halo region
+    origin: tuple[int, int] # halo region corner in grid coordinates
+    bounds: tuple[float, float, float, float] # tile box in local coordinates
+    seeds: list[tuple[float, float]] # local coordinates
+    halo_lines: list[np.ndarray] # points of earlier lines within the halo region, local coordinates
+    open_ends: list[tuple[int, tuple[float, float], float, _OpenEnd]] # (halo line, end point, step, state)
+    parameters: dict
+    use_precomputed_planes: bool
+    registry_type: str
+    wavefront: bool
+    budget: Budget | None # share of the overall budget for this tile
+    collect_statistics: bool
+
+@dataclass
+class _HatchingTileResult:
+    extensions: list[tuple[list[tuple[float, float]], _OpenEnd | None]] # per open end, grid coordinates
+    streamlines: list[_TracedStreamline] # grid coordinates
+    truncated: bool
+    statistics: GeneratorStatistics | None
+
+def _hatch_tile(task: _HatchingTileTask) -> _HatchingTileResult:
+    """Continue the open ends reaching into the tile, then hatch the tile itself."""
+    parameters = task.parameters
+    grid = PixelDataGrid(task.pixels)
+    if task.use_precomputed_planes:
+        add_hatching_planes(grid, parameters["d_sep_max"], parameters["d_sep_shadow_factor"], parameters["gamma_luminance"])
+    statistics = GeneratorStatistics() if task.collect_statistics else None
+    registry = create_point_registry(
+        task.registry_type, grid.width, grid.height, parameters["d_sep_max"],
+        parameters["d_test_factor"] * parameters["d_sep_max"] * parameters["d_sep_shadow_factor"], statistics
+    )
+    ox, oy = task.origin
+
+    def to_local(p: tuple[float, float]) -> tuple[float, float]:
+        return (p[0] - ox, p[1] - oy)
+
+    def to_global(points: list[tuple[float, float]]) -> list[tuple[float, float]]:
+        return [(x + ox, y + oy) for x, y in points]
+
+    def open_end_to_global(end: _OpenEnd | None) -> _OpenEnd | None:
+        return None if end is None else _OpenEnd(to_global([end.exit_point])[0], end.accum_angle, end.step_count)
+
+    queue: deque = deque()
+    halo_ids = []
+    for line in task.halo_lines:
+        sid = registry.add_points([(float(x), float(y)) for x, y in line.tolist()])
+        halo_ids.append(sid)
+        queue.append((sid, line))
+
+    extensions = []
+    for halo_index, end_point, step, end in task.open_ends:
+        if task.budget is not None and task.budget.is_exhausted():
+            extensions.append(([], None))
+            continue
+        p = to_local(end_point)
+        gv = grid.grid_value(p[0], p[1])
+        if statistics is not None:
+            statistics.grid_samples += 1
+        line, accum_angle, exit_point = continue_streamline(
+            grid, registry, p, gv.direction, gv.depth, step,
+            0.5 * parameters["max_accum_angle"] - end.accum_angle, parameters["max_steps"] // 2 - end.step_count,
+            parameters["d_sep_max"], parameters["d_sep_shadow_factor"], parameters["gamma_luminance"],
+            parameters["d_test_factor"], parameters["max_depth_step"], parameters["max_hatched_luminance"],
+            task.use_precomputed_planes, task.bounds, own_entity_id=halo_ids[halo_index],
+            integrator=parameters["integrator"], max_step_error=parameters["max_step_error"], statistics=statistics
+        )
+        if line:
+            queue.append((registry.add_points(line), np.array(line, dtype=np.float64)))
+            if task.budget is not None:
+                task.budget.add_points(len(line))
+        new_end = None
+        if exit_point is not None:
+            new_end = _OpenEnd(
+                exit_point, end.accum_angle + accum_angle,
+                end.step_count + _step_count([p] + line, step, parameters["integrator"])
             )
-            if sl is not None:
-                sid = registry.add_points(sl)
-                queue.append((sid, sl))
-                streamlines.append(sl)
+        extensions.append((to_global(line), open_end_to_global(new_end)))
 
-    # Grow from queue
-    while queue:
-        sid, sl = queue.popleft()
-        for lp in sl:
-            gv = grid.grid_value(lp[0], lp[1])
-            d_sep = d_sep_from_luminance(d_sep_max, d_sep_shadow_factor, gamma_luminance, gv.luminance)
-            for sign in (-1.0, 1.0):
-                dir = gv.direction
-                new_seed = (
-                    lp[0] - dir[1] * sign * d_sep,
-                    lp[1] + dir[0] * sign * d_sep
-                )
-                new_sl = flow_field_streamline(
-                    grid,
-                    registry,
-                    start_from_streamline_id=sid,
-                    p_start=new_seed,
-                    d_sep_max=d_sep_max,
-                    d_sep_shadow_factor=d_sep_shadow_factor,
-                    gamma_luminance=gamma_luminance,
-                    d_test_factor=d_test_factor,
-                    d_step=d_step,
-                    max_depth_step=max_depth_step,
-                    max_accum_angle=max_accum_angle,
-                    max_hatched_luminance=max_hatched_luminance,
-                    max_steps=max_steps,
-                    min_steps=min_steps
-                )
-                if new_sl:
-                    new_sid = registry.add_points(new_sl)
-                    queue.append((new_sid, new_sl))
-                    streamlines.append(new_sl)
+    streamlines = _grow_streamlines(
+        grid, registry, task.seeds, queue, parameters, task.use_precomputed_planes, task.bounds, task.wavefront, task.budget,
+        statistics
+    )
+    for sl in streamlines:
+        sl.points = to_global(sl.points)
+        sl.forward_end = open_end_to_global(sl.forward_end)
+        sl.backward_end = open_end_to_global(sl.backward_end)
+    return _HatchingTileResult(extensions, streamlines, task.budget is not None and task.budget.truncated, statistics)
 
-    return streamlines
+def _tiled_streamlines(
+    grid: PixelDataGrid,
+    seeds: list[tuple[float, float]],
+    parameters: dict,
+    use_precomputed_planes: bool,
+    registry_type: str,
+    wavefront: bool,
+    workers: int,
+    tile_size: int,
+    budget: Budget | None = None,
+    statistics: GeneratorStatistics | None = None
+) -> list[list[tuple[float, float]]]:
+    """
+    Hatch the grid tile by tile in 2x2 phases, with the tiles of each phase in a process pool.
+
+    Lines are confined to their tile, so tiles of the same phase cannot interfere, and every tile
+    sees the lines of earlier phases within its halo. Ends cut at a tile border are continued
+    when the neighboring tile is hatched; ends running into a tile of an earlier phase are continued
+    serially at the end. Tasks depend only on the results of earlier phases, which are merged in tile
+    order, so the result does not depend on scheduling.
+
+    Each phase gets the share of the remaining budget time that its tiles make up of the remaining
+    tiles, and each tile an even share of the remaining points; no phase starts once it is exhausted.
+    """
+    d_step = parameters["d_step"]
+    min_steps = parameters["min_steps"]
+    # Adaptive steps reach up to the test distance, and open ends must lie within the next tile's halo
+    max_step_length = abs(d_step)
+    if parameters["integrator"] != "EULER":
+        max_step_length = max(max_step_length, parameters["d_test_factor"] * parameters["d_sep_max"])
+    halo = int(math.ceil(parameters["d_sep_max"] + max_step_length)) + 2
+    layout = TileLayout(grid.width, grid.height, max(tile_size, 2 * halo), halo)
+
+    lines: list[list[tuple[float, float]]] = []
+    open_ends: dict[tuple[int, int], _OpenEnd] = {} # (line index, +1 forward / -1 backward) -> state
+    lines_near_tile: dict[tuple[int, int], set[int]] = {t.key: set() for t in layout.tiles}
+
+    seeds_in_tile: dict[tuple[int, int], list[tuple[float, float]]] = {t.key: [] for t in layout.tiles}
+    for seed in seeds:
+        tile = layout.tile_at(seed[0], seed[1])
+        if tile is not None:
+            seeds_in_tile[tile.key].append(seed)
+
+    def register_near_tiles(line_index: int, points: list[tuple[float, float]]):
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+        for t in layout.tiles_overlapping(min(xs), min(ys), max(xs), max(ys)):
+            lines_near_tile[t.key].add(line_index)
+
+    def set_open_end(key: tuple[int, int], end: _OpenEnd | None):
+        if end is None:
+            open_ends.pop(key, None)
+        else:
+            open_ends[key] = end
+
+    def end_point(key: tuple[int, int]) -> tuple[float, float]:
+        line_index, sign = key
+        return lines[line_index][-1] if sign > 0 else lines[line_index][0]
+
+    def make_task(tile: Tile, tile_budget: Budget | None) -> tuple[_HatchingTileTask, list[tuple[int, int]]]:
+        x0, y0, x1, y1 = layout.halo_region(tile)
+        halo_lines = []
+        halo_index = {}
+        for line_index in sorted(lines_near_tile[tile.key]):
+            points = np.array(lines[line_index], dtype=np.float64)
+            inside = (points[:, 0] >= x0) & (points[:, 0] < x1) & (points[:, 1] >= y0) & (points[:, 1] < y1)
+            if inside.any():
+                halo_index[line_index] = len(halo_lines)
+                halo_lines.append(points[inside] - (x0, y0))
+        end_keys = []
+        task_ends = []
+        for key in sorted(open_ends):
+            exit_tile = layout.tile_at(*open_ends[key].exit_point)
+            if exit_tile is not None and exit_tile.key == tile.key and key[0] in halo_index:
+                end_keys.append(key)
+                task_ends.append((halo_index[key[0]], end_point(key), key[1] * d_step, open_ends[key]))
+        seeds_local = [(x - x0, y - y0) for x, y in seeds_in_tile[tile.key]]
+        task = _HatchingTileTask(
+            layout.crop_pixels(grid, tile), (x0, y0), layout.local_bounds(tile), seeds_local,
+            halo_lines, task_ends, parameters, use_precomputed_planes, registry_type, wavefront, tile_budget,
+            statistics is not None
+        )
+        return task, end_keys
+
+    def apply_result(end_keys: list[tuple[int, int]], result: _HatchingTileResult):
+        for key, (extension, new_end) in zip(end_keys, result.extensions):
+            line_index, sign = key
+            if extension:
+                if sign > 0:
+                    lines[line_index].extend(extension)
+                else:
+                    lines[line_index][0:0] = reversed(extension)
+                register_near_tiles(line_index, extension)
+            set_open_end(key, new_end)
+        if budget is not None:
+            budget.add_points(sum(len(extension) for extension, _ in result.extensions))
+            budget.add_points(sum(len(sl.points) for sl in result.streamlines))
+            budget.truncated |= result.truncated
+        if statistics is not None:
+            statistics.merge(result.statistics)
+        for sl in result.streamlines:
+            line_index = len(lines)
+            lines.append(sl.points)
+            register_near_tiles(line_index, sl.points)
+            set_open_end((line_index, 1), sl.forward_end)
+            set_open_end((line_index, -1), sl.backward_end)
+
+    remaining_tiles = len(layout.tiles)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for phase in layout.phases(2):
+            if budget is not None and budget.is_exhausted():
+                break
+            tasks = [
+                make_task(tile, None if budget is None else budget.share(len(phase) / remaining_tiles, 1.0 / remaining_tiles))
+                for tile in phase
+            ]
+            results = executor.map(_hatch_tile, [task for task, _ in tasks])
+            for (_, end_keys), result in zip(tasks, results):
+                apply_result(end_keys, result)
+            remaining_tiles -= len(phase)
+
+    # Ends that ran into tiles of earlier phases are continued against all lines
+    if open_ends:
+        registry = create_point_registry(
+            registry_type, grid.width, grid.height, parameters["d_sep_max"],
+            parameters["d_test_factor"] * parameters["d_sep_max"] * parameters["d_sep_shadow_factor"], statistics
+        )
+        line_ids = [registry.add_points(line) for line in lines]
+        for key in sorted(open_ends):
+            if budget is not None and budget.is_exhausted():
+                break
+            line_index, sign = key
+            end = open_ends[key]
+            p = end_point(key)
+            gv = grid.grid_value(p[0], p[1])
+            if statistics is not None:
+                statistics.grid_samples += 1
+            extension, _, _ = continue_streamline(
+                grid, registry, p, gv.direction, gv.depth, sign * d_step,
+                0.5 * parameters["max_accum_angle"] - end.accum_angle, parameters["max_steps"] // 2 - end.step_count,
+                parameters["d_sep_max"], parameters["d_sep_shadow_factor"], parameters["gamma_luminance"],
+                parameters["d_test_factor"], parameters["max_depth_step"], parameters["max_hatched_luminance"],
+                use_precomputed_planes, own_entity_id=line_ids[line_index],
+                integrator=parameters["integrator"], max_step_error=parameters["max_step_error"], statistics=statistics
+            )
+            if extension:
+                registry.add_points(extension)
+                if budget is not None:
+                    budget.add_points(len(extension))
+                if sign > 0:
+                    lines[line_index].extend(extension)
+                else:
+                    lines[line_index][0:0] = reversed(extension)
+
+    long_lines = [line for line in lines if _step_count(line, d_step, parameters["integrator"]) > min_steps]
+    if statistics is not None and len(long_lines) < len(lines):
+        statistics.rejections["min_steps"] += len(lines) - len(long_lines)
+    return long_lines
 
 def streamlines_to_stroke_positions(
     width: int,
@@ -180,13 +1085,6 @@ def streamlines_to_stroke_positions(
     drawing_origin: tuple[float, float, float],
     drawing_x_axis: tuple[float, float, float],
     drawing_y_axis: tuple[float, float, float],
-    streamlines: list[list[tuple[float, float]]]
+    streamlines: Polylines
 ) -> np.ndarray:
-    width_inv = 1.0 / width
-    height_inv = 1.0 / height
-
-    return np.array([(
-            drawing_origin[0] + (x_coord := (p[0]*width_inv)) * drawing_x_axis[0] + (y_coord := (p[1]*height_inv)) * drawing_y_axis[0],
-            drawing_origin[1] + x_coord * drawing_x_axis[1] + y_coord * drawing_y_axis[1],
-            drawing_origin[2] + x_coord * drawing_x_axis[2] + y_coord * drawing_y_axis[2]
-        ) for sl in streamlines for p in sl], dtype=np.float32)
+    return pixels_to_drawing_positions(streamlines.points, width, height, drawing_origin, drawing_x_axis, drawing_y_axis)
@@ -0,0 +1,89 @@
+from dataclasses import dataclass
+import math
+
+import numpy as np
+
+from .grid import PixelDataGrid
+
+
+@dataclass(frozen=True)
+class Tile:
+    ix: int
+    iy: int
+    x_min: int
+    y_min: int
+    x_max: int # exclusive
+    y_max: int # exclusive
+
+    @property
+    def key(self) -> tuple[int, int]:
+        return (self.ix, self.iy)
+
+class TileLayout:
+    """
+    Partition of the pixel grid into square tiles, each with a halo of neighboring pixels.
+
+    Tiles are colored into stride x stride phases such that two tiles of the same phase are
+    separated by at least one tile of another phase, so their interiors can be processed concurrently
+    as long as the tile size exceeds the interaction distance.
+    """
+    def __init__(self, width: int, height: int, tile_size: int, halo: int):
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.halo = halo
+        self.tiles_x = math.ceil(width / tile_size)
+        self.tiles_y = math.ceil(height / tile_size)
+        self.tiles = [
+            Tile(ix, iy, ix * tile_size, iy * tile_size, min((ix + 1) * tile_size, width), min((iy + 1) * tile_size, height))
+            for iy in range(self.tiles_y) for ix in range(self.tiles_x)
+        ]
+
+    def tile_at(self, x: float, y: float) -> Tile | None:
+        ix = int(math.floor(x / self.tile_size))
+        iy = int(math.floor(y / self.tile_size))
+        if not (0 <= ix < self.tiles_x and 0 <= iy < self.tiles_y):
+            return None
+        return self.tiles[iy * self.tiles_x + ix]
+
+    def tiles_overlapping(self, x_min: float, y_min: float, x_max: float, y_max: float) -> list[Tile]:
+        """Tiles whose halo region intersects the given box."""
+        ix_min = max(int(math.floor((x_min - self.halo) / self.tile_size)), 0)
+        iy_min = max(int(math.floor((y_min - self.halo) / self.tile_size)), 0)
+        ix_max = min(int(math.floor((x_max + self.halo) / self.tile_size)), self.tiles_x - 1)
+        iy_max = min(int(math.floor((y_max + self.halo) / self.tile_size)), self.tiles_y - 1)
+        return [self.tiles[iy * self.tiles_x + ix] for iy in range(iy_min, iy_max + 1) for ix in range(ix_min, ix_max + 1)]
+
+    def phases(self, stride: int = 2) -> list[list[Tile]]:
+        """Tiles grouped by (ix % stride, iy % stride), in row-major phase order."""
+        return [
+            [t for t in self.tiles if t.ix % stride == px and t.iy % stride == py]
+            for py in range(stride) for px in range(stride)
+        ]
+
+    def halo_region(self, tile: Tile) -> tuple[int, int, int, int]:
+        """Pixel box (x_min, y_min, x_max, y_max) of the tile extended by the halo and clipped to the grid."""
+        return (
+            max(tile.x_min - self.halo, 0),
+            max(tile.y_min - self.halo, 0),
+            min(tile.x_max + self.halo, self.width),
+            min(tile.y_max + self.halo, self.height)
+        )
+
+    def local_bounds(self, tile: Tile) -> tuple[float, float, float, float]:
+        """
+        Tile box in the coordinates of its halo region. Sides on the border of the grid are left open,
+        so that only borders to other tiles cut a computation short.
+        """
+        x0, y0, _, _ = self.halo_region(tile)
+        return (
+            float(tile.x_min - x0) if tile.x_min > 0 else -math.inf,
+            float(tile.y_min - y0) if tile.y_min > 0 else -math.inf,
+            float(tile.x_max - x0) if tile.x_max < self.width else math.inf,
+            float(tile.y_max - y0) if tile.y_max < self.height else math.inf
+        )
+
+    def crop_pixels(self, grid: PixelDataGrid, tile: Tile) -> np.ndarray:
+        """Copy of the (height, width, 5) pixels in the halo region of the tile."""
+        x0, y0, x1, y1 = self.halo_region(tile)
+        return np.ascontiguousarray(grid.pixels.reshape(grid.height, grid.width, 5)[y0:y1, x0:x1])
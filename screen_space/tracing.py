@@ -0,0 +1,89 @@
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+import json
+import os
+import threading
+import time
+
+
+@dataclass
+class Span:
+    name: str
+    start: float # seconds since the tracer was created
+    depth: int # nesting level, 0 for top-level spans
+    duration: float = 0.0
+    sizes: dict[str, int | float] = field(default_factory=dict) # e.g. triangles, pixels or points
+
+class Tracer:
+    """
+    Records nested, timed spans of a run with the sizes of the data they processed.
+
+    Spans are opened with the span() context manager, which yields the Span so that sizes only known
+    at the end of a phase can be added to span.sizes. The recorded run can be exported as Chrome-trace
+    JSON (for chrome://tracing or Perfetto) and summarized as a table, so that long runs can be
+    profiled after the fact.
+    """
+    def __init__(self):
+        self.spans: list[Span] = []
+        self._origin = time.perf_counter()
+        self._depth = 0
+
+    @contextmanager
+    def span(self, name: str, **sizes: int | float):
+        span = Span(name, time.perf_counter() - self._origin, self._depth, sizes=dict(sizes))
+        self.spans.append(span)
+        self._depth += 1
+        try:
+            yield span
+        finally:
+            self._depth -= 1
+            span.duration = time.perf_counter() - self._origin - span.start
+
+    def chrome_trace(self) -> dict:
+        """The spans as complete ("X") events of the Chrome trace event format, in microseconds."""
+        pid = os.getpid()
+        tid = threading.get_ident()
+        return {
+            "traceEvents": [
+                {
+                    "name": span.name,
+                    "ph": "X",
+                    "ts": 1.0e6 * span.start,
+                    "dur": 1.0e6 * span.duration,
+                    "pid": pid,
+                    "tid": tid,
+                    "args": span.sizes
+                }
+                for span in self.spans
+            ],
+            "displayTimeUnit": "ms"
+        }
+
+    def write_chrome_trace(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+    def summary(self) -> str:
+        """Table of spans aggregated by name and nesting, with call counts, total time and summed sizes."""
+        rows: dict[tuple[str, ...], list] = {} # path -> [count, seconds, sizes]
+        path: list[str] = []
+        for span in self.spans:
+            del path[span.depth:]
+            path.append(span.name)
+            row = rows.setdefault(tuple(path), [0, 0.0, {}])
+            row[0] += 1
+            row[1] += span.duration
+            for key, value in span.sizes.items():
+                row[2][key] = row[2].get(key, 0) + value
+
+        labels = ["  " * (len(key) - 1) + key[-1] for key in rows]
+        width = max((len(label) for label in labels), default=0)
+        lines = [f"{'span':<{width}}  {'count':>6}  {'time [s]':>9}  sizes"]
+        for label, (count, seconds, sizes) in zip(labels, rows.values()):
+            size_text = ", ".join(f"{key}={value:g}" for key, value in sizes.items())
+            lines.append(f"{label:<{width}}  {count:>6}  {seconds:>9.3f}  {size_text}")
+        return "\n".join(lines)
+
+def traced(tracer: Tracer | None, name: str, **sizes: int | float):
+    """tracer.span(name, **sizes), or a no-op context yielding None without a tracer."""
+    return nullcontext() if tracer is None else tracer.span(name, **sizes)
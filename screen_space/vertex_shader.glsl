@@ -1,5 +1,6 @@
 void main() {
-    fragPos = position;
-    fragNorm = normal;
-    gl_Position = viewProjectionMatrix * vec4(position, 1.0f);
+    vec4 worldPos = modelMatrix * vec4(position, 1.0f);
+    fragPos = worldPos.xyz;
+    fragNorm = mat3(normalMatrix) * normal;
+    gl_Position = viewProjectionMatrix * worldPos;
 }
@@ -1,5 +1,5 @@
 import bpy
-from bpy.props import FloatProperty, IntProperty, BoolProperty, PointerProperty, EnumProperty
+from bpy.props import FloatProperty, IntProperty, BoolProperty, PointerProperty, EnumProperty, StringProperty
 
 
 def get_gp_layers(props, _context):
@@ -60,6 +60,88 @@ class HatchLineProperties(bpy.types.PropertyGroup):
         default="SHADER"
     )
 
+    geometry_cache_size: IntProperty(
+        name="Geometry Cache [MB]",
+        description="Keep the triangles of unchanged meshes between runs of the shader engine, up to this size (0 to disable)",
+        default=512,
+        min=0,
+        max=65536
+    )
+
+    frustum_culling: BoolProperty(
+        name="Frustum Culling",
+        description="Skip object instances whose bounding box lies outside the camera view before uploading the geometry",
+        default=True
+    )
+
+    back_face_culling: BoolProperty(
+        name="Back-Face Culling",
+        description="Skip triangles facing away from the camera before uploading the geometry (objects with a single instance only)",
+        default=False
+    )
+
+    point_registry: EnumProperty(
+        name="Point Registry",
+        description="Select the spatial data structure for separation tests",
+        items=[
+            ("GRID", "Grid of Lists", "Store points as objects in a uniform grid"),
+            ("FLAT", "Flat Arrays", "Store points in compact arrays with vectorized queries, using a tenth of the memory; pays off for batched candidates and dense lines, while single queries on sparse points are slower than with Grid of Lists"),
+            ("RASTER", "Distance Raster", "Stamp points into screen-resolution rasters of the nearest points, which answer most queries in constant time; the rest fall back to Grid of Lists, so the result is the same"),
+            ("MULTILEVEL", "Multi-Level Grid", "Use a hierarchy of grids so query cost follows the local separation distance")
+        ],
+        default="GRID"
+    )
+
+    precomputed_planes: BoolProperty(
+        name="Precomputed Planes",
+        description="Derive separation distances and radii once per pixel and interpolate them, instead of evaluating them at every sample. Stipple radii err on the large side",
+        default=False
+    )
+
+    worker_count: IntProperty(
+        name="Worker Processes",
+        description="Number of processes for generating tiles and simplifying lines in parallel (1 runs everything in this process)",
+        default=1,
+        min=1,
+        max=64
+    )
+
+    tile_size: IntProperty(
+        name="Tile Size",
+        description="Edge length in pixels of the tiles generated in parallel",
+        default=512,
+        min=64,
+        max=4096
+    )
+
+    time_budget: FloatProperty(
+        name="Time Budget [s]",
+        description="Stop generating each pass after this many seconds, not counting rendering, and keep the partial result, darkest regions first (0 for no limit)",
+        default=0.0,
+        min=0.0,
+        max=3600.0
+    )
+
+    point_budget: IntProperty(
+        name="Point Budget",
+        description="Stop generating each pass after this many line points or stipples and keep the partial result, darkest regions first (0 for no limit)",
+        default=0,
+        min=0
+    )
+
+    collect_statistics: BoolProperty(
+        name="Print Statistics",
+        description="Count grid samples, registry queries and rejections and time the generator phases, and print a summary to the console",
+        default=False
+    )
+
+    trace_file: StringProperty(
+        name="Trace File",
+        description="Write the timed phases of each run to this file as Chrome-trace JSON (empty for none)",
+        default="",
+        subtype="FILE_PATH"
+    )
+
     clip_luminance: BoolProperty(
         name="Clip Luminance",
         description="Clip luminance values to the range [0, 1]",
@@ -171,6 +253,25 @@ class HatchLineProperties(bpy.types.PropertyGroup):
         max=25.0
     )
 
+    integrator: EnumProperty(
+        name="Integrator",
+        description="Select how hatch lines follow the direction field",
+        items=[
+            ("EULER", "Euler", "Take fixed steps of the step size"),
+            ("RK2", "Adaptive RK2", "Take second-order steps between the step size and the line separation, controlled by the step error"),
+            ("RK4", "Adaptive RK4", "Take fourth-order steps between the step size and the line separation, controlled by the step error")
+        ],
+        default="EULER"
+    )
+
+    max_step_error: FloatProperty(
+        name="Max. Step Error [px]",
+        description="Maximum estimated position error of an adaptive integration step",
+        default=0.05,
+        min=0.001,
+        max=1.0
+    )
+
     max_steps: IntProperty(
         name="Max. Steps",
         description="Maximum number of steps per hatch line",
@@ -219,6 +320,12 @@ class HatchLineProperties(bpy.types.PropertyGroup):
         max=10.0
     )
 
+    wavefront_integration: BoolProperty(
+        name="Wavefront Integration",
+        description="Integrate the streamlines started next to each line together in vectorized steps (same result, Euler only). Experimental: usually no faster than tracing them one by one, as the first line traced next to a line blocks most of the other starts",
+        default=False
+    )
+
     crosshatching_enabled: BoolProperty(
         name="Enable Crosshatching",
         description="Add a second set of hatch lines crossing the primary set",
@@ -266,6 +373,12 @@ class HatchLineProperties(bpy.types.PropertyGroup):
         max=100
     )
 
+    batch_stipple_candidates: BoolProperty(
+        name="Batch Candidates",
+        description="Test the child candidates of several stipples at once and add the survivors together (about 5x faster than one by one with Grid of Lists, 2.5x with Raster, but produces a different pattern)",
+        default=False
+    )
+
     gamma_stippling: FloatProperty(
         name="Luminance Gamma",
         description="Gamma exponent for transforming luminance values",
@@ -305,6 +418,26 @@ class HatchLineProperties(bpy.types.PropertyGroup):
         max=25
     )
 
+    scribbling_search: EnumProperty(
+        name="Neighbor Search",
+        description="Select how the next stipple of a scribble is found",
+        items=[
+            ("SAMPLED", "Sub-Sampled", "Scan a random sub-sample of the remaining stipples (slow for many stipples)"),
+            ("INDEXED", "Indexed", "Find the exact nearest stipple with a spatial index"),
+            ("HILBERT", "Hilbert Curve", "Visit all stipples along a randomly shifted Hilbert curve"),
+            ("MORTON", "Morton Curve", "Visit all stipples along a randomly shifted Z-order curve through position and depth")
+        ],
+        default="SAMPLED"
+    )
+
+    scribbling_jitter: FloatProperty(
+        name="Neighbor Jitter",
+        description="Random relative increase of neighbor distances for the indexed search, or random perturbation of stipple positions in stipple spacings for the curve orderings",
+        default=0.0,
+        min=0.0,
+        max=10.0
+    )
+
     initial_sub_sampling_rate: IntProperty(
         name="Initial Sub-Sampling Rate",
         description="Initial sub-sampling rate for scribbles",
@@ -323,7 +456,7 @@ class HatchLineProperties(bpy.types.PropertyGroup):
 
     depth_factor: FloatProperty(
         name="Depth Factor",
-        description="Factor to adjust depth influence in scribbles",
+        description="Factor to adjust depth influence in scribbles (for the Morton order, relative to the extent of the stipples)",
         default=100.0,
         min=0.0,
         max=1.0e6
@@ -337,6 +470,12 @@ class HatchLineProperties(bpy.types.PropertyGroup):
         max=100
     )
 
+    spline_endpoints: BoolProperty(
+        name="Keep Scribble Ends",
+        description="Interpolate the scribbles through their first and last stipple instead of dropping the end segments",
+        default=False
+    )
+
     line_simplification_error_scribbling: FloatProperty(
         name="Max. Line Simplification Error [px^2]",
         description="Maximum error allowed when simplifying scribble lines",
@@ -364,6 +503,19 @@ class HATCH_PT_panel(bpy.types.Panel):
         box.prop(hatch_props, "seed_box_size_factor")
         box.prop(hatch_props, "render_resolution")
         box.prop(hatch_props, "render_engine")
+        if hatch_props.render_engine == "SHADER":
+            box.prop(hatch_props, "geometry_cache_size")
+            box.prop(hatch_props, "frustum_culling")
+            box.prop(hatch_props, "back_face_culling")
+        box.prop(hatch_props, "point_registry")
+        box.prop(hatch_props, "precomputed_planes")
+        box.prop(hatch_props, "worker_count")
+        if hatch_props.worker_count > 1:
+            box.prop(hatch_props, "tile_size")
+        box.prop(hatch_props, "time_budget")
+        box.prop(hatch_props, "point_budget")
+        box.prop(hatch_props, "collect_statistics")
+        box.prop(hatch_props, "trace_file")
         if hatch_props.render_engine == "BLENDER":
             box.label(text="Warning: Will overwrite compositor nodes.", icon="ERROR")
             box.prop(hatch_props, "clip_luminance")
@@ -401,12 +553,17 @@ class HATCH_PT_panel(bpy.types.Panel):
             box.prop(hatch_props, "gamma_hatching")
             box.prop(hatch_props, "d_test_factor")
             box.prop(hatch_props, "d_step")
+            box.prop(hatch_props, "integrator")
+            if hatch_props.integrator != "EULER":
+                box.prop(hatch_props, "max_step_error")
             box.prop(hatch_props, "max_steps")
             box.prop(hatch_props, "min_steps")
             box.prop(hatch_props, "line_simplification_error_hatching")
             box.prop(hatch_props, "max_depth_step")
             box.prop(hatch_props, "max_accum_angle")
             box.prop(hatch_props, "max_hatched_luminance")
+            if hatch_props.integrator == "EULER":
+                box.prop(hatch_props, "wavefront_integration")
             box.prop(hatch_props, "crosshatching_enabled")
             if hatch_props.crosshatching_enabled:
                 box.prop(hatch_props, "crossing_orientation_offset")
@@ -415,16 +572,24 @@ class HATCH_PT_panel(bpy.types.Panel):
             box.prop(hatch_props, "max_radius")
             box.prop(hatch_props, "min_radius")
             box.prop(hatch_props, "child_count")
+            box.prop(hatch_props, "batch_stipple_candidates")
             box.prop(hatch_props, "gamma_stippling")
             box.prop(hatch_props, "max_stippled_luminance")
             box.prop(hatch_props, "stroke_length")
             box.prop(hatch_props, "scribbling_enabled")
             if hatch_props.scribbling_enabled:
                 box.prop(hatch_props, "scribbling_iterations")
-                box.prop(hatch_props, "initial_sub_sampling_rate")
-                box.prop(hatch_props, "min_remaining_point_share")
-                box.prop(hatch_props, "depth_factor")
+                box.prop(hatch_props, "scribbling_search")
+                if hatch_props.scribbling_search == "SAMPLED":
+                    box.prop(hatch_props, "initial_sub_sampling_rate")
+                else:
+                    box.prop(hatch_props, "scribbling_jitter")
+                if hatch_props.scribbling_search in ("SAMPLED", "INDEXED"):
+                    box.prop(hatch_props, "min_remaining_point_share")
+                if hatch_props.scribbling_search != "HILBERT":
+                    box.prop(hatch_props, "depth_factor")
                 box.prop(hatch_props, "bezier_points_per_segment")
+                box.prop(hatch_props, "spline_endpoints")
                 box.prop(hatch_props, "line_simplification_error_scribbling")
 
         layout.separator()